@@ -0,0 +1,295 @@
+import json
+import os
+import threading
+import numpy as np
+from scipy import sparse
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models import Job
+from app.ranking import top_k_indices
+from app.vector_store import stack_rows
+
+ANN_FORMAT = 'job-ann-ivf'
+ANN_FORMAT_VERSION = 1
+
+MANIFEST_FILE = 'manifest.json'
+ARRAY_FILES = ('centroids', 'offsets', 'ids', 'indptr', 'indices', 'data')
+
+DEFAULT_NPROBE = 8
+
+SESSION_KEY = 'ann_index_changes'
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1.0
+    return matrix / norms[:, None]
+
+
+def _dense_query(query):
+    if sparse.issparse(query):
+        query = query.toarray()
+    return np.asarray(query, dtype=np.float32).ravel()
+
+
+def _nearest_centroids(vectors, centroids, batch_size=20000):
+    # Rows are normalized, so the nearest centroid has the largest dot product
+    assignment = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], batch_size):
+        scores = vectors[start:start + batch_size] @ centroids.T
+        assignment[start:start + batch_size] = np.asarray(scores).argmax(axis=1)
+    return assignment
+
+
+def spherical_kmeans(vectors, n_lists, n_iter=10, seed=0):
+    """k-means on the unit sphere (cosine distance) for L2-normalized CSR rows."""
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+    centroids = _normalize_rows(vectors[rng.choice(n, n_lists, replace=False)].toarray())
+    for _ in range(n_iter):
+        assignment = _nearest_centroids(vectors, centroids)
+        members = sparse.csr_matrix(
+            (np.ones(n, dtype=np.float32), (assignment, np.arange(n))), shape=(n_lists, n)
+        )
+        sums = np.asarray((members @ vectors).todense(), dtype=np.float32)
+        empty = ~sums.any(axis=1)
+        if empty.any():
+            # Re-seed empty lists from random rows
+            sums[empty] = vectors[rng.choice(n, int(empty.sum()))].toarray()
+        centroids = _normalize_rows(sums).astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file ANN index over L2-normalized TF-IDF job vectors.
+
+    Jobs are grouped by their nearest k-means centroid; a search scores the
+    query against the `nprobe` closest lists only. More lists probed means
+    higher recall and more work. Rows are stored as raw CSR arrays grouped
+    by list, so a saved index is memory-mapped on load.
+
+    Added jobs go to a small in-memory delta and removed ids are tombstoned;
+    save() writes them back into the grouped arrays.
+    """
+
+    def __init__(self, centroids, offsets, ids, indptr, indices, data, version=None, nprobe=DEFAULT_NPROBE):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.version = version
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+        self._delta_ids = np.array([], dtype=np.int64)
+        self._delta_lists = np.array([], dtype=np.int32)
+        self._delta_vectors = sparse.csr_matrix((0, self.dim), dtype=np.float32)
+        self._removed = np.array([], dtype=np.int64)
+
+    @property
+    def dim(self):
+        return self.centroids.shape[1]
+
+    @property
+    def n_lists(self):
+        return self.centroids.shape[0]
+
+    def __len__(self):
+        with self._lock:
+            stored = np.count_nonzero(~np.isin(self.ids, self._removed))
+            return int(stored) + len(self._delta_ids)
+
+    @classmethod
+    def build(cls, ids, vectors, n_lists=None, n_iter=10, train_size=100000, seed=0,
+              version=None, nprobe=DEFAULT_NPROBE):
+        """Clusters `vectors` (one CSR row per id in `ids`) into `n_lists` inverted lists."""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = sparse.csr_matrix(vectors, dtype=np.float32)
+        n = len(ids)
+        if n == 0:
+            raise ValueError("Cannot build an ANN index without vectors")
+        n_lists = min(n_lists or max(1, int(np.sqrt(n))), n)
+        # Centroids are trained on a sample, every row is then assigned
+        rng = np.random.default_rng(seed)
+        sample = vectors if n <= train_size else vectors[np.sort(rng.choice(n, train_size, replace=False))]
+        centroids = spherical_kmeans(sample, n_lists, n_iter, seed)
+        return cls._grouped(centroids, ids, vectors, _nearest_centroids(vectors, centroids), version, nprobe)
+
+    @classmethod
+    def _grouped(cls, centroids, ids, vectors, assignment, version, nprobe):
+        order = np.argsort(assignment, kind='stable')
+        grouped = vectors[order]
+        grouped.sort_indices()
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=len(centroids)), out=offsets[1:])
+        return cls(
+            centroids=np.asarray(centroids, dtype=np.float32),
+            offsets=offsets,
+            ids=ids[order],
+            indptr=grouped.indptr.astype(np.int64),
+            indices=grouped.indices.astype(np.int32),
+            data=grouped.data.astype(np.float32),
+            version=version,
+            nprobe=nprobe
+        )
+
+    def add(self, ids, vectors):
+        """Adds (or replaces) jobs without re-clustering."""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = sparse.csr_matrix(vectors, dtype=np.float32)
+        lists = _nearest_centroids(vectors, self.centroids)
+        with self._lock:
+            self._remove_locked(ids)
+            self._delta_ids = np.concatenate([self._delta_ids, ids])
+            self._delta_lists = np.concatenate([self._delta_lists, lists])
+            self._delta_vectors = sparse.vstack([self._delta_vectors, vectors], format='csr')
+
+    def remove(self, ids):
+        with self._lock:
+            self._remove_locked(np.asarray(ids, dtype=np.int64))
+
+    def _remove_locked(self, ids):
+        keep = ~np.isin(self._delta_ids, ids)
+        if not keep.all():
+            self._delta_ids = self._delta_ids[keep]
+            self._delta_lists = self._delta_lists[keep]
+            self._delta_vectors = self._delta_vectors[np.flatnonzero(keep)]
+        self._removed = np.union1d(self._removed, ids)
+
+    def _score_lists(self, lists, query):
+        # Each list is a contiguous block of rows, so its non-zeros are one
+        # slice of the (possibly memory-mapped) CSR arrays
+        ids = []
+        scores = []
+        for l in lists:
+            first, last = self.offsets[l], self.offsets[l + 1]
+            if first == last:
+                continue
+            bounds = np.asarray(self.indptr[first:last + 1])
+            start, end = bounds[0], bounds[-1]
+            contributions = np.asarray(self.data[start:end], dtype=np.float64) * query[self.indices[start:end]]
+            totals = np.concatenate([[0.0], np.cumsum(contributions)])
+            ids.append(np.asarray(self.ids[first:last]))
+            scores.append((totals[bounds[1:] - start] - totals[bounds[:-1] - start]).astype(np.float32))
+        if not ids:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        return np.concatenate(ids), np.concatenate(scores)
+
+    def search(self, query, k=10, nprobe=None):
+        """Ids and approximate cosine similarities of the `k` nearest jobs, best first."""
+        query = _dense_query(query)
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        lists = top_k_indices(self.centroids @ query, nprobe)
+        ids, scores = self._score_lists(lists, query)
+        with self._lock:
+            # Tombstones hide stored rows; a re-added job lives in the delta
+            if len(self._removed):
+                keep = ~np.isin(ids, self._removed)
+                ids, scores = ids[keep], scores[keep]
+            delta = np.isin(self._delta_lists, lists)
+            if delta.any():
+                ids = np.concatenate([ids, self._delta_ids[delta]])
+                scores = np.concatenate([scores, self._delta_vectors[np.flatnonzero(delta)] @ query])
+        top = top_k_indices(scores, k)
+        return ids[top], scores[top]
+
+    def _merged(self):
+        # Stored rows minus tombstones plus the delta, regrouped by list
+        with self._lock:
+            n = len(self.ids)
+            stored_lists = np.repeat(np.arange(self.n_lists, dtype=np.int32), np.diff(self.offsets))
+            stored = sparse.csr_matrix(
+                (np.asarray(self.data), np.asarray(self.indices), np.asarray(self.indptr)), shape=(n, self.dim)
+            )
+            keep = np.flatnonzero(~np.isin(self.ids, self._removed))
+            ids = np.concatenate([np.asarray(self.ids)[keep], self._delta_ids])
+            lists = np.concatenate([stored_lists[keep], self._delta_lists])
+            vectors = sparse.vstack([stored[keep], self._delta_vectors], format='csr')
+        return IVFIndex._grouped(self.centroids, ids, vectors, lists, self.version, self.nprobe)
+
+    def save(self, directory):
+        merged = self._merged()
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_FILES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(merged, name))
+        manifest = {
+            'format': ANN_FORMAT,
+            'format_version': ANN_FORMAT_VERSION,
+            'n_lists': merged.n_lists,
+            'dim': merged.dim,
+            'size': len(merged.ids),
+            'nprobe': merged.nprobe,
+            'vectorizer_version': merged.version
+        }
+        # The manifest is written last, so a directory with one is complete
+        manifest_path = os.path.join(directory, MANIFEST_FILE)
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(manifest_path + '.tmp', manifest_path)
+        return manifest
+
+    @classmethod
+    def load(cls, directory, nprobe=None):
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest.get('format') != ANN_FORMAT or manifest.get('format_version') != ANN_FORMAT_VERSION:
+            raise ValueError(f"{directory} is not a supported ANN index")
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in ARRAY_FILES}
+        # Centroids and list offsets are small and read on every search
+        arrays['centroids'] = np.array(arrays['centroids'])
+        arrays['offsets'] = np.array(arrays['offsets'])
+        return cls(version=manifest.get('vectorizer_version'), nprobe=nprobe or manifest['nprobe'], **arrays)
+
+
+def is_ann_index(path):
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def install_ann_index_hooks(index, vector_store):
+    """Applies committed job inserts, vector changes and deletes to `index`.
+
+    A job whose stored vector was dropped (its new text failed to vectorize)
+    is removed until a vector is stored again, so its old text no longer
+    finds it.
+    """
+    key = (SESSION_KEY, id(index))
+
+    def after_flush(session, flush_context):
+        changes = session.info.setdefault(key, {'added': {}, 'removed': set()})
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, Job) and (obj in session.new or inspect(obj).attrs.tfidf_vector.history.has_changes()):
+                stored = vector_store.stored_arrays(obj, 'job')
+                if stored is not None:
+                    changes['added'][obj.id] = stored
+                    changes['removed'].discard(obj.id)
+                else:
+                    changes['removed'].add(obj.id)
+                    changes['added'].pop(obj.id, None)
+        for obj in session.deleted:
+            if isinstance(obj, Job):
+                changes['removed'].add(obj.id)
+                changes['added'].pop(obj.id, None)
+
+    def after_commit(session):
+        changes = session.info.pop(key, None)
+        if not changes:
+            return
+        if changes['removed']:
+            index.remove(sorted(changes['removed']))
+        if changes['added']:
+            ids = sorted(changes['added'])
+            index.add(ids, stack_rows([changes['added'][i] for i in ids], index.dim))
+
+    def after_rollback(session):
+        session.info.pop(key, None)
+
+    hooks = [('after_flush', after_flush), ('after_commit', after_commit), ('after_rollback', after_rollback)]
+    for name, hook in hooks:
+        event.listen(Session, name, hook)
+    return hooks
+
+
+def remove_ann_index_hooks(hooks):
+    for name, hook in hooks:
+        event.remove(Session, name, hook)
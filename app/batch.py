@@ -0,0 +1,246 @@
+import json
+import numpy as np
+from sqlalchemy import select
+from app.models import Job, User
+from app.ranking import rankable
+from app.recommender import EDUCATION_LEVELS, highest_education_level
+from app.search_index import search_statement
+
+JOB_FIELDS = (
+    Job.id, Job.title, Job.description, Job.required_skills, Job.required_experience,
+    Job.required_education, Job.location, Job.remote_ok, Job.tfidf_vector
+)
+USER_FIELDS = (
+    User.id, User.skills, User.education, User.experience, User.location, User.remote_ok, User.tfidf_vector
+)
+
+# Memory the score tiles of one batch may use
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# Bytes per user x job pair of a tile: float32 similarities, float64 scores and
+# the temporaries of the top-k selection
+BYTES_PER_PAIR = 40
+# Users scored together against each job tile
+DEFAULT_USER_TILE = 1024
+
+# Ids looked up per IN clause, small enough for SQLite's variable limit
+ID_BATCH_SIZE = 500
+
+
+class JobColumns:
+    """The jobs of a batch as parallel arrays ordered by id.
+
+    Locations are coded against `location_codes`, which user locations are
+    looked up in, so comparing codes compares the strings.
+    """
+
+    def __init__(self, ids, vectors, required_experience, required_education, location_code, remote_ok,
+                 location_codes):
+        self.ids = ids
+        self.vectors = vectors
+        self.required_experience = required_experience
+        self.required_education = required_education
+        self.location_code = location_code
+        self.remote_ok = remote_ok
+        self.location_codes = location_codes
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _job_id_filter(db, job_ids, search_text):
+    ids = None
+    if search_text is not None:
+        bind = db.get_bind()
+        statement = search_statement(bind.dialect.name, search_text, str(bind.engine.url))
+        ids = set(db.execute(statement.with_only_columns(Job.id)).scalars())
+    if job_ids is not None:
+        ids = set(job_ids) if ids is None else ids & set(job_ids)
+    return None if ids is None else sorted(ids)
+
+
+def _rows_by_id(db, fields, ids):
+    rows = {}
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        batch = ids[start:start + ID_BATCH_SIZE]
+        rows.update((row.id, row) for row in db.execute(select(*fields).where(fields[0].in_(batch))))
+    return rows
+
+
+def load_jobs(db, vector_store, job_ids=None, search_text=None, batch_size=10000):
+    """Columns of every job, or of those in `job_ids` and/or matching `search_text`.
+
+    Vectors come from the stored payloads; stale ones are recomputed in
+    memory (not written back).
+    """
+    wanted = _job_id_filter(db, job_ids, search_text)
+    if wanted is None:
+        result = db.execute(select(*JOB_FIELDS).order_by(Job.id).execution_options(yield_per=batch_size))
+        rows = [row for partition in result.partitions() for row in partition]
+    else:
+        found = _rows_by_id(db, JOB_FIELDS, wanted)
+        rows = [found[i] for i in wanted if i in found]
+
+    location_codes = {}
+    return JobColumns(
+        ids=np.array([row.id for row in rows], dtype=np.int64),
+        vectors=vector_store.get_matrix(rows, 'job', write=False),
+        required_experience=np.array([row.required_experience for row in rows], dtype=np.float64),
+        required_education=np.array([EDUCATION_LEVELS.get(row.required_education.lower(), 0) for row in rows],
+                                    dtype=np.int8),
+        location_code=np.array([location_codes.setdefault(row.location, len(location_codes)) for row in rows],
+                               dtype=np.int32),
+        remote_ok=np.array([bool(row.remote_ok) for row in rows], dtype=bool),
+        location_codes=location_codes
+    )
+
+
+class UserColumns:
+    """The per-user inputs of the match score, as column vectors (users x 1)."""
+
+    def __init__(self, users, location_codes):
+        self.experience = np.array([user.experience for user in users], dtype=np.float64)[:, None]
+        # Unknown locations get -1, which no job has
+        self.location_code = np.array([location_codes.get(user.location, -1) for user in users],
+                                      dtype=np.int32)[:, None]
+        self.remote_ok = np.array([bool(user.remote_ok) for user in users], dtype=bool)[:, None]
+        self.education_level = np.array([highest_education_level(user) for user in users], dtype=np.int8)[:, None]
+
+    def __len__(self):
+        return len(self.experience)
+
+
+def match_scores(users, similarities, jobs, first=0):
+    """JobRecommender.calculate_match_scores for every user x job pair of a tile.
+
+    `users` is a UserColumns and `similarities` is users x jobs[first:first + n].
+    The terms are added in the same order and in float64, so each score is
+    what the per-user ranking computes for that job.
+    """
+    last = first + similarities.shape[1]
+    # Masked in-place adds: skipping a term is the same as adding 0.0, and no
+    # float64 temporaries the size of the tile are allocated
+    required_exp = jobs.required_experience[None, first:last]
+    total_scores = np.multiply(similarities, 0.6, dtype=np.float64)
+    experienced = users.experience >= required_exp
+    np.add(total_scores, 0.2, out=total_scores, where=experienced)
+    np.add(total_scores, 0.1, out=total_scores, where=~experienced & (users.experience >= required_exp * 0.8))
+
+    same_location = users.location_code == jobs.location_code[None, first:last]
+    same_location |= jobs.remote_ok[None, first:last] & users.remote_ok
+    np.add(total_scores, 0.1, out=total_scores, where=same_location)
+
+    educated = users.education_level >= jobs.required_education[None, first:last]
+    np.add(total_scores, 0.1, out=total_scores, where=educated)
+    return total_scores
+
+
+def tile_top_k(scores, k):
+    """Column positions of each row's `k` best scores, ties going to the lower position.
+
+    Same selection as app.ranking.top_k_indices on every row, without
+    sorting whole rows. Non-finite scores rank below every finite one.
+    """
+    n_rows, n = scores.shape
+    if k >= n:
+        return np.broadcast_to(np.arange(n), (n_rows, n))
+    scores = rankable(scores)
+    kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+    above = scores > kth
+    tied = scores == kth
+    needed = k - above.sum(axis=1, keepdims=True)
+    keep = above | (tied & (np.cumsum(tied, axis=1) <= needed))
+    return np.nonzero(keep)[1].reshape(n_rows, k)
+
+
+def _merge(best, candidates, k):
+    # Each is (positions, scores, similarities), n_rows x m; candidates come from
+    # later jobs, so sorting by (-score, position) keeps ties stable
+    if best is None:
+        positions, scores, similarities = candidates
+    else:
+        positions, scores, similarities = (np.concatenate(pair, axis=1) for pair in zip(best, candidates))
+    order = np.lexsort((positions, -scores), axis=-1)[:, :k]
+    return tuple(np.take_along_axis(array, order, axis=1) for array in (positions, scores, similarities))
+
+
+def tile_sizes(n_jobs, memory_budget=DEFAULT_MEMORY_BUDGET, user_tile=DEFAULT_USER_TILE):
+    """(users, jobs) per score tile, so a tile fits in `memory_budget`."""
+    user_tile = max(1, min(user_tile, memory_budget // BYTES_PER_PAIR))
+    job_tile = max(1, min(n_jobs, memory_budget // (BYTES_PER_PAIR * user_tile)))
+    return user_tile, job_tile
+
+
+def rank_users(users, user_vectors, jobs, top_k=10, job_tile=None):
+    """Top `top_k` (job id, score, similarity) per user, best first.
+
+    Similarities come from one sparse GEMM per job tile (users x tile), and
+    only each tile's best `top_k` per user survive into the running result.
+    """
+    if not len(jobs):
+        return [[] for _ in users]
+    job_tile = job_tile or len(jobs)
+    k = min(top_k, len(jobs))
+    columns = UserColumns(users, jobs.location_codes)
+    best = None
+    for first in range(0, len(jobs), job_tile):
+        tile_vectors = jobs.vectors[first:first + job_tile]
+        similarities = (user_vectors @ tile_vectors.T).toarray().astype(np.float32, copy=False)
+        scores = match_scores(columns, similarities, jobs, first)
+        positions = tile_top_k(scores, k)
+        best = _merge(best, (
+            positions + first,
+            np.take_along_axis(scores, positions, axis=1),
+            np.take_along_axis(similarities, positions, axis=1)
+        ), k)
+    positions, scores, similarities = best
+    return [
+        [(int(jobs.ids[p]), float(s), float(sim)) for p, s, sim in zip(positions[i], scores[i], similarities[i])]
+        for i in range(len(users))
+    ]
+
+
+def _user_tiles(db, user_ids, user_tile):
+    # Yields lists of (user id, row or None) in request order, or every user by id
+    if user_ids is None:
+        result = db.execute(select(*USER_FIELDS).order_by(User.id).execution_options(yield_per=user_tile))
+        for rows in result.partitions():
+            yield [(row.id, row) for row in rows]
+        return
+    for start in range(0, len(user_ids), user_tile):
+        batch = list(user_ids[start:start + user_tile])
+        found = _rows_by_id(db, USER_FIELDS, sorted(set(batch)))
+        yield [(user_id, found.get(user_id)) for user_id in batch]
+
+
+def recommend_batch(db, vector_store, user_ids=None, top_k=10, job_ids=None, search_text=None,
+                    memory_budget=DEFAULT_MEMORY_BUDGET, user_tile=DEFAULT_USER_TILE):
+    """Yields (user id, [(job id, score, similarity), ...]) per user, tile by tile.
+
+    `user_ids` None means every user. Unknown users yield None instead of a
+    list. Jobs are loaded once; the users x jobs scores are computed in
+    tiles sized by `memory_budget`, so memory does not grow with the number
+    of users or jobs beyond the job columns themselves.
+    """
+    jobs = load_jobs(db, vector_store, job_ids, search_text)
+    user_tile, job_tile = tile_sizes(len(jobs), memory_budget, user_tile)
+    for tile in _user_tiles(db, user_ids, user_tile):
+        users = [row for _, row in tile if row is not None]
+        rankings = iter(rank_users(users, vector_store.get_matrix(users, 'user', write=False), jobs, top_k, job_tile)
+                        if users else [])
+        for user_id, row in tile:
+            yield user_id, next(rankings) if row is not None else None
+
+
+def ndjson_lines(results):
+    """One JSON line per (user id, ranking) from recommend_batch."""
+    for user_id, ranking in results:
+        if ranking is None:
+            yield json.dumps({"user_id": user_id, "error": "User not found"}) + "\n"
+            continue
+        yield json.dumps({
+            "user_id": user_id,
+            "recommendations": [
+                {"job_id": job_id, "match_score": score, "similarity_score": similarity}
+                for job_id, score, similarity in ranking
+            ]
+        }) + "\n"
@@ -1,139 +1,252 @@
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from app.models import Job  # Add this import
+from scipy import sparse
+from app.metrics import timer
+from app.ranking import TopK, top_k_indices
+from app.vector_store import VectorStore
+
+EDUCATION_LEVELS = {
+    'high school': 1,
+    'associate': 2,
+    'bachelor': 3,
+    'master': 4,
+    'phd': 5
+}
+
+# Level of a candidate without any education entry; below every requirement
+NO_EDUCATION = -1
+
+def education_level(entry):
+    return EDUCATION_LEVELS.get(entry.lower().split(',')[0].strip(), 0)
+
+def required_education_level(required_education):
+    return EDUCATION_LEVELS.get(required_education.lower(), 0)
+
+def skill_matrix(skill_lists, skill_ids):
+    """Boolean candidate x skill CSR matrix; unseen skills are added to `skill_ids`."""
+    indices = []
+    indptr = [0]
+    for skills in skill_lists:
+        indices.extend(sorted({skill_ids.setdefault(skill, len(skill_ids)) for skill in skills or ()}))
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int8), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, len(skill_ids))
+    )
+
+class CandidateColumns:
+    """Per-candidate values the scoring needs, as parallel arrays.
+
+    `skills` is a CSR matrix over the skill vocabulary `skill_ids`. `vectors`
+    holds the content vectors when they are already known (app.feature_store
+    keeps them); otherwise they are read from `candidates` when scoring.
+    Rows of `vectors` that were not stored are empty; `pending` holds their
+    code in `pending_vectors` (-1 for the others), so they are only
+    vectorized for the candidates that get scored.
+    """
+
+    def __init__(self, experience, education_level, skills, skill_ids, candidates=None, vectors=None,
+                 pending=None, pending_vectors=None):
+        self.experience = experience
+        self.education_level = education_level
+        self.skills = skills
+        self.skill_ids = skill_ids
+        self.candidates = candidates
+        self.vectors = vectors
+        self.pending = pending
+        self.pending_vectors = pending_vectors
+
+    @classmethod
+    def from_candidates(cls, candidates):
+        candidates = list(candidates)
+        skill_ids = {}
+        return cls(
+            experience=experience_column(candidates),
+            education_level=education_column(candidates),
+            skills=skill_matrix([c.skills for c in candidates], skill_ids),
+            skill_ids=skill_ids,
+            candidates=candidates
+        )
+
+    def __len__(self):
+        return len(self.experience)
+
+    def subset(self, indices):
+        return CandidateColumns(
+            experience=self.experience[indices],
+            education_level=self.education_level[indices],
+            skills=self.skills[indices],
+            skill_ids=self.skill_ids,
+            candidates=[self.candidates[i] for i in indices] if self.candidates is not None else None,
+            vectors=self.vectors[indices] if self.vectors is not None else None,
+            pending=self.pending[indices] if self.pending is not None else None,
+            pending_vectors=self.pending_vectors
+        )
+
+    def complete_vectors(self):
+        """`vectors` with the pending rows computed."""
+        if self.pending is None:
+            return self.vectors
+        positions = np.flatnonzero(self.pending >= 0)
+        if not len(positions):
+            return self.vectors
+        computed = self.pending_vectors.matrix(self.pending[positions])
+        # Pending rows are empty, so scattering the computed rows in is a sum
+        scatter = sparse.csr_matrix(
+            (np.ones(len(positions), dtype=np.float32), (positions, np.arange(len(positions)))),
+            shape=(len(self), len(positions))
+        )
+        return (self.vectors + scatter @ computed).tocsr()
+
+    def skill_counts(self, required_skills):
+        """Number of `required_skills` each candidate has."""
+        wanted = np.zeros(self.skills.shape[1], dtype=np.int32)
+        for skill in required_skills:
+            skill_id = self.skill_ids.get(skill)
+            if skill_id is not None and skill_id < len(wanted):
+                wanted[skill_id] = 1
+        return self.skills @ wanted
+
+def experience_column(candidates):
+    return np.array([c.experience for c in candidates], dtype=np.float32)
+
+def education_column(candidates):
+    return np.array(
+        [max((education_level(edu) for edu in c.education or ()), default=NO_EDUCATION) for c in candidates],
+        dtype=np.int8
+    )
+
+def _as_columns(candidates):
+    return candidates if isinstance(candidates, CandidateColumns) else CandidateColumns.from_candidates(candidates)
 
 class CandidateRecommender:
     def __init__(self, vectorizer):
         self.vectorizer = vectorizer
+        self.vector_store = VectorStore(vectorizer)
 
     def _calculate_content_similarity(self, job, candidates):
-        if not candidates:
+        columns = _as_columns(candidates)
+        if not len(columns):
             return np.array([])
             
-        # Transform job text
-        job_vector = self.vectorizer.transform_job(job)
-        
-        # Transform candidate texts
-        candidate_vectors = []
-        for candidate in candidates:
-            # Create a Job object from candidate data
-            candidate_job = Job(
-                id=candidate.id,
-                title=' '.join(candidate.skills),
-                description=' '.join(candidate.education),
-                required_skills=candidate.skills,
-                required_education=candidate.education[0] if candidate.education else '',
-                required_experience=candidate.experience,
-                location=candidate.location,
-                remote_ok=candidate.remote_ok
-            )
-            candidate_vectors.append(self.vectorizer.transform_job(candidate_job))
-        
-        # Stack all candidate vectors
-        candidate_vectors = np.vstack(candidate_vectors)
-        
-        # Calculate similarity between job and each candidate
-        similarities = cosine_similarity(candidate_vectors, job_vector.reshape(1, -1)).flatten()
-        return similarities
+        # Stored rows are L2-normalized, so cosine similarity is a sparse mat-vec
+        job_vector = self.vector_store.get_vector(job, 'job')
+        candidate_vectors = columns.complete_vectors()
+        if candidate_vectors is None:
+            candidate_vectors = self.vector_store.get_matrix(columns.candidates, 'candidate')
+        return candidate_vectors @ job_vector.toarray().ravel()
 
     def _calculate_experience_match(self, job, candidates):
-        scores = []
-        for candidate in candidates:
-            if candidate.experience >= job.required_experience:
-                # Give bonus points for experience up to 2 years over requirement
-                extra_exp = min(candidate.experience - job.required_experience, 2.0)
-                score = 1.0 + (extra_exp / 4.0)  # Max score is 1.5
-            else:
-                # Penalize missing experience
-                missing_exp = job.required_experience - candidate.experience
-                score = max(0.0, 1.0 - (missing_exp / job.required_experience))
-            scores.append(score)
-        return np.array(scores)
+        experience = _as_columns(candidates).experience
+        required = np.float32(job.required_experience)
+        # Give bonus points for experience up to 2 years over requirement (max score is 1.5)
+        bonus = 1.0 + np.minimum(experience - required, 2.0) / 4.0
+        # Penalize missing experience
+        with np.errstate(divide='ignore', invalid='ignore'):
+            penalty = np.maximum(0.0, 1.0 - (required - experience) / required)
+        return np.where(experience >= required, bonus, penalty)
 
     def _calculate_education_match(self, job, candidates):
-        scores = []
-        for candidate in candidates:
-            if self._meets_education_requirement(job.required_education, candidate.education):
-                scores.append(1.0)
-            else:
-                scores.append(0.0)
-        return np.array(scores)
-
-    def _meets_education_requirement(self, required_education, candidate_education):
-        education_levels = {
-            'high school': 1,
-            'associate': 2,
-            'bachelor': 3,
-            'master': 4,
-            'phd': 5
-        }
-        
-        required_level = education_levels.get(required_education.lower(), 0)
-        
-        # Check if any of candidate's education meets or exceeds requirement
-        for edu in candidate_education:
-            edu_parts = edu.lower().split(',')
-            if edu_parts:
-                level = edu_parts[0].strip()
-                if education_levels.get(level, 0) >= required_level:
-                    return True
-        return False
+        return self._meets_education_requirement(job, candidates).astype(np.float64)
+
+    def _meets_education_requirement(self, job, candidates):
+        # Highest education level meets or exceeds the requirement
+        return _as_columns(candidates).education_level >= required_education_level(job.required_education)
+
+    def score(self, job, candidates, positions=None):
+        """Scores the candidates that pass the hard requirements.
+
+        `positions` optionally restricts scoring to a prefiltered subset (e.g.
+        from app.skill_index). Returns (positions, overall scores, content
+        scores) of every candidate with a positive score, in input order;
+        positions index into `candidates`.
+        """
+        columns = _as_columns(candidates)
+        if positions is None:
+            positions = np.arange(len(columns))
+        else:
+            columns = columns.subset(positions)
+
+        # Filter out candidates that don't meet minimum requirements before
+        # anything is vectorized
+        with timer('candidate_filter'):
+            mask = self._apply_hard_requirements(job, columns)
+        eligible = positions[mask]
+        if len(eligible) == 0:
+            return eligible, np.array([]), np.array([])
+        columns = columns.subset(np.flatnonzero(mask))
 
-    def get_recommendations(self, job, candidates, top_n=10):
         # Content similarity (40% of score)
-        content_score = self._calculate_content_similarity(job, candidates)
-        
-        # Required skills match (30% of score)
-        skills_score = self._calculate_skills_match(job, candidates)
-        
-        # Experience match (20% of score)
-        experience_score = self._calculate_experience_match(job, candidates)
-        
-        # Education match (10% of score)
-        education_score = self._calculate_education_match(job, candidates)
-        
-        # Calculate weighted score
-        overall_scores = (
-            0.4 * content_score +
-            0.3 * skills_score +
-            0.2 * experience_score +
-            0.1 * education_score
-        )
+        with timer('candidate_similarity'):
+            content_score = self._calculate_content_similarity(job, columns)
         
-        # Filter out candidates that don't meet minimum requirements
-        mask = self._apply_hard_requirements(job, candidates)
-        overall_scores[~mask] = -1
+        with timer('candidate_scoring'):
+            # Required skills match (30% of score)
+            skills_score = self._calculate_skills_match(job, columns)
+            
+            # Experience match (20% of score)
+            experience_score = self._calculate_experience_match(job, columns)
+            
+            # Education match (10% of score)
+            education_score = self._calculate_education_match(job, columns)
+            
+            # Calculate weighted score
+            overall_scores = (
+                0.4 * content_score +
+                0.3 * skills_score +
+                0.2 * experience_score +
+                0.1 * education_score
+            )
         
+        keep = overall_scores > 0
+        return eligible[keep], overall_scores[keep], content_score[keep]
+
+    def rank(self, job, candidates, top_n=10, positions=None):
+        """Like score() but only the best `top_n`, best first."""
+        positions, overall_scores, content_scores = self.score(job, candidates, positions)
         # Get top candidates
-        top_indices = np.argsort(overall_scores)[::-1][:top_n]
-        
+        top = top_k_indices(overall_scores, top_n)
+        return positions[top], overall_scores[top], content_scores[top]
+
+    def rank_chunks(self, job, chunks, top_n=10):
+        """Best `top_n` over a stream of (columns, keys) chunks.
+
+        Every chunk is scored as a batch and only its winners enter a bounded
+        heap, so memory is O(chunk + top_n). Returns the winners as
+        (key, overall score, content score), best first, and the number of
+        candidates with a positive score across all chunks.
+        """
+        top = TopK(top_n)
+        eligible = 0
+        for columns, keys in chunks:
+            positions, overall_scores, content_scores = self.score(job, columns)
+            eligible += len(positions)
+            for i in top_k_indices(overall_scores, top_n):
+                top.push(overall_scores[i], (keys[positions[i]], overall_scores[i], content_scores[i]))
+        return top.items(), eligible
+
+    def get_recommendations(self, job, candidates, top_n=10):
+        columns = _as_columns(candidates)
+        positions, overall_scores, content_scores = self.rank(job, columns, top_n)
         return [
-            (candidates[i], overall_scores[i], content_score[i])
-            for i in top_indices if overall_scores[i] > 0
+            (columns.candidates[i], overall_score, content_score)
+            for i, overall_score, content_score in zip(positions, overall_scores, content_scores)
         ]
 
     def _apply_hard_requirements(self, job, candidates):
-        mask = np.ones(len(candidates), dtype=bool)
-        for i, candidate in enumerate(candidates):
+        columns = _as_columns(candidates)
+        required_skills = set(job.required_skills or ())
+        return (
             # Must have minimum experience
-            if candidate.experience < job.required_experience:
-                mask[i] = False
+            (columns.experience >= np.float32(job.required_experience)) &
             # Must have required education level
-            if not self._meets_education_requirement(job.required_education, candidate.education):
-                mask[i] = False
+            self._meets_education_requirement(job, columns) &
             # Must have all essential skills
-            if not all(skill in candidate.skills for skill in job.required_skills):
-                mask[i] = False
-        return mask
+            (columns.skill_counts(required_skills) == len(required_skills))
+        )
 
     def _calculate_skills_match(self, job, candidates):
-        scores = []
-        required_skills = set(job.required_skills)
-        for candidate in candidates:
-            candidate_skills = set(candidate.skills)
-            if required_skills:
-                score = len(required_skills.intersection(candidate_skills)) / len(required_skills)
-            else:
-                score = 0
-            scores.append(score)
-        return np.array(scores)
\ No newline at end of file
+        columns = _as_columns(candidates)
+        required_skills = set(job.required_skills or ())
+        if not required_skills:
+            return np.zeros(len(columns))
+        return columns.skill_counts(required_skills) / len(required_skills)
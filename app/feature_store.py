@@ -0,0 +1,466 @@
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+from scipy import sparse
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from app.models import User
+from app.candidate_recommender import (
+    CandidateColumns, experience_column, education_column, skill_matrix
+)
+from app.skill_index import SkillIndex
+from app.vector_store import PendingVectors
+
+logger = logging.getLogger('job_recommender')
+
+# Documented memory budget of the store, in bytes per candidate. A typical
+# candidate needs ~20 bytes of scalar columns, ~5 bytes per skill and ~8 bytes
+# per non-zero TF-IDF weight, so 1 KB leaves room for ~100 distinct terms and
+# keeps a million candidates under 1 GB.
+MEMORY_BUDGET_PER_CANDIDATE = 1024
+
+CANDIDATE_FIELDS = (
+    User.id, User.skills, User.experience, User.education,
+    User.location, User.remote_ok, User.tfidf_vector
+)
+
+# Changed ids are looked up in batches small enough for SQLite's variable limit
+ID_BATCH_SIZE = 500
+
+SESSION_KEY = 'candidate_feature_changes'
+
+# Rows are checked again for this many seconds after their updated_at, for
+# clock differences between writers and transactions that commit late
+UPDATE_LAG = 5.0
+
+FEATURES_FILE = 'features.json'
+COLUMN_FILES = ('ids', 'experience', 'education_level', 'remote_ok', 'location_code')
+MATRIX_FILES = ('skills', 'vectors')
+
+
+def _csr_nbytes(matrix):
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+def _widen(matrix, n_columns):
+    if matrix.shape[1] == n_columns:
+        return matrix
+    matrix = matrix.copy()
+    matrix.resize((matrix.shape[0], n_columns))
+    return matrix
+
+
+class CandidateFeatures(CandidateColumns):
+    """All candidates as columnar arrays, ordered by id.
+
+    Besides the scoring columns this keeps the remote flag and a location
+    code (an index into `locations`). Instances are never modified; the
+    store swaps in a new one when rows change.
+    """
+
+    def __init__(self, ids, remote_ok, location_code, locations, version, **columns):
+        super().__init__(**columns)
+        self.ids = ids
+        self.remote_ok = remote_ok
+        self.location_code = location_code
+        self.locations = locations
+        self.version = version
+
+    def subset(self, indices):
+        columns = super().subset(indices)
+        return CandidateFeatures(
+            ids=self.ids[indices],
+            remote_ok=self.remote_ok[indices],
+            location_code=self.location_code[indices],
+            locations=self.locations,
+            version=self.version,
+            **vars(columns)
+        )
+
+    def iter_chunks(self, positions=None, chunk_size=10000):
+        """Yields (columns, ids) for consecutive chunks of `positions` (default: all rows)."""
+        if positions is None:
+            positions = np.arange(len(self))
+        for start in range(0, len(positions), chunk_size):
+            chunk = positions[start:start + chunk_size]
+            yield self.subset(chunk), self.ids[chunk]
+
+    @property
+    def nbytes(self):
+        arrays = (self.ids, self.experience, self.education_level, self.remote_ok, self.location_code)
+        if self.pending is not None:
+            arrays += (self.pending,)
+        return sum(array.nbytes for array in arrays) + _csr_nbytes(self.skills) + _csr_nbytes(self.vectors)
+
+    def save(self, directory):
+        """Writes the arrays as .npy files that other processes memory-map with load().
+
+        Pending vectors are computed first, so the saved vectors are complete.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in COLUMN_FILES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        for name in MATRIX_FILES:
+            matrix = self.complete_vectors() if name == 'vectors' else getattr(self, name)
+            for part in ('data', 'indices', 'indptr'):
+                np.save(os.path.join(directory, f"{name}_{part}.npy"), getattr(matrix, part))
+        header = {
+            'skill_names': list(self.skill_ids),
+            'locations': list(self.locations),
+            'version': self.version,
+            'shapes': {name: list(getattr(self, name).shape) for name in MATRIX_FILES}
+        }
+        # Written last, so a directory with a header is complete
+        path = os.path.join(directory, FEATURES_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(header, f)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, FEATURES_FILE)) as f:
+            header = json.load(f)
+
+        def array(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+
+        matrices = {
+            name: sparse.csr_matrix(
+                (array(f"{name}_data"), array(f"{name}_indices"), array(f"{name}_indptr")),
+                shape=tuple(header['shapes'][name]), copy=False
+            )
+            for name in MATRIX_FILES
+        }
+        return cls(
+            skill_ids={name: i for i, name in enumerate(header['skill_names'])},
+            locations=header['locations'],
+            version=header['version'],
+            **{name: array(name) for name in COLUMN_FILES},
+            **matrices
+        )
+
+
+def _row_skills(features, positions, skill_names):
+    # Maps candidate id -> skill names from the rows of a skill CSR matrix
+    skills = features.skills
+    return {
+        int(features.ids[p]): [skill_names[j] for j in skills.indices[skills.indptr[p]:skills.indptr[p + 1]]]
+        for p in positions
+    }
+
+
+def positions_of(features, ids):
+    """Positions in `features` of the sorted `ids` it contains (None stays None, i.e. all rows)."""
+    if ids is None:
+        return None
+    positions = np.searchsorted(features.ids, ids)
+    inside = positions < len(features.ids)
+    positions, ids = positions[inside], ids[inside]
+    # The index may already reflect a newer refresh than `features`
+    return positions[features.ids[positions] == ids]
+
+
+def _merge_pending(parts):
+    # Renumbers the pending rows the parts still reference into one PendingVectors
+    codes = []
+    selections = []
+    offset = 0
+    for part in parts:
+        part_codes = np.full(len(part), -1, dtype=np.int32)
+        used = np.flatnonzero(part.pending >= 0)
+        part_codes[used] = np.arange(offset, offset + len(used), dtype=np.int32)
+        codes.append(part_codes)
+        selections.append((part.pending_vectors, part.pending[used]))
+        offset += len(used)
+    pending_vectors = parts[-1].pending_vectors
+    return np.concatenate(codes), PendingVectors.combine(pending_vectors.store, pending_vectors.kind, selections)
+
+
+def _concat(parts):
+    skill_width = max(part.skills.shape[1] for part in parts)
+    pending, pending_vectors = _merge_pending(parts)
+    return CandidateFeatures(
+        ids=np.concatenate([part.ids for part in parts]),
+        experience=np.concatenate([part.experience for part in parts]),
+        education_level=np.concatenate([part.education_level for part in parts]),
+        remote_ok=np.concatenate([part.remote_ok for part in parts]),
+        location_code=np.concatenate([part.location_code for part in parts]),
+        skills=sparse.vstack([_widen(part.skills, skill_width) for part in parts], format='csr'),
+        vectors=sparse.vstack([part.vectors for part in parts], format='csr'),
+        pending=pending,
+        pending_vectors=pending_vectors,
+        skill_ids=parts[-1].skill_ids,
+        locations=parts[-1].locations,
+        version=parts[-1].version
+    )
+
+
+class CandidateFeatureStore:
+    """Process-level columnar copy of every candidate for /recommend-candidates.
+
+    The first refresh loads all users in batches without building ORM
+    objects. Later refreshes only read rows with an id above the highest one
+    loaded, rows whose `updated_at` is newer than the last one seen (writes
+    from other processes), plus the ids that committed sessions reported as
+    changed (see install_feature_store_hooks). A bulk update/delete, a table
+    re-create or a new vectorizer version triggers a full reload, and so
+    does `full_reload_interval` seconds passing, which also drops candidates
+    other processes deleted.
+
+    Content vectors come from the stored `tfidf_vector` payloads; rows
+    without a current one are only vectorized once a request scores them,
+    i.e. after the hard-requirement mask (see PendingVectors).
+    """
+
+    def __init__(self, vector_store, batch_size=10000, memory_budget=MEMORY_BUDGET_PER_CANDIDATE,
+                 full_reload_interval=None):
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.memory_budget = memory_budget
+        self.full_reload_interval = full_reload_interval
+        self._lock = threading.Lock()
+        self._features = None
+        self._watermark = 0
+        self._updated_since = 0.0
+        self._updated_seen = {}
+        self._loaded_at = None
+        self._changed = set()
+        self._deleted = set()
+        self._reload = True
+        self._skill_ids = {}
+        self._location_codes = {}
+        self._locations = []
+        self.skill_index = SkillIndex()
+
+    def mark_changed(self, ids):
+        with self._lock:
+            self._changed.update(ids)
+
+    def mark_deleted(self, ids):
+        with self._lock:
+            self._deleted.update(ids)
+
+    def invalidate(self):
+        with self._lock:
+            self._reload = True
+
+    def _location_code(self, location):
+        location = location or ''
+        code = self._location_codes.get(location)
+        if code is None:
+            code = self._location_codes[location] = len(self._locations)
+            self._locations.append(location)
+        return code
+
+    def _build(self, rows, version):
+        vectors, missing = self.vector_store.stored_matrix(rows, 'candidate')
+        pending = np.full(len(rows), -1, dtype=np.int32)
+        pending[missing] = np.arange(len(missing), dtype=np.int32)
+        return CandidateFeatures(
+            ids=np.array([row.id for row in rows], dtype=np.int64),
+            experience=experience_column(rows),
+            education_level=education_column(rows),
+            remote_ok=np.array([bool(row.remote_ok) for row in rows], dtype=bool),
+            location_code=np.array([self._location_code(row.location) for row in rows], dtype=np.int32),
+            skills=skill_matrix([row.skills for row in rows], self._skill_ids),
+            vectors=vectors,
+            pending=pending,
+            pending_vectors=PendingVectors(self.vector_store, [rows[i] for i in missing], 'candidate'),
+            skill_ids=self._skill_ids,
+            locations=self._locations,
+            version=version
+        )
+
+    def _load(self, db, condition, version):
+        statement = select(*CANDIDATE_FIELDS).where(condition).order_by(User.id)
+        result = db.execute(statement.execution_options(yield_per=self.batch_size))
+        return [self._build(rows, version) for rows in result.partitions()]
+
+    def _full_load(self, db, version):
+        self._skill_ids = {}
+        self._location_codes = {}
+        self._locations = []
+        parts = self._load(db, User.id.isnot(None), version)
+        features = _concat(parts) if parts else self._build([], version)
+        self.skill_index = SkillIndex.from_columns(features.ids, features.skills, list(self._skill_ids))
+        return features
+
+    def _incremental_load(self, db, version):
+        changed = sorted(self._changed)
+        parts = self._load(db, User.id > self._watermark, version)
+        for start in range(0, len(changed), ID_BATCH_SIZE):
+            batch = [i for i in changed[start:start + ID_BATCH_SIZE] if i <= self._watermark]
+            if batch:
+                parts.extend(self._load(db, User.id.in_(batch), version))
+        if not parts and not self._deleted and not changed:
+            return self._features
+
+        # Changed rows that are no longer found are dropped like deleted ones
+        removed = np.array(sorted(self._deleted | set(changed)), dtype=np.int64)
+        base = self._features
+        dropped = np.isin(base.ids, removed)
+        skill_names = list(self._skill_ids)
+        self.skill_index.update(
+            added={i: skills for part in parts for i, skills in _row_skills(part, range(len(part)), skill_names).items()},
+            removed=_row_skills(base, np.flatnonzero(dropped), skill_names)
+        )
+        keep = np.flatnonzero(~dropped)
+        merged = _concat([base.subset(keep)] + parts)
+        order = np.argsort(merged.ids, kind='stable')
+        return merged.subset(order)
+
+    def _reload_due(self):
+        return self.full_reload_interval is not None and \
+            time.monotonic() - self._loaded_at >= self.full_reload_interval
+
+    def _recent_updates(self, db, since):
+        # id -> updated_at of the rows any process wrote after `since` (for a
+        # full load, after the newest write), going back UPDATE_LAG seconds
+        if since is None:
+            since = db.scalar(select(func.max(User.updated_at)))
+            if since is None:
+                return {}
+        rows = db.execute(select(User.id, User.updated_at).where(User.updated_at > since - UPDATE_LAG))
+        return {row.id: row.updated_at for row in rows}
+
+    def refresh(self, db):
+        """Brings the store up to date and returns the current CandidateFeatures."""
+        version = self.vector_store.vectorizer.version
+        with self._lock:
+            features = self._features
+            full = features is None or self._reload or features.version != version or self._reload_due()
+            # Read before the rows themselves, so writes made meanwhile are seen next time
+            recent = self._recent_updates(db, None if full else self._updated_since)
+            if full:
+                self._reload = False
+                self._changed.clear()
+                self._deleted.clear()
+                features = self._full_load(db, version)
+                self._loaded_at = time.monotonic()
+            else:
+                self._changed.update(i for i, updated_at in recent.items() if self._updated_seen.get(i) != updated_at)
+                features = self._incremental_load(db, version)
+                self._changed.clear()
+                self._deleted.clear()
+            self._updated_seen = recent
+            self._updated_since = max(recent.values(), default=self._updated_since)
+            if features is not self._features:
+                self._features = features
+                self._watermark = int(features.ids.max()) if len(features) else 0
+                self._check_budget(features)
+            return features
+
+    def stream(self, db, chunk_size=None):
+        """Yields (columns, ids) chunks read straight from the database.
+
+        Nothing is kept in the store, so memory stays at one chunk; used when
+        the candidates should not be held in memory.
+        """
+        scratch = CandidateFeatureStore(self.vector_store, batch_size=chunk_size or self.batch_size)
+        version = self.vector_store.vectorizer.version
+        statement = select(*CANDIDATE_FIELDS).order_by(User.id)
+        result = db.execute(statement.execution_options(yield_per=scratch.batch_size))
+        for rows in result.partitions():
+            chunk = scratch._build(rows, version)
+            yield chunk, chunk.ids
+
+    def candidate_positions(self, features, required_skills):
+        """Positions in `features` of the candidates the skill index keeps, or None for all."""
+        return positions_of(features, self.skill_index.candidates(required_skills))
+
+    def _check_budget(self, features):
+        per_candidate = features.nbytes / len(features) if len(features) else 0.0
+        if per_candidate > self.memory_budget:
+            logger.warning(
+                "Candidate feature store uses %.0f bytes per candidate (budget %d)",
+                per_candidate, self.memory_budget
+            )
+
+    def stats(self):
+        with self._lock:
+            features = self._features
+            n = len(features) if features is not None else 0
+            nbytes = features.nbytes if features is not None else 0
+            return {
+                "candidates": n,
+                "bytes": nbytes,
+                "bytes_per_candidate": nbytes / n if n else 0.0,
+                "budget_per_candidate": self.memory_budget,
+                "skills": len(self._skill_ids),
+                "locations": len(self._locations),
+                "watermark": self._watermark,
+                "updated_since": self._updated_since
+            }
+
+
+def ensure_updated_at_column(engine):
+    """Adds users.updated_at and its index to a database created before they existed."""
+    if 'updated_at' in {column['name'] for column in inspect(engine).get_columns(User.__tablename__)}:
+        return False
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ALTER TABLE users ADD COLUMN updated_at FLOAT")
+        connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_users_updated_at ON users (updated_at)")
+    return True
+
+
+def install_feature_store_hooks(store):
+    """Reports committed candidate changes to `store` so refreshes stay incremental."""
+    # Each store collects its own changes, so several can be installed at once
+    key = (SESSION_KEY, id(store))
+
+    def changes(session):
+        return session.info.setdefault(key, {'changed': set(), 'deleted': set(), 'reload': False})
+
+    def after_flush(session, flush_context):
+        pending = changes(session)
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, User):
+                pending['changed'].add(obj.id)
+        for obj in session.deleted:
+            if isinstance(obj, User):
+                pending['deleted'].add(obj.id)
+
+    def do_orm_execute(state):
+        # query(User).update()/delete() bypass the flush, so reload everything
+        if (state.is_update or state.is_delete) and state.bind_mapper is not None \
+                and state.bind_mapper.class_ is User:
+            changes(state.session)['reload'] = True
+
+    def after_commit(session):
+        pending = session.info.pop(key, None)
+        if not pending:
+            return
+        if pending['reload']:
+            store.invalidate()
+        store.mark_changed(pending['changed'])
+        store.mark_deleted(pending['deleted'])
+
+    def after_rollback(session):
+        session.info.pop(key, None)
+
+    def table_changed(target, connection, **kw):
+        store.invalidate()
+
+    session_hooks = [
+        ('after_flush', after_flush),
+        ('do_orm_execute', do_orm_execute),
+        ('after_commit', after_commit),
+        ('after_rollback', after_rollback)
+    ]
+    table_hooks = [('after_create', table_changed), ('after_drop', table_changed)]
+    for name, hook in session_hooks:
+        event.listen(Session, name, hook)
+    for name, hook in table_hooks:
+        event.listen(User.__table__, name, hook)
+    return session_hooks, table_hooks
+
+
+def remove_feature_store_hooks(hooks):
+    session_hooks, table_hooks = hooks
+    for name, hook in session_hooks:
+        event.remove(Session, name, hook)
+    for name, hook in table_hooks:
+        event.remove(User.__table__, name, hook)
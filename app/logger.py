@@ -1,34 +1,180 @@
+import atexit
+import datetime
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from app.utils import get_project_root
 import os
 
-def setup_logger():
+LOGGER_NAME = 'job_recommender'
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Records waiting for the writer thread; beyond this they are dropped rather
+# than making request threads wait for a slow disk
+QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has; anything else was passed with `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_lock = threading.Lock()
+_active = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with any `extra` fields as top-level keys."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+                    .isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records at or below `level` from the given loggers.
+
+    `rates` maps logger names to the fraction kept (0.01 keeps every
+    hundredth record); a name also covers its child loggers. Records above
+    `level`, e.g. warnings and errors, are always kept.
+    """
+
+    def __init__(self, rates, level=logging.INFO):
+        super().__init__()
+        self.level = level
+        self.intervals = {name: max(1, round(1 / rate)) if rate > 0 else None for name, rate in rates.items()}
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def _interval(self, name):
+        while name:
+            if name in self.intervals:
+                return name, self.intervals[name]
+            name = name.rpartition('.')[0]
+        return None, 1
+
+    def filter(self, record):
+        if record.levelno > self.level:
+            return True
+        name, interval = self._interval(record.name)
+        if interval == 1:
+            return True
+        if interval is None:
+            return False
+        with self._lock:
+            seen = self._seen.get(name, 0)
+            self._seen[name] = seen + 1
+        return seen % interval == 0
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    # Enqueues records as they are: their messages are formatted by the writer
+    # thread, so log calls should pass values that are not mutated afterwards
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Logging:
+    def __init__(self, logger, handler, listener):
+        self.logger = logger
+        self.handler = handler
+        self.listener = listener
+
+    def stop(self):
+        self.logger.removeHandler(self.handler)
+        # Writes whatever is still queued before returning
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+def shutdown_logging():
+    """Flushes queued records and stops the writer thread."""
+    global _active
+    with _lock:
+        if _active is not None:
+            _active.stop()
+            _active = None
+
+
+def logging_stats():
+    with _lock:
+        if _active is None:
+            return {}
+        return {"queued": _active.handler.queue.qsize(), "dropped": _active.handler.dropped}
+
+
+def setup_logger(json_format=False, sample_rates=None, level=logging.INFO, log_dir=None, console=True):
+    """Configures the `job_recommender` logger and returns it.
+
+    Records go through a bounded queue to a background thread that writes
+    them to logs/app.log (rotated at 10 MB) and the console, so logging
+    never waits on the disk. `json_format` writes JSON lines instead of
+    text; `sample_rates` (see SamplingFilter) thins out high-volume info
+    messages. Calling it again replaces the previous configuration.
+    """
+    global _active
     # Create logs directory if it doesn't exist
-    log_dir = os.path.join(get_project_root(), 'logs')
+    log_dir = log_dir or os.path.join(get_project_root(), 'logs')
     os.makedirs(log_dir, exist_ok=True)
-    
-    # Configure logger
-    logger = logging.getLogger('job_recommender')
-    logger.setLevel(logging.INFO)
-    
-    # Create rotating file handler
-    file_handler = RotatingFileHandler(
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers = [RotatingFileHandler(
         os.path.join(log_dir, 'app.log'),
         maxBytes=10000000,  # 10MB
         backupCount=5
-    )
-    
-    # Create console handler
-    console_handler = logging.StreamHandler()
-    
-    # Create formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    return logger
\ No newline at end of file
+    )]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = _NonBlockingQueueHandler(queue.Queue(QUEUE_SIZE))
+    if sample_rates:
+        queue_handler.addFilter(SamplingFilter(sample_rates))
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    with _lock:
+        if _active is not None:
+            _active.stop()
+        logger.addHandler(queue_handler)
+        listener.start()
+        _active = _Logging(logger, queue_handler, listener)
+    return logger
+
+
+def parse_sample_rates(value):
+    """`name=rate,name=rate` (e.g. from an environment variable) as a dict."""
+    rates = {}
+    for item in (value or '').split(','):
+        if item.strip():
+            name, _, rate = item.partition('=')
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+atexit.register(shutdown_logging)
@@ -1,32 +1,214 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
-from fastapi.responses import JSONResponse
+import logging
+import os
+from typing import List, Optional
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func, text
-from app.database import get_db, engine
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from app.database import get_db, engine, SessionLocal
 import app.models as models
 from app.vectorizer import JobVectorizer
 from app.recommender import JobRecommender
-from app.logger import setup_logger
+from app.logger import setup_logger, parse_sample_rates, logging_stats
 from app.candidate_recommender import CandidateRecommender
 from app.utils import get_models_path
+from app.vector_store import install_vector_hooks
+from app.text_cache import TextCache
+from app.search_index import install_search_index_hooks, ensure_search_index, SearchMatches, search_tokens
+from app.ann_index import IVFIndex, is_ann_index, install_ann_index_hooks
+from app.feature_store import CandidateFeatureStore, ensure_updated_at_column, install_feature_store_hooks
+from app.batch import recommend_batch, ndjson_lines, DEFAULT_MEMORY_BUDGET
+from app.materialized import materialized_ranking, JOBS, CANDIDATES
+from app.metrics import MetricsMiddleware, REGISTRY, CONTENT_TYPE, timer, set_enabled, is_enabled, register_stats
+from app.offload import RequestExecutor, default_threads
+from app.profiling import RequestProfiler
+from app.recommendation_pool import RecommendationPool, RecommendationTimeout
+from app.result_cache import (
+    ResultCache, MemoryBackend, RedisBackend, install_result_cache_hooks,
+    normalize_query, search_dependencies, candidate_dependencies
+)
 
-# Setup logger
-logger = setup_logger()
+# Setup logger: records are written by a background thread. LOG_FORMAT=json writes JSON
+# lines; LOG_SAMPLE_RATES (e.g. "job_recommender.requests=0.01") keeps only that fraction
+# of a logger's info messages
+logger = setup_logger(
+    json_format=os.getenv('LOG_FORMAT', 'text') == 'json',
+    sample_rates=parse_sample_rates(os.getenv('LOG_SAMPLE_RATES'))
+)
+# Per-request info messages, the high-volume ones to sample
+request_logger = logging.getLogger('job_recommender.requests')
 
-# Create all tables
+# Create all tables; the full-text index over jobs is created and dropped with its table
+install_search_index_hooks()
 models.Base.metadata.create_all(bind=engine)
+ensure_search_index(engine)
+ensure_updated_at_column(engine)
 
 # Initialize vectorizer and recommender
-vectorizer = JobVectorizer()
-# Update any vectorizer loading
-vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+# Preprocessed texts are memoized in memory and in a SQLite file next to the model.
+# The model is the memory-mapped artifact (scripts/convert_vectorizer.py builds it
+# from the pickle), loaded on first use or at startup by warm_up_vectorizer.
+vectorizer = JobVectorizer(
+    cache=TextCache(path=get_models_path('preprocess_cache.sqlite')),
+    model_path=get_models_path('job_vectorizer')
+)
 recommender = JobRecommender(vectorizer)
 
+# Compute stored vectors whenever jobs or users are written
+install_vector_hooks(recommender.vector_store)
+
+def persist_refreshed_vectors(db: Session):
+    # Vectors recomputed during scoring are written back so the next request reuses them
+    if not db.dirty:
+        return
+    try:
+        with timer('persist_vectors'):
+            db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning("Could not persist refreshed vectors: %s", e)
+
+# Matching jobs ranked per /search request, best full-text matches first
+SEARCH_MAX_CANDIDATES = int(os.getenv('SEARCH_MAX_CANDIDATES', '2000'))
+# Jobs scored per batch while ranking search results
+SEARCH_CHUNK_SIZE = int(os.getenv('SEARCH_CHUNK_SIZE', '500'))
+# Jobs pulled from the ANN index (when built) for a search without words
+ANN_CANDIDATES = int(os.getenv('ANN_CANDIDATES', '300'))
+
+# Threads running the blocking part of requests (database queries and scoring),
+# i.e. how many requests are processed at once; the event loop only dispatches
+REQUEST_THREADS = int(os.getenv('REQUEST_THREADS', str(default_threads())))
+request_executor = RequestExecutor(REQUEST_THREADS)
+
+# Worker processes ranking candidates and search matches outside this process's GIL;
+# 0 keeps ranking in the request threads. Workers are replaced after
+# RECOMMENDATION_TASKS_PER_WORKER tasks and a ranking fails with 504 after
+# RECOMMENDATION_TIMEOUT seconds.
+RECOMMENDATION_PROCESSES = int(os.getenv('RECOMMENDATION_PROCESSES', '0'))
+RECOMMENDATION_TASKS_PER_WORKER = int(os.getenv('RECOMMENDATION_TASKS_PER_WORKER', '1000'))
+RECOMMENDATION_TIMEOUT = float(os.getenv('RECOMMENDATION_TIMEOUT', '30'))
+recommendation_pool = None
+if RECOMMENDATION_PROCESSES > 0:
+    recommendation_pool = RecommendationPool(
+        RECOMMENDATION_PROCESSES,
+        model_path=get_models_path('job_vectorizer'),
+        database_url=engine.url.render_as_string(hide_password=False),
+        max_tasks_per_child=RECOMMENDATION_TASKS_PER_WORKER,
+        timeout=RECOMMENDATION_TIMEOUT
+    )
+
+# Whole responses of /search and /recommend-candidates, invalidated when the users
+# and jobs they depend on are committed. RESULT_CACHE is 'memory', 'redis'
+# (RESULT_CACHE_REDIS_URL, shared by all API processes) or 'off'.
+RESULT_CACHE = os.getenv('RESULT_CACHE', 'memory')
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', '300'))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+result_cache = None
+if RESULT_CACHE == 'memory':
+    result_cache = ResultCache(MemoryBackend(RESULT_CACHE_MAX_BYTES), ttl=RESULT_CACHE_TTL)
+elif RESULT_CACHE == 'redis':
+    result_cache = ResultCache(RedisBackend(os.getenv('RESULT_CACHE_REDIS_URL')), ttl=RESULT_CACHE_TTL)
+if result_cache is not None:
+    install_result_cache_hooks(result_cache)
+
+# Users accepted per /recommendations/batch request, and the memory its score tiles may use
+BATCH_MAX_USERS = int(os.getenv('BATCH_MAX_USERS', '100000'))
+BATCH_MEMORY_BUDGET = int(os.getenv('BATCH_MEMORY_BUDGET', str(DEFAULT_MEMORY_BUDGET)))
+
+# Precomputed rankings (scripts/materialize_recommendations.py) serve /search without
+# words and /recommend-candidates while their generation is younger than this many
+# seconds; 0 always ranks live
+MATERIALIZED_MAX_AGE = float(os.getenv('MATERIALIZED_MAX_AGE', '86400'))
+
+# Request counters and per-stage latency histograms served at /metrics; METRICS=0
+# turns recording off
+set_enabled(os.getenv('METRICS', '1') != '0')
+
+# Opt-in profiling of single /search and /recommend-candidates requests, saved under
+# logs/profiles/ (summarize with scripts/profile_summary.py): a PROFILE_SAMPLE_RATE
+# fraction of requests, plus any request with an X-Profile-Token header equal to
+# PROFILE_TOKEN. PROFILE_MODE is 'sample' (stack sampler) or 'cprofile'.
+request_profiler = RequestProfiler(
+    mode=os.getenv('PROFILE_MODE', 'sample'),
+    rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    token=os.getenv('PROFILE_TOKEN') or None,
+    interval=float(os.getenv('PROFILE_INTERVAL', '0.005'))
+)
+
 app = FastAPI(
     title="Job Recommendation System",
     description="API for job recommendations",
     version="1.0.0"
 )
+app.add_middleware(MetricsMiddleware)
+
+@app.on_event("startup")
+def warm_up_vectorizer():
+    # Fails startup with the list of missing NLTK resources instead of serving empty vectors
+    try:
+        vectorizer.warm_up()
+    except LookupError as e:
+        logger.error("Vectorizer warm-up failed: %s", e)
+        raise
+    logger.info("Vectorizer loaded")
+
+@app.on_event("startup")
+def load_ann_index():
+    # Built offline by scripts/build_ann_index.py; memory-mapped, so loading is cheap
+    path = get_models_path('job_ann_index')
+    if not is_ann_index(path):
+        return
+    index = IVFIndex.load(path)
+    if index.version != vectorizer.version:
+        logger.warning("ANN index was built for another vectorizer version; rebuild it to use it")
+        return
+    recommender.ann_index = index
+    install_ann_index_hooks(index, recommender.vector_store)
+    logger.info("ANN index loaded with %d jobs", len(index))
+
+@app.on_event("shutdown")
+def flush_text_cache():
+    vectorizer.cache.close()
+
+@app.on_event("shutdown")
+def stop_request_executor():
+    request_executor.shutdown()
+
+@app.on_event("shutdown")
+def stop_recommendation_pool():
+    if recommendation_pool is not None:
+        recommendation_pool.shutdown()
+
+@app.exception_handler(RecommendationTimeout)
+async def recommendation_timeout_handler(request, exc):
+    logger.error("Recommendation timed out: %s", exc)
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+async def request_profile(request: Request):
+    profile = None
+    if request_profiler.enabled:
+        profile = request_profiler.start(request.url.path, request.headers.get('x-profile-token'),
+                                         {"query": request.url.query})
+    try:
+        yield profile
+    finally:
+        if profile is not None:
+            await run_in_threadpool(request_profiler.save, profile)
+
+async def run_blocking(profile, func, *args):
+    # Blocking work of a request, profiled in its executor thread when the request is sampled
+    if profile is None:
+        return await request_executor.run(func, *args)
+    return await request_executor.run(profile.call, func, *args)
+
+def jobs_for_ranking(db: Session, ranking):
+    # Precomputed (job id, score, similarity) tuples -> (Job, score, similarity)
+    with timer('load_jobs'):
+        jobs_by_id = {job.id: job for job in db.query(models.Job).filter(models.Job.id.in_([r[0] for r in ranking]))}
+    return [(jobs_by_id[job_id], score, similarity) for job_id, score, similarity in ranking if job_id in jobs_by_id]
 
 @app.get("/search")
 async def search_jobs(
@@ -34,36 +216,94 @@ async def search_jobs(
     user_id: int,
     page: int = Query(default=1, ge=1, description="Page number"),
     page_size: int = Query(default=10, ge=1, le=100, description="Number of items per page"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    profile=Depends(request_profile)
 ):
-    logger.info(f"Search request received - text: {search_text}, user_id: {user_id}, page: {page}")
+    offset = (page - 1) * page_size
+    uses_ann = recommender.ann_index is not None and not search_tokens(search_text)
+    cache_key = None
+    if result_cache is not None:
+        params = {
+            "search_text": normalize_query(search_text), "user_id": user_id, "page": page,
+            "page_size": page_size, "ann": uses_ann, "vectorizer": vectorizer.version
+        }
+        with timer('cache_lookup'):
+            cache_key, cached = await run_blocking(
+                profile, result_cache.lookup, 'search', params, search_dependencies(user_id)
+            )
+        if cached is not None:
+            if "search_text" in cached:
+                cached["search_text"] = search_text
+            return json_response(cached)
+
+    precomputed = None
+    if MATERIALIZED_MAX_AGE > 0 and not search_tokens(search_text) and offset < SEARCH_MAX_CANDIDATES:
+        with timer('materialized_lookup'):
+            precomputed = await run_blocking(
+                profile, materialized_ranking, db, JOBS, user_id, offset + page_size, MATERIALIZED_MAX_AGE
+            )
+    if precomputed is None and recommendation_pool is not None and not uses_ann and offset < SEARCH_MAX_CANDIDATES:
+        with timer('pool_rank'):
+            precomputed = await recommendation_pool.rank_search(
+                user_id, search_text, offset + page_size, SEARCH_MAX_CANDIDATES, SEARCH_CHUNK_SIZE
+            )
+    response = await run_blocking(
+        profile, search_response, db, search_text, user_id, page, page_size, precomputed
+    )
+    if cache_key is not None:
+        with timer('cache_store'):
+            await run_blocking(profile, result_cache.store, cache_key, response)
+    return json_response(response)
+
+def json_response(content):
+    # Rendered here instead of by FastAPI so serialization is timed; the content is
+    # plain JSON types already
+    with timer('serialize'):
+        return JSONResponse(content)
+
+def search_response(db: Session, search_text: str, user_id: int, page: int, page_size: int, precomputed=None):
+    # `precomputed` is the (ranking, total matches) from the materialized tables or
+    # the recommendation pool, if any
+    request_logger.info("Search request received - text: %s, user_id: %s, page: %s", search_text, user_id, page)
     
     try:
         # Get the user
-        user = db.query(models.User).filter(models.User.id == user_id).first()
+        with timer('load_user'):
+            user = db.query(models.User).filter(models.User.id == user_id).first()
         if not user:
-            logger.warning(f"User not found - user_id: {user_id}")
+            logger.warning("User not found - user_id: %s", user_id)
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Search jobs in database
-        base_query = db.query(models.Job).filter(
-            or_(
-                models.Job.title.ilike(f"%{search_text}%"),
-                models.Job.description.ilike(f"%{search_text}%")
-            )
-        )
-        
-        total_jobs = base_query.count()
-        logger.info(f"Found {total_jobs} matching jobs")
+        # Rank every match (up to the cap) for the user, then paginate the ranking.
+        # Only the best offset + page_size jobs are kept while streaming matches.
+        offset = (page - 1) * page_size
+        if precomputed is not None:
+            ranking, total_matches = precomputed
+            ranked = jobs_for_ranking(db, ranking)
+            total_jobs = min(total_matches, SEARCH_MAX_CANDIDATES)
+        elif recommender.ann_index is not None and not search_tokens(search_text):
+            # No words to match: rescore the jobs nearest to the user in the ANN index
+            with timer('ann_search'):
+                job_ids = recommender.retrieve_job_ids(user, ANN_CANDIDATES).tolist()
+            with timer('load_jobs'):
+                jobs_by_id = {job.id: job for job in db.query(models.Job).filter(models.Job.id.in_(job_ids))}
+            jobs = [jobs_by_id[job_id] for job_id in job_ids if job_id in jobs_by_id]
+            ranked = recommender.get_recommendations(user, jobs, top_n=offset + page_size)
+            total_matches = total_jobs = len(jobs)
+        else:
+            matches = SearchMatches(db, search_text, SEARCH_MAX_CANDIDATES, SEARCH_CHUNK_SIZE)
+            ranked = []
+            if offset < SEARCH_MAX_CANDIDATES:
+                ranked = recommender.rank_job_chunks(user, matches, top_n=offset + page_size)
+            total_matches = matches.total
+            total_jobs = min(total_matches, SEARCH_MAX_CANDIDATES)
+        request_logger.info("Found %d matching jobs, ranked %d", total_matches, total_jobs)
         
         # Calculate pagination
         total_pages = (total_jobs + page_size - 1) // page_size
-        offset = (page - 1) * page_size
-        
-        # Get paginated jobs
-        jobs = base_query.offset(offset).limit(page_size).all()
+        recommendations = ranked[offset:offset + page_size]
         
-        if not jobs:
+        if not recommendations:
             return {
                 "message": "No jobs found",
                 "recommendations": [],
@@ -75,11 +315,9 @@ async def search_jobs(
                 }
             }
         
-        # Get recommendations based on search results
-        recommendations = recommender.get_recommendations(user, jobs, top_n=page_size)
-        logger.info(f"Generated {len(recommendations)} recommendations")
+        request_logger.info("Generated %d recommendations", len(recommendations))
         
-        return {
+        response = {
             "search_text": search_text,
             "recommendations": [
                 {
@@ -100,23 +338,33 @@ async def search_jobs(
             ],
             "pagination": {
                 "total": total_jobs,
+                "total_matches": total_matches,
                 "page": page,
                 "page_size": page_size,
                 "total_pages": total_pages
             }
         }
+        persist_refreshed_vectors(db)
+        return response
     except Exception as e:
-        logger.error(f"Error processing search request: {str(e)}", exc_info=True)
+        logger.error("Error processing search request: %s", e, exc_info=True)
         raise
 
+def ping_database():
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
 @app.get("/health")
 async def health_check():
     try:
-        db = next(get_db())
-        db.execute(text("SELECT 1"))
+        # Starlette's own threadpool, so the ping never queues behind scoring requests
+        await run_in_threadpool(ping_database)
         vectorizer_status = vectorizer.is_fitted()
         
-        logger.info("Health check passed successfully")
+        request_logger.info("Health check passed successfully")
         return JSONResponse(
             status_code=200,
             content={
@@ -127,7 +375,7 @@ async def health_check():
             }
         )
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}", exc_info=True)
+        logger.error("Health check failed: %s", e, exc_info=True)
         return JSONResponse(
             status_code=503,
             content={
@@ -139,36 +387,152 @@ async def health_check():
 # Initialize candidate recommender
 candidate_recommender = CandidateRecommender(vectorizer)
 
+# All candidates as columnar arrays, refreshed from committed changes on each request.
+# With CANDIDATE_FEATURE_STORE=0 candidates are streamed from the database instead.
+USE_CANDIDATE_FEATURE_STORE = os.getenv('CANDIDATE_FEATURE_STORE', '1') != '0'
+# Candidates scored per batch by /recommend-candidates
+CANDIDATE_CHUNK_SIZE = int(os.getenv('CANDIDATE_CHUNK_SIZE', '10000'))
+# Seconds between full reloads, which also drop candidates deleted by other processes
+CANDIDATE_FULL_RELOAD_SECONDS = float(os.getenv('CANDIDATE_FULL_RELOAD_SECONDS', '3600'))
+candidate_features = CandidateFeatureStore(
+    candidate_recommender.vector_store, batch_size=CANDIDATE_CHUNK_SIZE,
+    full_reload_interval=CANDIDATE_FULL_RELOAD_SECONDS
+)
+if USE_CANDIDATE_FEATURE_STORE:
+    install_feature_store_hooks(candidate_features)
+
+# Cache and index sizes, read from their stats() when /metrics is scraped
+register_stats('job_recommender_candidate_features', candidate_features.stats, {
+    'candidates': ('', 'gauge', "Candidates held in the feature store"),
+    'bytes': ('_bytes', 'gauge', "Memory used by the candidate feature store")
+})
+register_stats('job_recommender_text_cache', vectorizer.cache.stats, {
+    'entries': ('_entries', 'gauge', "Preprocessed texts held in memory"),
+    'bytes': ('_bytes', 'gauge', "Memory used by preprocessed texts"),
+    'hits': ('_hits_total', 'counter', "Preprocessing cache hits"),
+    'misses': ('_misses_total', 'counter', "Preprocessing cache misses")
+})
+register_stats('job_recommender_ann_index', lambda: {'jobs': len(recommender.ann_index)}
+               if recommender.ann_index is not None else {}, {
+    'jobs': ('_jobs', 'gauge', "Jobs in the loaded ANN index")
+})
+if result_cache is not None:
+    register_stats('job_recommender_result_cache', result_cache.stats, {
+        'hits': ('_hits_total', 'counter', "Result cache hits"),
+        'misses': ('_misses_total', 'counter', "Result cache misses"),
+        'entries': ('_entries', 'gauge', "Responses held in the in-process result cache"),
+        'bytes': ('_bytes', 'gauge', "Memory used by the in-process result cache"),
+        'evictions': ('_evictions_total', 'counter', "Responses evicted from the in-process result cache")
+    })
+
+register_stats('job_recommender_log_records', logging_stats, {
+    'queued': ('_queued', 'gauge', "Log records waiting for the writer thread"),
+    'dropped': ('_dropped_total', 'counter', "Log records dropped because the queue was full")
+})
+
+@app.get("/metrics")
+async def metrics():
+    if not is_enabled():
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(await request_executor.run(REGISTRY.render), media_type=CONTENT_TYPE)
+
+@app.get("/cache-stats")
+async def cache_stats():
+    if result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **await request_executor.run(result_cache.stats)}
+
 @app.get("/recommend-candidates")
 async def recommend_candidates(
     job_id: int,
     page: int = Query(default=1, ge=1, description="Page number"),
     page_size: int = Query(default=10, ge=1, le=100, description="Number of items per page"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    profile=Depends(request_profile)
 ):
+    cache_key = None
+    if result_cache is not None:
+        params = {"job_id": job_id, "page": page, "page_size": page_size, "vectorizer": vectorizer.version}
+        with timer('cache_lookup'):
+            cache_key, cached = await run_blocking(
+                profile, result_cache.lookup, 'recommend-candidates', params, candidate_dependencies(job_id)
+            )
+        if cached is not None:
+            return json_response(cached)
+
+    precomputed = None
+    if MATERIALIZED_MAX_AGE > 0:
+        with timer('materialized_lookup'):
+            precomputed = await run_blocking(
+                profile, materialized_ranking, db, CANDIDATES, job_id, page * page_size, MATERIALIZED_MAX_AGE
+            )
+    if precomputed is None and recommendation_pool is not None:
+        features_path = None
+        if USE_CANDIDATE_FEATURE_STORE:
+            features_path = await run_blocking(profile, publish_candidate_features, db)
+        with timer('pool_rank'):
+            precomputed = await recommendation_pool.rank_candidates(
+                job_id, page * page_size, features_path, CANDIDATE_CHUNK_SIZE
+            )
+    response = await run_blocking(
+        profile, candidate_recommendations_response, db, job_id, page, page_size, precomputed
+    )
+    if cache_key is not None:
+        with timer('cache_store'):
+            await run_blocking(profile, result_cache.store, cache_key, response)
+    return json_response(response)
+
+def publish_candidate_features(db: Session):
+    # Shared with the recommendation workers as a memory-mapped generation
+    return recommendation_pool.publish(candidate_features.refresh(db))
+
+def candidate_recommendations_response(db: Session, job_id: int, page: int, page_size: int, precomputed=None):
+    # `precomputed` is the (ranking, total) from the materialized tables or the
+    # recommendation pool, if any
     try:
         # Get the job
-        job = db.query(models.Job).filter(models.Job.id == job_id).first()
+        with timer('load_job'):
+            job = db.query(models.Job).filter(models.Job.id == job_id).first()
         if not job:
-            logger.warning(f"Job not found - job_id: {job_id}")
+            logger.warning("Job not found - job_id: %s", job_id)
             raise HTTPException(status_code=404, detail="Job not found")
         
-        # Get all candidates
-        candidates = db.query(models.User).all()
-        
-        # Get recommendations
-        recommendations = candidate_recommender.get_recommendations(job, candidates, top_n=page_size)
+        # Score candidates chunk by chunk, keeping the best page * page_size in a
+        # bounded heap, and only load the winners
+        if precomputed is not None:
+            ranked, total_candidates = precomputed
+        else:
+            if USE_CANDIDATE_FEATURE_STORE:
+                with timer('feature_refresh'):
+                    features = candidate_features.refresh(db)
+                # Only candidates holding every required skill reach scoring
+                with timer('skill_prefilter'):
+                    positions = candidate_features.candidate_positions(features, job.required_skills)
+                chunks = features.iter_chunks(positions, CANDIDATE_CHUNK_SIZE)
+            else:
+                chunks = candidate_features.stream(db, CANDIDATE_CHUNK_SIZE)
+            ranked, total_candidates = candidate_recommender.rank_chunks(job, chunks, top_n=page * page_size)
         
         # Calculate pagination
-        total_candidates = len(recommendations)
         total_pages = (total_candidates + page_size - 1) // page_size
         start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
         
         # Get paginated recommendations
-        paginated_recommendations = recommendations[start_idx:end_idx]
+        page_ranking = ranked[start_idx:end_idx]
+        candidate_ids = [int(candidate_id) for candidate_id, _, _ in page_ranking]
+        with timer('load_candidates'):
+            candidates = {
+                candidate.id: candidate
+                for candidate in db.query(models.User).filter(models.User.id.in_(candidate_ids))
+            }
+        paginated_recommendations = [
+            (candidates[candidate_id], match_score, similarity_score)
+            for candidate_id, (_, match_score, similarity_score) in zip(candidate_ids, page_ranking)
+            if candidate_id in candidates
+        ]
         
-        return {
+        response = {
             "recommendations": [
                 {
                     "candidate": {
@@ -191,13 +555,34 @@ async def recommend_candidates(
                 "total_pages": total_pages
             }
         }
+        persist_refreshed_vectors(db)
+        return response
     except HTTPException as he:
         # Re-raise HTTP exceptions
         raise he
     except Exception as e:
-        logger.error(f"Error recommending candidates: {str(e)}", exc_info=True)
+        logger.error("Error recommending candidates: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=BATCH_MAX_USERS)
+    top_k: int = Field(default=10, ge=1, le=100)
+    # Optional job filter: only these ids and/or only full-text matches of search_text
+    job_ids: Optional[List[int]] = None
+    search_text: Optional[str] = None
+
+@app.post("/recommendations/batch")
+async def batch_recommendations(request: BatchRecommendationRequest, db: Session = Depends(get_db)):
+    request_logger.info("Batch recommendation request received - users: %d, top_k: %d",
+                        len(request.user_ids), request.top_k)
+    # Streamed as NDJSON, a tile of users at a time; Starlette iterates the
+    # generator in its threadpool, so scoring stays off the event loop
+    results = recommend_batch(
+        db, recommender.vector_store, request.user_ids, top_k=request.top_k, job_ids=request.job_ids,
+        search_text=request.search_text, memory_budget=BATCH_MEMORY_BUDGET
+    )
+    return StreamingResponse(ndjson_lines(results), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,192 @@
+import time
+from sqlalchemy import delete, func, insert, select, update
+from app.batch import recommend_batch, DEFAULT_MEMORY_BUDGET, DEFAULT_USER_TILE
+from app.feature_store import CandidateFeatureStore
+from app.models import (
+    Job, User, RecommendationGeneration, MaterializedJobRecommendation, MaterializedCandidateRecommendation
+)
+
+JOBS = 'jobs'
+CANDIDATES = 'candidates'
+
+DEFAULT_TOP_K = 100
+# Rows inserted (and committed) per statement while building
+WRITE_BATCH_SIZE = 10000
+# Jobs loaded at once while ranking candidates; small enough for SQLite's variable limit
+JOB_BATCH_SIZE = 500
+
+TABLES = {
+    JOBS: (MaterializedJobRecommendation, MaterializedJobRecommendation.user_id, MaterializedJobRecommendation.job_id),
+    CANDIDATES: (MaterializedCandidateRecommendation, MaterializedCandidateRecommendation.job_id,
+                 MaterializedCandidateRecommendation.candidate_id)
+}
+
+
+def _start_generation(db, kind, top_k):
+    generation = RecommendationGeneration(kind=kind, top_k=top_k, status='building', is_current=False,
+                                          started_at=time.time())
+    db.add(generation)
+    db.commit()
+    return generation.id
+
+
+def _rows(kind, generation, subject_id, ranking, total):
+    item = 'job_id' if kind == JOBS else 'candidate_id'
+    subject = 'user_id' if kind == JOBS else 'job_id'
+    return [
+        {'generation': generation, subject: subject_id, 'rank': rank, item: int(item_id),
+         'match_score': float(score), 'similarity_score': float(similarity), 'total': total}
+        for rank, (item_id, score, similarity) in enumerate(ranking)
+    ]
+
+
+class _Writer:
+    # Buffers rows and inserts them in committed batches, so the build never
+    # holds the database's write lock for long
+    def __init__(self, db, model, batch_size):
+        self.db = db
+        self.model = model
+        self.batch_size = batch_size
+        self.rows = []
+        self.written = 0
+
+    def add(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.db.execute(insert(self.model), self.rows)
+            self.db.commit()
+            self.written += len(self.rows)
+            self.rows = []
+
+
+def swap_generation(db, kind, generation):
+    """Makes `generation` the served one in a single UPDATE, then drops all but the previous one."""
+    previous = db.scalar(select(RecommendationGeneration.id).where(
+        RecommendationGeneration.kind == kind, RecommendationGeneration.is_current.is_(True)
+    ))
+    db.execute(
+        update(RecommendationGeneration)
+        .where(RecommendationGeneration.id == generation)
+        .values(status='ready', completed_at=time.time())
+    )
+    db.execute(
+        update(RecommendationGeneration)
+        .where(RecommendationGeneration.kind == kind)
+        .values(is_current=RecommendationGeneration.id == generation)
+    )
+    db.commit()
+
+    # Readers that picked the previous generation just before the swap can still finish
+    keep = [generation] + ([previous] if previous is not None else [])
+    model = TABLES[kind][0]
+    stale = select(RecommendationGeneration.id).where(
+        RecommendationGeneration.kind == kind, RecommendationGeneration.id.notin_(keep)
+    )
+    db.execute(delete(model).where(model.generation.in_(stale)))
+    db.execute(delete(RecommendationGeneration).where(RecommendationGeneration.id.in_(stale)))
+    db.commit()
+
+
+def _abandon(db, kind, generation):
+    db.rollback()
+    model = TABLES[kind][0]
+    db.execute(delete(model).where(model.generation == generation))
+    db.execute(update(RecommendationGeneration).where(RecommendationGeneration.id == generation)
+               .values(status='failed'))
+    db.commit()
+
+
+def build_job_recommendations(db, vector_store, top_k=DEFAULT_TOP_K, memory_budget=DEFAULT_MEMORY_BUDGET,
+                              user_tile=DEFAULT_USER_TILE, write_batch=WRITE_BATCH_SIZE, max_jobs=None):
+    """Materializes every user's top `top_k` jobs as a new generation and swaps it in.
+
+    Scores are the batch GEMM version of JobRecommender.calculate_match_score
+    (app.batch), computed in tiles bounded by `memory_budget`. With `max_jobs`
+    only the first `max_jobs` jobs by id are ranked, the same jobs a live
+    `/search` without words scores under SEARCH_MAX_CANDIDATES.
+    """
+    generation = _start_generation(db, JOBS, top_k)
+    writer = _Writer(db, MaterializedJobRecommendation, write_batch)
+    try:
+        # Ids are read up front, so no cursor is open while batches are committed
+        user_ids = db.execute(select(User.id).order_by(User.id)).scalars().all()
+        total = db.scalar(select(func.count(Job.id)))
+        job_ids = None
+        if max_jobs is not None:
+            job_ids = db.execute(select(Job.id).order_by(Job.id).limit(max_jobs)).scalars().all()
+        for user_id, ranking in recommend_batch(db, vector_store, user_ids, top_k, job_ids,
+                                                memory_budget=memory_budget, user_tile=user_tile):
+            if ranking:
+                writer.add(_rows(JOBS, generation, user_id, ranking, total))
+        writer.flush()
+    except BaseException:
+        _abandon(db, JOBS, generation)
+        raise
+    swap_generation(db, JOBS, generation)
+    return generation, writer.written
+
+
+def build_candidate_recommendations(db, candidate_recommender, top_k=DEFAULT_TOP_K, chunk_size=10000,
+                                    write_batch=WRITE_BATCH_SIZE):
+    """Materializes every job's top `top_k` candidates as a new generation and swaps it in.
+
+    Uses CandidateRecommender's scoring over a columnar feature store, in
+    chunks of `chunk_size` candidates, after the skill-index prefilter.
+    """
+    generation = _start_generation(db, CANDIDATES, top_k)
+    writer = _Writer(db, MaterializedCandidateRecommendation, write_batch)
+    try:
+        store = CandidateFeatureStore(candidate_recommender.vector_store, batch_size=chunk_size)
+        features = store.refresh(db)
+        job_ids = db.execute(select(Job.id).order_by(Job.id)).scalars().all()
+        for start in range(0, len(job_ids), JOB_BATCH_SIZE):
+            batch = job_ids[start:start + JOB_BATCH_SIZE]
+            rows = []
+            # Ranked before writing: a commit would expire the loaded jobs
+            for job in db.query(Job).filter(Job.id.in_(batch)).order_by(Job.id).all():
+                positions = store.candidate_positions(features, job.required_skills)
+                ranking, total = candidate_recommender.rank_chunks(
+                    job, features.iter_chunks(positions, chunk_size), top_n=top_k
+                )
+                rows.extend(_rows(CANDIDATES, generation, job.id, ranking, total))
+            writer.add(rows)
+        writer.flush()
+    except BaseException:
+        _abandon(db, CANDIDATES, generation)
+        raise
+    swap_generation(db, CANDIDATES, generation)
+    return generation, writer.written
+
+
+def current_generation(db, kind):
+    return db.query(RecommendationGeneration).filter(
+        RecommendationGeneration.kind == kind, RecommendationGeneration.is_current.is_(True)
+    ).first()
+
+
+def materialized_ranking(db, kind, subject_id, limit, max_age):
+    """(ranking, total) of the first `limit` ranks from the current generation, or None.
+
+    None when there is no generation completed within `max_age` seconds, the
+    subject is not in it, or it holds fewer than `limit` of the subject's
+    ranks (a page past top_k). One indexed range scan: the generation is
+    picked by a subquery of the same statement.
+    """
+    model, subject_column, item_column = TABLES[kind]
+    current = select(RecommendationGeneration.id).where(
+        RecommendationGeneration.kind == kind,
+        RecommendationGeneration.is_current.is_(True),
+        RecommendationGeneration.completed_at >= time.time() - max_age
+    ).scalar_subquery()
+    rows = db.execute(
+        select(item_column, model.match_score, model.similarity_score, model.total)
+        .where(model.generation == current, subject_column == subject_id, model.rank < limit)
+        .order_by(model.rank)
+    ).all()
+    if not rows or (len(rows) < limit and len(rows) < rows[0].total):
+        return None
+    return [(row[0], row.match_score, row.similarity_score) for row in rows], rows[0].total
@@ -0,0 +1,288 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+
+# Seconds; covers sub-millisecond stages up to slow requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Starlette appends the charset
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+_enabled = True
+
+
+def set_enabled(enabled):
+    """Turns recording on or off; when off, timers and the middleware do nothing."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    return _enabled
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One count per bucket plus the +Inf overflow; cumulated when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+
+
+class _Metric:
+    kind = None
+    # Holds the values of one label set; built with `_child_args`
+    child_class = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._child_args = ()
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self.child_class(*self._child_args)
+        return child
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class Counter(_Metric):
+    kind = 'counter'
+    child_class = _CounterChild
+
+    def render(self):
+        lines = self.header()
+        for values, child in self._items():
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+    child_class = _HistogramChild
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._child_args = (self.buckets,)
+
+    def render(self):
+        lines = self.header()
+        bucket_labels = self.labelnames + ('le',)
+        for values, child in self._items():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(bucket_labels, values + (_number(bound),))} {cumulative}")
+            labels = _labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """A gauge or counter whose samples are read from `func` when scraped.
+
+    `func` returns a number, a list of (label values, number) pairs, or
+    None when there is nothing to report.
+    """
+
+    def __init__(self, name, documentation, func, kind='gauge', labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        samples = self.func()
+        if samples is None:
+            return []
+        if not isinstance(samples, list):
+            samples = [((), samples)]
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in samples:
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, func, kind='gauge', labelnames=()):
+        return self.register(CallbackMetric(name, documentation, func, kind, labelnames))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def register_stats(prefix, stats, fields, registry=REGISTRY):
+    """Exposes numbers from the dict returned by `stats()` as callback metrics.
+
+    `fields` maps stats keys to (name suffix, kind, help); keys missing from
+    the dict (e.g. a backend that does not track them) are not reported.
+    """
+    for key, (suffix, kind, documentation) in fields.items():
+        registry.callback(prefix + suffix, documentation, lambda key=key: stats().get(key), kind)
+
+
+REQUESTS = REGISTRY.counter(
+    'job_recommender_requests_total', 'HTTP requests by route template, method and status',
+    ('endpoint', 'method', 'status')
+)
+REQUEST_DURATION = REGISTRY.histogram(
+    'job_recommender_request_duration_seconds', 'HTTP request latency by route template', ('endpoint',)
+)
+STAGE_DURATION = REGISTRY.histogram(
+    'job_recommender_stage_duration_seconds', 'Time spent in each stage of serving a recommendation', ('stage',)
+)
+
+
+class _Timer:
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def observe(stage, seconds):
+    """Records `seconds` under `stage`, for stages timed by the caller."""
+    if _enabled:
+        STAGE_DURATION.labels(stage).observe(seconds)
+
+
+def timer(stage):
+    """Context manager recording its duration under `stage` in STAGE_DURATION."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(STAGE_DURATION.labels(stage))
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them by route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware, which would add a task and a
+    stream per request. Unmatched paths share one label, so scanners
+    cannot blow up the number of series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not _enabled:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            endpoint = getattr(route, 'path', None) or 'unmatched'
+            REQUESTS.labels(endpoint, scope['method'], str(status[0])).inc()
+            REQUEST_DURATION.labels(endpoint).observe(time.perf_counter() - start)
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import re
+import numpy as np
+from scipy import sparse
+
+ARTIFACT_FORMAT = 'job-vectorizer'
+ARTIFACT_FORMAT_VERSION = 1
+
+MANIFEST_FILE = 'manifest.json'
+TERMS_FILE = 'terms.npy'
+IDF_FILE = 'idf.npy'
+PIPELINE_FILE = 'pipeline.json'
+
+# Settings under which transform only needs the term list and idf weights
+SUPPORTED_PARAMS = {
+    'analyzer': 'word',
+    'ngram_range': (1, 1),
+    'tokenizer': None,
+    'preprocessor': None,
+    'use_idf': True,
+    'binary': False,
+    'vocabulary': None
+}
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _combined_checksum(file_hashes):
+    digest = hashlib.sha256()
+    for name in sorted(file_hashes):
+        digest.update(f"{name}:{file_hashes[name]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class MappedTfidf:
+    """Read-only TF-IDF model backed by memory-mapped arrays.
+
+    The vocabulary is a sorted term array (column i is term i, as in
+    scikit-learn) looked up with a binary search, so worker processes share
+    the mapped pages instead of each unpickling a vocabulary dict.
+    """
+
+    def __init__(self, terms, idf, lowercase=True, token_pattern=r"(?u)\b\w\w+\b",
+                 norm='l2', sublinear_tf=False):
+        self.terms = terms
+        self.idf_ = idf
+        self.lowercase = lowercase
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self._token_re = re.compile(token_pattern)
+        self._vocabulary = None
+
+    @property
+    def vocabulary_(self):
+        # Only built for callers that need the scikit-learn style mapping
+        if self._vocabulary is None:
+            self._vocabulary = {str(term): i for i, term in enumerate(self.terms)}
+        return self._vocabulary
+
+    def get_feature_names_out(self):
+        return np.asarray(self.terms, dtype=object)
+
+    def transform(self, texts):
+        n_terms = len(self.terms)
+        rows = []
+        tokens = []
+        for row, text in enumerate(texts):
+            if self.lowercase:
+                text = text.lower()
+            doc_tokens = self._token_re.findall(text)
+            tokens.extend(doc_tokens)
+            rows.append(np.full(len(doc_tokens), row, dtype=np.int32))
+        n_docs = len(rows)
+        if not tokens:
+            return sparse.csr_matrix((n_docs, n_terms), dtype=np.float32)
+
+        # One vectorized binary search for every token of every document
+        tokens = np.array(tokens)
+        positions = np.minimum(np.searchsorted(self.terms, tokens), n_terms - 1)
+        known = self.terms[positions] == tokens
+        rows = np.concatenate(rows)[known]
+        cols = positions[known]
+
+        counts = sparse.csr_matrix(
+            (np.ones(len(cols), dtype=np.float32), (rows, cols)), shape=(n_docs, n_terms)
+        )
+        counts.sum_duplicates()
+        if self.sublinear_tf:
+            np.log(counts.data, counts.data)
+            counts.data += 1
+        counts.data *= np.asarray(self.idf_, dtype=np.float32)[counts.indices]
+        if self.norm == 'l2':
+            norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1), dtype=np.float32).ravel())
+            norms[norms == 0] = 1.0
+            counts.data /= np.repeat(norms, np.diff(counts.indptr))
+        return counts
+
+
+def save_artifact(directory, tfidf, lemmas=None, stop_words=None):
+    """Writes a fitted TfidfVectorizer (plus fast-pipeline tables) as an artifact directory."""
+    params = tfidf.get_params()
+    for name, expected in SUPPORTED_PARAMS.items():
+        if params.get(name) != expected:
+            raise ValueError(f"Cannot export vectorizer with {name}={params.get(name)!r}")
+    if params['norm'] not in ('l2', None):
+        raise ValueError(f"Cannot export vectorizer with norm={params['norm']!r}")
+
+    os.makedirs(directory, exist_ok=True)
+    terms = np.asarray(tfidf.get_feature_names_out(), dtype=str)
+    np.save(os.path.join(directory, TERMS_FILE), terms)
+    np.save(os.path.join(directory, IDF_FILE), np.asarray(tfidf.idf_, dtype=np.float32))
+    with open(os.path.join(directory, PIPELINE_FILE), 'w') as f:
+        json.dump({
+            'lemmas': lemmas or {},
+            'stop_words': sorted(stop_words) if stop_words is not None else None
+        }, f, sort_keys=True)
+
+    files = {name: _file_sha256(os.path.join(directory, name)) for name in (TERMS_FILE, IDF_FILE, PIPELINE_FILE)}
+    manifest = {
+        'format': ARTIFACT_FORMAT,
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'n_features': len(terms),
+        'params': {
+            'lowercase': params['lowercase'],
+            'token_pattern': params['token_pattern'],
+            'norm': params['norm'],
+            'sublinear_tf': params['sublinear_tf']
+        },
+        'files': files,
+        'checksum': _combined_checksum(files)
+    }
+    # The manifest is written last, so a directory with one is complete
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def load_artifact(directory, verify=False):
+    """Loads an artifact directory, memory-mapping its arrays.
+
+    Returns (MappedTfidf, lemmas, stop_words). With `verify` every file is
+    checked against the manifest checksums, which reads them in full.
+    """
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != ARTIFACT_FORMAT:
+        raise ValueError(f"{directory} is not a job vectorizer artifact")
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version {manifest.get('format_version')}")
+    if verify:
+        files = {name: _file_sha256(os.path.join(directory, name)) for name in manifest['files']}
+        if files != manifest['files'] or _combined_checksum(files) != manifest['checksum']:
+            raise ValueError(f"Checksum mismatch in artifact {directory}")
+
+    terms = np.load(os.path.join(directory, TERMS_FILE), mmap_mode='r')
+    idf = np.load(os.path.join(directory, IDF_FILE), mmap_mode='r')
+    if len(terms) != manifest['n_features'] or len(idf) != manifest['n_features']:
+        raise ValueError(f"Artifact {directory} does not match its manifest")
+    with open(os.path.join(directory, PIPELINE_FILE)) as f:
+        pipeline = json.load(f)
+
+    model = MappedTfidf(terms, idf, **manifest['params'])
+    stop_words = pipeline.get('stop_words')
+    return model, pipeline.get('lemmas') or {}, frozenset(stop_words) if stop_words is not None else None
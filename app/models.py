@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Boolean, Float, JSON, Text
 from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
 from sqlalchemy.ext.declarative import declarative_base
 from app.database import Base  # Fix this import to use the absolute path
+import time
 
 class User(Base):
     __tablename__ = "users"
@@ -13,6 +14,7 @@ class User(Base):
     location = Column(String)  # Store location as "city, country"
     remote_ok = Column(Boolean, default=False)
     tfidf_vector = Column(SQLiteJSON)  # Store vector as JSON array
+    updated_at = Column(Float, index=True, default=time.time, onupdate=time.time)  # Unix time of the last write
 
 class Job(Base):
     __tablename__ = "jobs"
@@ -25,4 +27,41 @@ class Job(Base):
     required_education = Column(String)  # Store education as level
     location = Column(String)  # Store location as "city, country"
     remote_ok = Column(Boolean, default=False)
-    tfidf_vector = Column(SQLiteJSON)  # Store vector as JSON array
\ No newline at end of file
+    tfidf_vector = Column(SQLiteJSON)  # Store vector as JSON array
+
+
+class RecommendationGeneration(Base):
+    __tablename__ = "recommendation_generations"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, index=True)  # 'jobs' (per user) or 'candidates' (per job)
+    top_k = Column(Integer)
+    status = Column(String)  # building, ready or failed
+    is_current = Column(Boolean, default=False)  # The one generation per kind that is served
+    started_at = Column(Float)  # Unix time
+    completed_at = Column(Float)
+
+
+class MaterializedJobRecommendation(Base):
+    __tablename__ = "materialized_job_recommendations"
+
+    # The primary key is the lookup: one generation, one user, ranks in order
+    generation = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    job_id = Column(Integer)
+    match_score = Column(Float)
+    similarity_score = Column(Float)
+    total = Column(Integer)  # Jobs ranked for the user
+
+
+class MaterializedCandidateRecommendation(Base):
+    __tablename__ = "materialized_candidate_recommendations"
+
+    generation = Column(Integer, primary_key=True)
+    job_id = Column(Integer, primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    candidate_id = Column(Integer)
+    match_score = Column(Float)
+    similarity_score = Column(Float)
+    total = Column(Integer)  # Candidates with a positive score for the job
@@ -0,0 +1,43 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def default_threads():
+    # Same default as ThreadPoolExecutor, capped by the database connection pool
+    return min(15, (os.cpu_count() or 1) + 4)
+
+
+class RequestExecutor:
+    """Bounded thread pool for the blocking part of a request.
+
+    Endpoints run their synchronous database queries and NLTK/NumPy scoring
+    here, so the event loop stays free to accept requests and answer /health.
+    At most `max_workers` requests are processed at once; the others wait in
+    the executor's queue. The pool is created on first use and again after
+    shutdown().
+    """
+
+    def __init__(self, max_workers=None, thread_name_prefix='request'):
+        self.max_workers = max_workers or default_threads()
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.thread_name_prefix)
+            return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), functools.partial(func, *args, **kwargs))
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,246 @@
+import cProfile
+import hmac
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from app.utils import get_project_root
+
+MODES = ('cprofile', 'sample')
+
+DEFAULT_DIRECTORY = os.path.join(get_project_root(), 'logs', 'profiles')
+# Seconds between stack samples
+DEFAULT_INTERVAL = 0.005
+# Saved profiles kept; the oldest are deleted beyond this
+DEFAULT_MAX_PROFILES = 200
+
+_ROOT = get_project_root() + os.sep
+
+
+def frame_name(code):
+    """`path:function` of a code object, the path relative to the project or site-packages."""
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = filename[len(_ROOT):]
+    elif 'site-packages' + os.sep in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_name}"
+
+
+def _stack(frame):
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Samples the stacks of registered threads every `interval` seconds.
+
+    Counts are kept as collapsed stacks (root first, frames joined by ';'),
+    the input format of flamegraph tools.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_thread(self, ident):
+        with self._lock:
+            self._threads.add(ident)
+
+    def remove_thread(self, ident):
+        with self._lock:
+            self._threads.discard(ident)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = [ident for ident in self._threads if ident != own]
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.counts[_stack(frame)] += 1
+                    self.samples += 1
+
+
+class RequestProfile:
+    """Profiles the work of one request, wherever its executor threads run it.
+
+    The request's blocking calls go through call(), which profiles the
+    calling thread only while the call runs, so other requests sharing the
+    thread pool are not included.
+    """
+
+    def __init__(self, name, mode='sample', interval=DEFAULT_INTERVAL, details=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}', expected one of {MODES}")
+        self.name = name
+        self.mode = mode
+        self.details = details or {}
+        self.profiler = cProfile.Profile() if mode == 'cprofile' else None
+        self.sampler = StackSampler(interval)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.sampler.start()
+
+    def call(self, func, *args, **kwargs):
+        ident = threading.get_ident()
+        self.sampler.add_thread(ident)
+        if self.profiler is not None:
+            self.profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if self.profiler is not None:
+                self.profiler.disable()
+            self.sampler.remove_thread(ident)
+
+    def stop(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._start
+            self.sampler.stop()
+
+
+def _header_bytes(value):
+    # Not latin-1, so not a header value a client could send: matches no secret
+    try:
+        return value.encode('latin-1')
+    except UnicodeEncodeError:
+        return b''
+
+
+class RequestProfiler:
+    """Decides which requests are profiled and saves their profiles.
+
+    A request is profiled with probability `rate`, or always when it
+    presents `token` (e.g. in an admin header). Each profile is saved as
+    `<stem>.collapsed` (stack samples), `<stem>.pstats` in cprofile mode,
+    and `<stem>.json` describing the request.
+    """
+
+    def __init__(self, mode='sample', rate=0.0, token=None, directory=DEFAULT_DIRECTORY,
+                 interval=DEFAULT_INTERVAL, max_profiles=DEFAULT_MAX_PROFILES):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}', expected one of {MODES}")
+        self.mode = mode
+        self.rate = rate
+        self.token = token
+        # Header values arrive decoded as latin-1, so a UTF-8 secret is compared
+        # as the bytes the client sent
+        self._token_bytes = token.encode('utf-8') if token else None
+        self.directory = directory
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self._sequence = itertools.count()
+
+    @property
+    def enabled(self):
+        return self.rate > 0 or bool(self.token)
+
+    def should_profile(self, token=None):
+        if token and self._token_bytes and hmac.compare_digest(_header_bytes(token), self._token_bytes):
+            return True
+        return self.rate > 0 and random.random() < self.rate
+
+    def start(self, name, token=None, details=None):
+        """A started RequestProfile if this request is to be profiled, else None."""
+        if not self.should_profile(token):
+            return None
+        return RequestProfile(name, self.mode, self.interval, details)
+
+    def save(self, profile):
+        """Stops `profile` and writes its files; returns their paths."""
+        profile.stop()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(profile.started_at))
+        stem = os.path.join(
+            self.directory, f"{stamp}-{profile.name.strip('/').replace('/', '_')}-{os.getpid()}-{next(self._sequence)}"
+        )
+        paths = []
+        if profile.profiler is not None:
+            profile.profiler.dump_stats(stem + '.pstats')
+            paths.append(stem + '.pstats')
+        with open(stem + '.collapsed', 'w') as f:
+            for stack, count in profile.sampler.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        paths.append(stem + '.collapsed')
+        with open(stem + '.json', 'w') as f:
+            json.dump({
+                "name": profile.name,
+                "mode": profile.mode,
+                "started_at": profile.started_at,
+                "duration_ms": profile.duration * 1000,
+                "samples": profile.sampler.samples,
+                "interval": profile.sampler.interval,
+                **profile.details
+            }, f)
+        paths.append(stem + '.json')
+        self.prune()
+        return paths
+
+    def prune(self):
+        # Oldest first: names start with the timestamp
+        stems = sorted({
+            os.path.splitext(name)[0] for name in os.listdir(self.directory) if name.endswith('.json')
+        })
+        for stem in stems[:max(0, len(stems) - self.max_profiles)]:
+            for extension in ('.json', '.collapsed', '.pstats'):
+                path = os.path.join(self.directory, stem + extension)
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def read_collapsed(path):
+    """Counter of collapsed stacks from a `.collapsed` file."""
+    counts = Counter()
+    with open(path) as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                counts[stack] += int(count)
+    return counts
+
+
+def hot_functions(stacks, top=20):
+    """[(function, self samples, total samples)] over collapsed stacks, most self time first.
+
+    Self samples are those where the function is the innermost frame; total
+    samples count each stack once per function on it, however deep the
+    recursion.
+    """
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for name in set(frames):
+            total[name] += count
+    ranked = sorted(total, key=lambda name: (-own[name], -total[name], name))
+    return [(name, own[name], total[name]) for name in ranked[:top]]
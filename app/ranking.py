@@ -0,0 +1,69 @@
+import heapq
+import numpy as np
+
+
+def rankable(scores):
+    """`scores` with non-finite values replaced by -inf, so they rank last.
+
+    A NaN would otherwise become the k-th value of a partition and match
+    nothing, leaving fewer than k winners.
+    """
+    scores = np.asarray(scores)
+    if np.isfinite(scores).all():
+        return scores
+    return np.where(np.isfinite(scores), scores, -np.inf)
+
+
+def top_k_indices(scores, k):
+    """Indices of the `k` highest scores, best first.
+
+    Equal scores keep their input order, exactly like a stable
+    ``sorted(..., reverse=True)``. Only the winners are sorted: the k-th
+    largest score is found with np.argpartition in linear time.
+    Non-finite scores rank last (see rankable).
+    """
+    scores = rankable(scores)
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+    if k < n:
+        threshold = scores[np.argpartition(scores, n - k)[n - k]]
+        above = np.flatnonzero(scores > threshold)
+        # Ties at the threshold are taken by position to keep the stable order
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+class TopK:
+    """Bounded min-heap of the `k` best (score, item) pairs seen so far.
+
+    Ties keep the earlier pushed item, matching top_k_indices, so pushing
+    chunk winners in order gives the same ranking as one top_k_indices call
+    over everything.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._pushed = 0
+
+    def push(self, score, item):
+        # (score, -order): among equal scores the latest push is the smallest
+        entry = (score, -self._pushed, item)
+        self._pushed += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def items(self):
+        """The kept items, best first."""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
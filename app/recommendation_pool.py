@@ -0,0 +1,201 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.candidate_recommender import CandidateRecommender
+from app.feature_store import CandidateFeatures, CandidateFeatureStore, positions_of
+from app.models import Job, User
+from app.recommender import JobRecommender
+from app.search_index import SearchMatches
+from app.skill_index import SkillIndex
+from app.text_cache import TextCache
+from app.vectorizer import JobVectorizer
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_TASKS_PER_WORKER = 1000
+
+
+class RecommendationTimeout(Exception):
+    pass
+
+
+class _Worker:
+    """Per-process state: the vectorizer, both recommenders and a database session factory."""
+
+    def __init__(self, model_path, database_url):
+        vectorizer = JobVectorizer(cache=TextCache(), model_path=model_path)
+        try:
+            vectorizer.warm_up()
+        except LookupError:
+            # The API's startup hook already refused to start without NLTK data;
+            # elsewhere texts fail one by one and their vectors are not stored
+            pass
+        self.job_recommender = JobRecommender(vectorizer)
+        self.candidate_recommender = CandidateRecommender(vectorizer)
+        self.candidate_store = CandidateFeatureStore(self.candidate_recommender.vector_store)
+        self.session_factory = sessionmaker(autoflush=False, bind=create_engine(database_url))
+        self.features_path = None
+        self.features = None
+        self.skill_index = None
+
+    def features_at(self, path):
+        # Each published generation is mapped once and shared with the page cache
+        if path != self.features_path:
+            features = CandidateFeatures.load(path)
+            self.skill_index = SkillIndex.from_columns(features.ids, features.skills, list(features.skill_ids))
+            self.features, self.features_path = features, path
+        return self.features
+
+
+# State of the current recommendation worker process
+_worker = None
+
+
+def _init_worker(model_path, database_url):
+    global _worker
+    _worker = _Worker(model_path, database_url)
+
+
+def _until(deadline, chunks):
+    for chunk in chunks:
+        if time.time() > deadline:
+            raise RecommendationTimeout("Recommendation task ran past its deadline")
+        yield chunk
+
+
+def _rank_candidates(job_id, top_n, features_path, chunk_size, deadline):
+    db = _worker.session_factory()
+    try:
+        job = db.get(Job, job_id)
+        if job is None:
+            return None
+        if features_path is None:
+            chunks = _worker.candidate_store.stream(db, chunk_size)
+        else:
+            features = _worker.features_at(features_path)
+            positions = positions_of(features, _worker.skill_index.candidates(job.required_skills))
+            chunks = features.iter_chunks(positions, chunk_size)
+        ranked, total = _worker.candidate_recommender.rank_chunks(job, _until(deadline, chunks), top_n)
+        return [(int(key), float(score), float(similarity)) for key, score, similarity in ranked], total
+    finally:
+        db.close()
+
+
+def _rank_search(user_id, search_text, top_n, max_candidates, chunk_size, deadline):
+    db = _worker.session_factory()
+    try:
+        user = db.get(User, user_id)
+        if user is None:
+            return None
+        matches = SearchMatches(db, search_text, max_candidates, chunk_size)
+        ranked = _worker.job_recommender.rank_job_chunks(user, _until(deadline, matches), top_n)
+        return [(job.id, float(score), float(similarity)) for job, score, similarity in ranked], matches.total
+    finally:
+        db.close()
+
+
+class RecommendationPool:
+    """Runs candidate and search ranking in worker processes, past the GIL.
+
+    Every worker loads the vectorizer once (see _init_worker) and is
+    replaced after `max_tasks_per_child` tasks. Tasks carry ids and query
+    parameters only and return (id, score, similarity) tuples, so no ORM
+    object is pickled; workers read rows through their own connections.
+
+    Candidate features are published by the parent as a memory-mapped
+    generation directory (see publish()), so all workers share one copy.
+    A task that takes longer than `timeout` seconds raises
+    RecommendationTimeout; the worker stops at its next chunk.
+    """
+
+    def __init__(self, processes, model_path, database_url, max_tasks_per_child=DEFAULT_TASKS_PER_WORKER,
+                 timeout=DEFAULT_TIMEOUT, directory=None):
+        self.processes = processes
+        self.model_path = model_path
+        self.database_url = database_url
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeout = timeout
+        self._directory = directory
+        self._owns_directory = directory is None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._generation = 0
+        self._published = None
+        self._published_paths = []
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    initializer=_init_worker,
+                    initargs=(self.model_path, self.database_url),
+                    max_tasks_per_child=self.max_tasks_per_child
+                )
+            return self._executor
+
+    def _discard_pool(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def publish(self, features):
+        """Path of a generation holding `features`, written when they changed."""
+        with self._lock:
+            if features is self._published:
+                return self._published_paths[-1]
+            if self._directory is None:
+                self._directory = tempfile.mkdtemp(prefix='candidate-features-')
+            self._generation += 1
+            path = os.path.join(self._directory, f"generation-{self._generation}")
+            features.save(path)
+            self._published = features
+            self._published_paths.append(path)
+            # Workers may still be mapping the previous generation
+            while len(self._published_paths) > 2:
+                shutil.rmtree(self._published_paths.pop(0), ignore_errors=True)
+            return path
+
+    async def _run(self, func, *args):
+        executor = self._pool()
+        future = executor.submit(func, *args, time.time() + self.timeout)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # Only a queued task can be cancelled; a running one stops at its next chunk
+            future.cancel()
+            raise RecommendationTimeout(f"Recommendation task exceeded {self.timeout} s")
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); the next task starts a fresh pool
+            self._discard_pool(executor)
+            raise
+
+    async def rank_candidates(self, job_id, top_n, features_path=None, chunk_size=10000):
+        """(ranking, eligible count) for the job, or None when it does not exist.
+
+        Without `features_path` the worker streams candidates from the database.
+        """
+        return await self._run(_rank_candidates, job_id, top_n, features_path, chunk_size)
+
+    async def rank_search(self, user_id, search_text, top_n, max_candidates, chunk_size=500):
+        """(ranking, total matches) for the user, or None when they do not exist."""
+        return await self._run(_rank_search, user_id, search_text, top_n, max_candidates, chunk_size)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            directory = self._directory if self._owns_directory else None
+            self._published = None
+            self._published_paths = []
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+            self._directory = None
@@ -1,10 +1,21 @@
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from .metrics import timer
+from .ranking import TopK, top_k_indices
 from .vectorizer import JobVectorizer
+from .vector_store import VectorStore
+
+EDUCATION_LEVELS = {'high school': 1, 'bachelor': 2, 'master': 3, 'phd': 4}
+
+def highest_education_level(user):
+    return max([EDUCATION_LEVELS.get(edu.split(',')[0].strip().lower(), 0)
+                for edu in user.education], default=0)
 
 class JobRecommender:
-    def __init__(self, vectorizer: JobVectorizer):
+    def __init__(self, vectorizer: JobVectorizer, ann_index=None):
         self.vectorizer = vectorizer
+        self.vector_store = VectorStore(vectorizer)
+        # Optional app.ann_index.IVFIndex over the stored job vectors
+        self.ann_index = ann_index
 
     def calculate_match_score(self, user, job, similarity_score):
         # Base score from TFIDF similarity (60% weight)
@@ -24,24 +35,64 @@ class JobRecommender:
         total_score += location_score
 
         # Education match (10% weight)
-        education_levels = {'high school': 1, 'bachelor': 2, 'master': 3, 'phd': 4}
-        user_highest_edu = max([education_levels.get(edu.split(',')[0].strip().lower(), 0) 
-                              for edu in user.education])
-        required_edu = education_levels.get(job.required_education.lower(), 0)
+        user_highest_edu = highest_education_level(user)
+        required_edu = EDUCATION_LEVELS.get(job.required_education.lower(), 0)
         education_score = 0.1 if user_highest_edu >= required_edu else 0.0
         total_score += education_score
 
         return total_score
 
+    def calculate_match_scores(self, user, jobs, similarities):
+        """Array version of calculate_match_score over every job at once.
+
+        The terms are added in the same order and in float64, so each score
+        is bit-for-bit what calculate_match_score returns for that job.
+        """
+        total_scores = np.asarray(similarities, dtype=np.float64) * 0.6
+
+        required_exp = np.array([job.required_experience for job in jobs], dtype=np.float64)
+        total_scores += np.where(user.experience >= required_exp, 0.2,
+                                 np.where(user.experience >= required_exp * 0.8, 0.1, 0.0))
+
+        same_location = np.array([user.location == job.location or bool(job.remote_ok and user.remote_ok)
+                                  for job in jobs], dtype=bool)
+        total_scores += np.where(same_location, 0.1, 0.0)
+
+        required_edu = np.array([EDUCATION_LEVELS.get(job.required_education.lower(), 0) for job in jobs],
+                                dtype=np.int8)
+        total_scores += np.where(highest_education_level(user) >= required_edu, 0.1, 0.0)
+        return total_scores
+
+    def retrieve_job_ids(self, user, n_candidates=300, nprobe=None):
+        """Ids of the jobs nearest to the user in the ANN index, for exact rescoring."""
+        user_vector = self.vector_store.get_vector(user, 'user')
+        job_ids, _ = self.ann_index.search(user_vector, n_candidates, nprobe)
+        return job_ids
+
+    def content_similarities(self, user, jobs):
+        # Stored rows are L2-normalized, so cosine similarity is a sparse mat-vec
+        with timer('job_similarity'):
+            user_vector = self.vector_store.get_vector(user, 'user')
+            job_vectors = self.vector_store.get_matrix(jobs, 'job')
+            return job_vectors @ user_vector.toarray().ravel()
+
     def get_recommendations(self, user, jobs, top_n=10):
-        user_vector = self.vectorizer.transform_user(user)
-        job_vectors = np.vstack([self.vectorizer.transform_job(job) for job in jobs])
-        
-        similarities = cosine_similarity([user_vector], job_vectors)[0]
-        
-        job_scores = []
-        for job, sim_score in zip(jobs, similarities):
-            overall_score = self.calculate_match_score(user, job, sim_score)
-            job_scores.append((job, overall_score, sim_score))
-        
-        return sorted(job_scores, key=lambda x: x[1], reverse=True)[:top_n]
\ No newline at end of file
+        jobs = list(jobs)
+        if not jobs:
+            return []
+        similarities = self.content_similarities(user, jobs)
+        with timer('job_scoring'):
+            scores = self.calculate_match_scores(user, jobs, similarities)
+        return [(jobs[i], float(scores[i]), float(similarities[i])) for i in top_k_indices(scores, top_n)]
+
+    def rank_job_chunks(self, user, job_chunks, top_n=10):
+        """Like get_recommendations over the concatenation of `job_chunks`.
+
+        Each chunk is scored as a batch and only its winners enter a bounded
+        heap, so memory stays at top_n plus one chunk however many jobs match.
+        """
+        top = TopK(top_n)
+        for jobs in job_chunks:
+            for job, score, similarity in self.get_recommendations(user, jobs, top_n):
+                top.push(score, (job, score, similarity))
+        return top.items()
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models import Job, User
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Rough per-entry overhead of the key, the OrderedDict node and bookkeeping
+ENTRY_OVERHEAD = 160
+
+SESSION_KEY = 'result_cache_changes'
+
+# Columns whose changes do not affect any ranking: vectors are derived from the
+# other columns and only rewritten when stale
+DERIVED_COLUMNS = {'tfidf_vector'}
+
+
+def normalize_query(search_text):
+    return ' '.join(str(search_text).lower().split())
+
+
+class MemoryBackend:
+    """In-process LRU store of encoded results with per-entry expiry and a byte cap."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        size = len(value) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires_at, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        # Caller must hold the lock
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value) + ENTRY_OVERHEAD
+
+    def versions(self, names):
+        with self._lock:
+            return [self._versions.get(name, 0) for name in names]
+
+    def bump(self, names):
+        with self._lock:
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+class RedisBackend:
+    """Results and versions in Redis (or anything speaking its protocol), shared by all API processes.
+
+    Entries expire through Redis TTLs; the byte cap and LRU eviction are
+    Redis's own (maxmemory with an allkeys-lru policy).
+    """
+
+    def __init__(self, url=None, client=None, prefix='job-recommender'):
+        if client is None:
+            if redis is None:
+                raise ImportError("The Redis result cache needs the redis package (pip install redis)")
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+        self.client = client
+        self.prefix = prefix
+
+    def _version_key(self, name):
+        return f"{self.prefix}:version:{name}"
+
+    def get(self, key):
+        return self.client.get(f"{self.prefix}:result:{key}")
+
+    def set(self, key, value, ttl=None):
+        self.client.set(f"{self.prefix}:result:{key}", value, ex=max(1, int(ttl)) if ttl else None)
+
+    def versions(self, names):
+        return [int(value or 0) for value in self.client.mget([self._version_key(name) for name in names])]
+
+    def bump(self, names):
+        pipeline = self.client.pipeline()
+        for name in names:
+            pipeline.incr(self._version_key(name))
+        pipeline.execute()
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}:result:*"):
+            self.client.delete(key)
+
+    def stats(self):
+        return {"backend": "redis"}
+
+
+def search_dependencies(user_id):
+    # A search ranks every job for one user
+    return ['jobs', f"user:{user_id}", 'users:bulk']
+
+
+def candidate_dependencies(job_id):
+    # A candidate ranking scores every user for one job
+    return ['users', f"job:{job_id}", 'jobs:bulk']
+
+
+class ResultCache:
+    """Cache of whole endpoint responses, invalidated by data versions.
+
+    A key covers the endpoint, its parameters and the current version of
+    every row group the result depends on (see search_dependencies and
+    candidate_dependencies). Committing a change to those rows bumps the
+    versions (install_result_cache_hooks), so later lookups miss and the
+    stale entries age out of the LRU. `ttl` only bounds how long changes
+    made outside this process's sessions can go unnoticed.
+    """
+
+    def __init__(self, backend=None, ttl=300.0, namespace='v1'):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, endpoint, params, dependencies):
+        """Returns (key, cached response or None); store() the response under `key` on a miss.
+
+        Versions are read before the caller queries the database, so a
+        result computed while rows change is stored under the old versions
+        and never served.
+        """
+        versions = self.backend.versions(dependencies)
+        payload = json.dumps([self.namespace, endpoint, params, dict(zip(dependencies, versions))],
+                             sort_keys=True, default=str)
+        key = f"{endpoint}:{hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()}"
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return key, json.loads(value) if value is not None else None
+
+    def store(self, key, response):
+        self.backend.set(key, json.dumps(response).encode('utf-8'), self.ttl)
+
+    def invalidate(self, names):
+        self.backend.bump(names)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "ttl": self.ttl
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+
+def _changed_content(obj):
+    state = inspect(obj)
+    return any(
+        attr.history.has_changes() for attr in state.attrs if attr.key not in DERIVED_COLUMNS
+    )
+
+
+def _names(obj):
+    if isinstance(obj, User):
+        return ['users', f"user:{obj.id}"]
+    return ['jobs', f"job:{obj.id}"]
+
+
+def install_result_cache_hooks(cache):
+    """Bumps the versions of the users and jobs written by committed sessions."""
+    key = (SESSION_KEY, id(cache))
+
+    def after_flush(session, flush_context):
+        changed = session.info.setdefault(key, set())
+        for obj in list(session.new) + list(session.deleted):
+            if isinstance(obj, (User, Job)):
+                changed.update(_names(obj))
+        for obj in session.dirty:
+            if isinstance(obj, (User, Job)) and _changed_content(obj):
+                changed.update(_names(obj))
+
+    def do_orm_execute(state):
+        # Bulk statements bypass the flush; after an update or delete every row may have changed
+        if state.bind_mapper is None or state.bind_mapper.class_ not in (User, Job):
+            return
+        table = 'users' if state.bind_mapper.class_ is User else 'jobs'
+        if state.is_update or state.is_delete:
+            state.session.info.setdefault(key, set()).update([table, f"{table}:bulk"])
+        elif state.is_insert:
+            state.session.info.setdefault(key, set()).add(table)
+
+    def after_commit(session):
+        changed = session.info.pop(key, None)
+        if changed:
+            cache.invalidate(sorted(changed))
+
+    def after_rollback(session):
+        session.info.pop(key, None)
+
+    def users_table_changed(target, connection, **kw):
+        cache.invalidate(['users', 'users:bulk'])
+
+    def jobs_table_changed(target, connection, **kw):
+        cache.invalidate(['jobs', 'jobs:bulk'])
+
+    session_hooks = [
+        ('after_flush', after_flush),
+        ('do_orm_execute', do_orm_execute),
+        ('after_commit', after_commit),
+        ('after_rollback', after_rollback)
+    ]
+    table_hooks = [
+        (User.__table__, 'after_create', users_table_changed),
+        (User.__table__, 'after_drop', users_table_changed),
+        (Job.__table__, 'after_create', jobs_table_changed),
+        (Job.__table__, 'after_drop', jobs_table_changed)
+    ]
+    for name, hook in session_hooks:
+        event.listen(Session, name, hook)
+    for table, name, hook in table_hooks:
+        event.listen(table, name, hook)
+    return session_hooks, table_hooks
+
+
+def remove_result_cache_hooks(hooks):
+    session_hooks, table_hooks = hooks
+    for name, hook in session_hooks:
+        event.remove(Session, name, hook)
+    for table, name, hook in table_hooks:
+        event.remove(table, name, hook)
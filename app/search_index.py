@@ -0,0 +1,181 @@
+import re
+import time
+from sqlalchemy import event, func, or_, select, text, column, table, literal_column
+from sqlalchemy.exc import OperationalError
+from app.metrics import observe
+from app.models import Job
+
+FTS_TABLE = 'jobs_fts'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# External-content FTS5 table over jobs(title, description); the triggers keep it
+# in sync with every insert, delete and text update, including bulk statements
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, content='jobs', content_rowid='id', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF id, title, description ON jobs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END"""
+]
+
+# The query must use this exact expression for PostgreSQL to pick the GIN index
+POSTGRES_DOCUMENT = "to_tsvector('english', coalesce(jobs.title, '') || ' ' || coalesce(jobs.description, ''))"
+POSTGRES_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_jobs_fulltext ON jobs USING gin "
+    "((to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))))"
+]
+
+# Title matches weigh more than description matches in the bm25 ranking
+SQLITE_RANK = f"bm25({FTS_TABLE}, 2.0, 1.0)"
+
+# Binds (by URL) on which the full-text index could not be created
+_unavailable = set()
+
+
+def search_tokens(search_text):
+    return TOKEN_RE.findall(search_text.lower())
+
+
+def create_search_index(connection):
+    """Creates the full-text index on `connection` if its dialect supports one.
+
+    Returns True when the index was newly created (and filled from jobs).
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+        ).first()
+        try:
+            for statement in SQLITE_DDL:
+                connection.exec_driver_sql(statement)
+        except OperationalError:
+            # SQLite built without FTS5; searches fall back to ILIKE
+            _unavailable.add(str(connection.engine.url))
+            return False
+        if not exists:
+            connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        return not exists
+    if dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+    return False
+
+
+def drop_search_index(connection):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql("DROP INDEX IF EXISTS ix_jobs_fulltext")
+
+
+def _after_create(target, connection, **kw):
+    create_search_index(connection)
+
+
+def _before_drop(target, connection, **kw):
+    drop_search_index(connection)
+
+
+def install_search_index_hooks():
+    """Creates/drops the full-text index together with the jobs table."""
+    if not event.contains(Job.__table__, 'after_create', _after_create):
+        event.listen(Job.__table__, 'after_create', _after_create)
+        event.listen(Job.__table__, 'before_drop', _before_drop)
+
+
+def ensure_search_index(engine):
+    """Adds the full-text index to a database whose jobs table already exists."""
+    with engine.begin() as connection:
+        return create_search_index(connection)
+
+
+def _ilike_filter(search_text):
+    return or_(
+        Job.title.ilike(f"%{search_text}%"),
+        Job.description.ilike(f"%{search_text}%")
+    )
+
+
+def search_statement(dialect, search_text, bind_url=None):
+    """Select of (Job, total) rows matching `search_text`, best match first.
+
+    Every word must match, as a prefix. `total` is the number of matches,
+    computed by a window function in the same query as the page.
+    """
+    total = func.count().over().label('total')
+    tokens = search_tokens(search_text)
+    if not tokens:
+        # Nothing to match on: every job, like ILIKE '%%' did
+        return select(Job, total).order_by(Job.id)
+
+    if dialect == 'sqlite' and bind_url not in _unavailable:
+        fts = table(FTS_TABLE, column('rowid'))
+        query = ' AND '.join(f'"{token}"*' for token in tokens)
+        # bm25() is only allowed in a plain full-text query, so rank in a subquery
+        matches = (
+            select(fts.c.rowid.label('job_id'), literal_column(SQLITE_RANK).label('score'))
+            .where(text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=query))
+            .subquery()
+        )
+        return (
+            select(Job, total)
+            .join(matches, matches.c.job_id == Job.id)
+            .order_by(matches.c.score, Job.id)
+        )
+    if dialect == 'postgresql':
+        document = literal_column(POSTGRES_DOCUMENT)
+        query = func.to_tsquery('english', ' & '.join(f"{token}:*" for token in tokens))
+        return (
+            select(Job, total)
+            .where(document.op('@@')(query))
+            .order_by(func.ts_rank(document, query).desc(), Job.id)
+        )
+    return select(Job, total).where(_ilike_filter(search_text)).order_by(Job.id)
+
+
+class SearchMatches:
+    """Streams the best `limit` matches for `search_text` in chunks of jobs.
+
+    `total` (all matches, not just the first `limit`) is known once the
+    first chunk has been read.
+    """
+
+    def __init__(self, db, search_text, limit, chunk_size=500):
+        self.db = db
+        self.search_text = search_text
+        self.limit = limit
+        self.chunk_size = chunk_size
+        self.total = 0
+
+    def __iter__(self):
+        bind = self.db.get_bind()
+        statement = search_statement(bind.dialect.name, self.search_text, str(bind.engine.url))
+        # Only the query and fetching count as search_query time, not the
+        # consumer's work between chunks
+        start = time.perf_counter()
+        elapsed = 0.0
+        try:
+            result = self.db.execute(statement.limit(self.limit).execution_options(yield_per=self.chunk_size))
+            partitions = result.partitions()
+            while True:
+                rows = next(partitions, None)
+                elapsed += time.perf_counter() - start
+                if rows is None:
+                    return
+                self.total = rows[0].total
+                yield [row[0] for row in rows]
+                start = time.perf_counter()
+        finally:
+            observe('search_query', elapsed)
@@ -0,0 +1,138 @@
+import threading
+import numpy as np
+
+POSTING_DTYPE = np.int32
+
+# Past this length ratio a posting list is probed with binary searches
+# instead of being turned into a bitmap
+GALLOP_RATIO = 16
+
+EMPTY_POSTINGS = np.array([], dtype=POSTING_DTYPE)
+
+
+def normalize_skill(skill):
+    return ' '.join(str(skill).lower().split())
+
+
+def _as_postings(ids):
+    ids = np.asarray(ids, dtype=np.int64)
+    if len(ids) and (ids.min() < 0 or ids.max() > np.iinfo(POSTING_DTYPE).max):
+        raise ValueError("Candidate ids must fit in an int32 posting list")
+    return np.unique(ids).astype(POSTING_DTYPE)
+
+
+def intersect_postings(small, large):
+    """Intersection of two sorted, duplicate-free posting lists."""
+    if not len(small) or not len(large):
+        return EMPTY_POSTINGS
+    if len(large) >= GALLOP_RATIO * len(small):
+        # Galloping: one vectorized binary search per id of the short list
+        positions = np.searchsorted(large, small)
+        positions[positions == len(large)] = len(large) - 1
+        return small[large[positions] == small]
+    low, high = int(small[0]), int(small[-1])
+    if high - low > GALLOP_RATIO * len(large):
+        # Ids too spread out for a bitmap
+        return np.intersect1d(small, large, assume_unique=True)
+    # Similar sizes: mark the long list in a bitmap over the id range
+    window = large[(large >= low) & (large <= high)]
+    bitmap = np.zeros(high - low + 1, dtype=bool)
+    bitmap[window - low] = True
+    return small[bitmap[small - low]]
+
+
+class SkillIndex:
+    """Inverted index from normalized skill to sorted int32 candidate ids.
+
+    Used to prefilter candidates on a job's required skills: only ids in
+    every posting list can hold all of them. Matching ignores case and extra
+    whitespace, so callers still apply the exact check to what it returns.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_columns(cls, ids, skills, skill_names):
+        """Builds the index from a candidate x skill CSR matrix whose rows belong to `ids`."""
+        index = cls()
+        by_column = skills.tocsc()
+        grouped = {}
+        for column, name in enumerate(skill_names[:by_column.shape[1]]):
+            rows = by_column.indices[by_column.indptr[column]:by_column.indptr[column + 1]]
+            if len(rows):
+                grouped.setdefault(normalize_skill(name), []).append(ids[rows])
+        for skill, parts in grouped.items():
+            index._postings[skill] = _as_postings(np.concatenate(parts))
+        return index
+
+    def update(self, added=None, removed=None):
+        """Applies candidate changes without a rebuild.
+
+        `added` and `removed` map candidate id -> skills. An edited candidate
+        is removed with its old skills and added with the new ones.
+        """
+        removals = self._group(removed or {})
+        additions = self._group(added or {})
+        with self._lock:
+            for skill, ids in removals.items():
+                postings = self._postings.get(skill)
+                if postings is None:
+                    continue
+                postings = postings[~np.isin(postings, ids, assume_unique=True)]
+                if len(postings):
+                    self._postings[skill] = postings
+                else:
+                    del self._postings[skill]
+            for skill, ids in additions.items():
+                postings = self._postings.get(skill, EMPTY_POSTINGS)
+                self._postings[skill] = np.union1d(postings, ids).astype(POSTING_DTYPE, copy=False)
+
+    @staticmethod
+    def _group(candidates):
+        grouped = {}
+        for candidate_id, skills in candidates.items():
+            for skill in {normalize_skill(skill) for skill in skills or ()}:
+                grouped.setdefault(skill, []).append(candidate_id)
+        return {skill: _as_postings(ids) for skill, ids in grouped.items()}
+
+    def add(self, candidate_id, skills):
+        self.update(added={candidate_id: skills})
+
+    def remove(self, candidate_id, skills):
+        self.update(removed={candidate_id: skills})
+
+    def postings(self, skill):
+        with self._lock:
+            return self._postings.get(normalize_skill(skill), EMPTY_POSTINGS)
+
+    def candidates(self, required_skills):
+        """Sorted ids of the candidates holding every skill, or None when nothing is required."""
+        required = {normalize_skill(skill) for skill in required_skills or ()}
+        if not required:
+            return None
+        with self._lock:
+            lists = [self._postings.get(skill, EMPTY_POSTINGS) for skill in required]
+        # Starting from the rarest skill keeps every intermediate result small
+        lists.sort(key=len)
+        result = lists[0]
+        for postings in lists[1:]:
+            if not len(result):
+                break
+            result = intersect_postings(result, postings)
+        return result
+
+    def stats(self):
+        with self._lock:
+            sizes = np.array([len(postings) for postings in self._postings.values()], dtype=np.int64)
+            largest = sorted(self._postings.items(), key=lambda item: len(item[1]), reverse=True)[:10]
+        return {
+            "skills": len(sizes),
+            "postings": int(sizes.sum()),
+            "bytes": int(sizes.sum()) * np.dtype(POSTING_DTYPE).itemsize,
+            "max_postings": int(sizes.max()) if len(sizes) else 0,
+            "mean_postings": float(sizes.mean()) if len(sizes) else 0.0,
+            "median_postings": float(np.median(sizes)) if len(sizes) else 0.0,
+            "largest": {skill: len(postings) for skill, postings in largest}
+        }
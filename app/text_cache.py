@@ -0,0 +1,130 @@
+import hashlib
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+# Rough per-entry overhead of the key, the OrderedDict node and bookkeeping
+ENTRY_OVERHEAD = 120
+
+
+class TextCache:
+    """Bounded, thread-safe LRU cache for preprocessed text.
+
+    Entries are keyed by a hash of the input text. When `path` is given, a
+    SQLite file is used as a second tier so entries survive restarts; writes
+    to it are buffered and flushed every `flush_every` entries.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, path=None, flush_every=256):
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pending = []
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._disk = None
+        if path:
+            self._disk = sqlite3.connect(path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS preprocess_cache (key BLOB PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._disk.commit()
+
+    @staticmethod
+    def key(text, namespace=''):
+        return hashlib.blake2b(f"{namespace}\0{text}".encode('utf-8'), digest_size=16).digest()
+
+    def _remember(self, key, value):
+        # Caller must hold the lock
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        size = sys.getsizeof(value) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= sys.getsizeof(evicted) + ENTRY_OVERHEAD
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self._disk is not None:
+                try:
+                    row = self._disk.execute(
+                        "SELECT value FROM preprocess_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error:
+                    row = None
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._disk is not None:
+                self._pending.append((key, value))
+                if len(self._pending) >= self.flush_every:
+                    self._flush_pending()
+
+    def _flush_pending(self):
+        # Caller must hold the lock. The disk tier is best effort, so a locked
+        # database (e.g. another worker writing) just drops this batch.
+        if self._pending:
+            try:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO preprocess_cache (key, value) VALUES (?, ?)", self._pending
+                )
+                self._disk.commit()
+            except sqlite3.Error:
+                self._disk.rollback()
+            self._pending = []
+
+    def flush(self):
+        with self._lock:
+            if self._disk is not None:
+                self._flush_pending()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._pending = []
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM preprocess_cache")
+                self._disk.commit()
+
+    def close(self):
+        with self._lock:
+            if self._disk is not None:
+                self._flush_pending()
+                self._disk.close()
+                self._disk = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
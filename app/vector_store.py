@@ -0,0 +1,242 @@
+import base64
+import threading
+import numpy as np
+from scipy import sparse
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models import User, Job
+
+# Which batched JobVectorizer transform produces each kind of stored vector
+VECTOR_KINDS = {
+    'job': 'transform_jobs',
+    'user': 'transform_users',
+    'candidate': 'transform_candidates'
+}
+
+# Columns whose change invalidates the stored vectors of a row
+TEXT_FIELDS = {
+    Job: ('title', 'description', 'required_skills', 'required_education',
+          'required_experience', 'location'),
+    User: ('skills', 'education', 'experience', 'location')
+}
+
+STORED_KINDS = {
+    Job: ('job',),
+    User: ('user', 'candidate')
+}
+
+
+def encode_vector(row):
+    """Encodes a 1 x n sparse row as base64 int32 indices and float32 data."""
+    row = sparse.csr_matrix(row, dtype=np.float32)
+    row.sum_duplicates()
+    return {
+        'indices': base64.b64encode(row.indices.astype(np.int32).tobytes()).decode('ascii'),
+        'data': base64.b64encode(row.data.astype(np.float32).tobytes()).decode('ascii')
+    }
+
+
+def _decode_arrays(encoded):
+    indices = np.frombuffer(base64.b64decode(encoded['indices']), dtype=np.int32)
+    data = np.frombuffer(base64.b64decode(encoded['data']), dtype=np.float32)
+    return indices, data
+
+
+def stack_rows(rows, dim):
+    """Assembles (indices, data) pairs into one CSR matrix without per-row objects."""
+    lengths = np.fromiter((len(indices) for indices, _ in rows), dtype=np.int64, count=len(rows))
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    if rows:
+        indices = np.concatenate([indices for indices, _ in rows]).astype(np.int32, copy=False)
+        data = np.concatenate([data for _, data in rows]).astype(np.float32, copy=False)
+    else:
+        indices = np.array([], dtype=np.int32)
+        data = np.array([], dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), dim))
+
+
+_EMPTY_ROW = (np.array([], dtype=np.int32), np.array([], dtype=np.float32))
+
+
+def decode_vector(encoded, dim):
+    """Decodes a vector produced by encode_vector into a 1 x dim CSR row."""
+    return stack_rows([_decode_arrays(encoded)], dim)
+
+
+class VectorStore:
+    """Reads and writes precomputed TF-IDF vectors kept in the `tfidf_vector` column.
+
+    The column holds a payload such as
+    ``{"version": "...", "dim": 500, "job": {"indices": "...", "data": "..."}}``.
+    Vectors tagged with a different vectorizer version are recomputed lazily
+    and written back onto the row.
+    """
+
+    def __init__(self, vectorizer):
+        self.vectorizer = vectorizer
+
+    def stored_arrays(self, obj, kind):
+        """(indices, data) of the current stored vector of `obj`, or None if there is none."""
+        payload = getattr(obj, 'tfidf_vector', None)
+        if not isinstance(payload, dict) or kind not in payload:
+            return None
+        if payload.get('version') != self.vectorizer.version:
+            return None
+        return _decode_arrays(payload[kind])
+
+    def _compute_matrix(self, objs, kind):
+        # Also returns the positions whose text failed preprocessing
+        transform = getattr(self.vectorizer, VECTOR_KINDS[kind])
+        return transform(objs, return_failed=True)
+
+    def _write_vector(self, obj, kind, row):
+        if not hasattr(obj, 'tfidf_vector'):
+            return
+        version = self.vectorizer.version
+        payload = obj.tfidf_vector
+        if isinstance(payload, dict) and payload.get('version') == version:
+            payload = dict(payload)
+        else:
+            payload = {'version': version, 'dim': row.shape[1]}
+        payload[kind] = encode_vector(row)
+        # Assign a new dict so SQLAlchemy notices the change
+        obj.tfidf_vector = payload
+
+    def _discard_vector(self, obj, kind):
+        # Drops a vector that no longer matches the row's text
+        payload = getattr(obj, 'tfidf_vector', None)
+        if isinstance(payload, dict) and kind in payload:
+            payload = dict(payload)
+            del payload[kind]
+            obj.tfidf_vector = payload
+
+    def refresh(self, objs, kinds):
+        """Recomputes and stores the vectors of `objs` for the given kinds.
+
+        Rows whose text failed preprocessing lose their stored vector so the
+        next read computes it again.
+        """
+        objs = list(objs)
+        for kind in kinds:
+            computed, failed = self._compute_matrix(objs, kind)
+            failed = set(failed)
+            for position, obj in enumerate(objs):
+                if position in failed:
+                    self._discard_vector(obj, kind)
+                else:
+                    self._write_vector(obj, kind, computed[position])
+
+    def get_vector(self, obj, kind):
+        return self.get_matrix([obj], kind)
+
+    def get_matrix(self, objs, kind, write=True):
+        """Returns the stored vectors of `objs` as one CSR matrix.
+
+        Rows without a current vector are vectorized together in a single batch
+        and, with `write`, stored back onto the objects. Rows whose text failed
+        preprocessing come back empty and are never stored.
+        """
+        objs = list(objs)
+        rows = [self.stored_arrays(obj, kind) for obj in objs]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            computed, failed = self._compute_matrix([objs[i] for i in missing], kind)
+            failed = set(failed)
+            for position, i in enumerate(missing):
+                row = computed[position]
+                if write and position not in failed:
+                    self._write_vector(objs[i], kind, row)
+                rows[i] = (row.indices, row.data)
+        return stack_rows(rows, self.vectorizer.n_features)
+
+    def stored_matrix(self, objs, kind):
+        """Decodes the current stored vectors of `objs` without computing any.
+
+        Returns the CSR matrix, in which objects without a current vector
+        have empty rows, and the positions of those objects.
+        """
+        rows = [self.stored_arrays(obj, kind) for obj in objs]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        for i in missing:
+            rows[i] = _EMPTY_ROW
+        return stack_rows(rows, self.vectorizer.n_features), missing
+
+
+class PendingVectors:
+    """Objects loaded without a current stored vector, vectorized on demand.
+
+    Vectors are computed for the objects asked for and kept for later
+    calls; nothing is written back. Objects whose text fails to
+    preprocess get empty rows and are retried on the next call.
+    """
+
+    def __init__(self, store, objs, kind):
+        self.store = store
+        self.objs = objs
+        self.kind = kind
+        self._computed = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.objs)
+
+    @classmethod
+    def combine(cls, store, kind, selections):
+        """One PendingVectors over (PendingVectors, codes) selections, in order, keeping computed rows."""
+        combined = cls(store, [], kind)
+        for pending, codes in selections:
+            with pending._lock:
+                computed = dict(pending._computed)
+            for code in codes:
+                code = int(code)
+                if code in computed:
+                    combined._computed[len(combined.objs)] = computed[code]
+                combined.objs.append(pending.objs[code])
+        return combined
+
+    def matrix(self, codes):
+        """Vectors of the objects at `codes` as one CSR matrix."""
+        codes = [int(code) for code in codes]
+        with self._lock:
+            rows = {code: self._computed[code] for code in codes if code in self._computed}
+        todo = sorted(set(codes) - rows.keys())
+        if todo:
+            computed, failed = self.store._compute_matrix([self.objs[code] for code in todo], self.kind)
+            failed = set(failed)
+            fresh = {}
+            for position, code in enumerate(todo):
+                row = computed[position]
+                rows[code] = (row.indices, row.data)
+                if position not in failed:
+                    fresh[code] = rows[code]
+            with self._lock:
+                self._computed.update(fresh)
+        return stack_rows([rows[code] for code in codes], self.store.vectorizer.n_features)
+
+
+def _needs_refresh(obj, store):
+    state = inspect(obj)
+    if state.pending or state.transient:
+        return True
+    if any(state.attrs[field].history.has_changes() for field in TEXT_FIELDS[type(obj)]):
+        return True
+    payload = obj.tfidf_vector
+    return not isinstance(payload, dict) or payload.get('version') != store.vectorizer.version
+
+
+def install_vector_hooks(store):
+    """Computes vectors for new and edited jobs/users when a session flushes."""
+    def before_flush(session, flush_context, instances):
+        changed = [obj for obj in list(session.new) + list(session.dirty) if type(obj) in TEXT_FIELDS]
+        for model, kinds in STORED_KINDS.items():
+            objs = [obj for obj in changed if type(obj) is model and _needs_refresh(obj, store)]
+            if objs:
+                store.refresh(objs, kinds)
+
+    event.listen(Session, 'before_flush', before_flush)
+    return before_flush
+
+
+def remove_vector_hooks(hook):
+    event.remove(Session, 'before_flush', hook)
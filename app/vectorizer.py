@@ -1,83 +1,358 @@
-import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
 import pickle
+import hashlib
+import logging
+import os
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+import threading
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from numbers import Integral
+from app.model_artifact import MappedTfidf, save_artifact, load_artifact, is_artifact
+from app.metrics import timer
 
-# Download required NLTK data
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
-nltk.download('averaged_perceptron_tagger')
+logger = logging.getLogger('job_recommender')
 
-class JobVectorizer:
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            max_features=500,  # Reduced from 1000
-            stop_words='english',
-            ngram_range=(1, 1),  # Changed from (1,2) to reduce memory usage
-            min_df=10,  # Increased from 5
-            max_df=0.90,  # Slightly reduced
-            dtype=np.float32  # Use float32 instead of float64 to save memory
+# NLTK and scikit-learn are imported lazily: importing them costs about a
+# second, which every API worker would otherwise pay before serving.
+
+# NLTK data used by the tagging pipeline, by downloader id
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger'
+}
+
+# Resources found once are not looked up again; missing ones are, so data
+# installed while the process runs is picked up
+_found_nltk_resources = set()
+
+def missing_nltk_resources(names=tuple(NLTK_RESOURCES)):
+    """Returns the NLTK resources in `names` that are not installed locally."""
+    missing = []
+    for name in names:
+        if name in _found_nltk_resources:
+            continue
+        import nltk
+        try:
+            nltk.data.find(NLTK_RESOURCES[name])
+        except LookupError:
+            missing.append(name)
+        else:
+            _found_nltk_resources.add(name)
+    return tuple(missing)
+
+def require_nltk_resources(names=tuple(NLTK_RESOURCES)):
+    # Checks the local data directories only; nothing is downloaded at runtime
+    missing = missing_nltk_resources(tuple(names))
+    if missing:
+        raise LookupError(
+            f"Missing NLTK resources: {', '.join(missing)}. "
+            f"Install them with: python -m nltk.downloader {' '.join(missing)}"
         )
-        self.lemmatizer = WordNetLemmatizer()
+
+def _new_tfidf_vectorizer():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(
+        max_features=500,  # Reduced from 1000
+        stop_words='english',
+        ngram_range=(1, 1),  # Changed from (1,2) to reduce memory usage
+        min_df=10,  # Increased from 5
+        max_df=0.90,  # Slightly reduced
+        dtype=np.float32  # Use float32 instead of float64 to save memory
+    )
+
+def fit_tfidf_counts(tfidf, texts):
+    """Fits an unfitted TfidfVectorizer from term counts gathered in one pass over `texts`.
+
+    Gives the vocabulary_ and idf_ of tfidf.fit(texts), but only keeps the
+    document and total count of every distinct term instead of the whole
+    document-term matrix, so memory does not grow with the number of texts.
+    Ties at the max_features cut go to the alphabetically first term.
+    """
+    analyzer = tfidf.build_analyzer()
+    document_counts = Counter()
+    term_counts = Counter()
+    n_documents = 0
+    for text in texts:
+        terms = analyzer(text)
+        term_counts.update(terms)
+        document_counts.update(set(terms))
+        n_documents += 1
+    if not document_counts:
+        raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+
+    terms = sorted(document_counts)
+    dfs = np.array([document_counts[term] for term in terms], dtype=np.int64)
+    max_df = tfidf.max_df if isinstance(tfidf.max_df, Integral) else tfidf.max_df * n_documents
+    min_df = tfidf.min_df if isinstance(tfidf.min_df, Integral) else tfidf.min_df * n_documents
+    if max_df < min_df:
+        raise ValueError("max_df corresponds to < documents than min_df")
+    mask = (dfs <= max_df) & (dfs >= min_df)
+    if tfidf.max_features is not None and mask.sum() > tfidf.max_features:
+        kept = np.flatnonzero(mask)
+        totals = np.array([term_counts[terms[i]] for i in kept], dtype=np.int64)
+        mask = np.zeros(len(terms), dtype=bool)
+        mask[kept[np.argsort(-totals, kind='stable')[:tfidf.max_features]]] = True
+    if not mask.any():
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+    kept = np.flatnonzero(mask)
+    tfidf.vocabulary_ = {terms[i]: position for position, i in enumerate(kept)}
+    tfidf.fixed_vocabulary_ = False
+    # Same arithmetic and dtype as TfidfTransformer.fit
+    df = dfs[kept].astype(tfidf.dtype if tfidf.dtype in (np.float32, np.float64) else np.float64)
+    df += int(tfidf.smooth_idf)
+    tfidf.idf_ = np.log((n_documents + int(tfidf.smooth_idf)) / df) + 1
+    return tfidf
+
+PIPELINE_MODES = ('default', 'fast')
+
+NON_ALPHA_RE = re.compile(r'[^a-zA-Z\s]')
+WHITESPACE_RE = re.compile(r'\s+')
+TOKEN_RE = re.compile(r'[a-z]+')
+
+# Alphabetic contractions that word_tokenize splits; the fast tokenizer mirrors it
+TOKEN_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na')
+}
+
+@lru_cache(maxsize=None)
+def english_stop_words():
+    require_nltk_resources(('stopwords',))
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('english'))
+
+@lru_cache(maxsize=None)
+def _wordnet_lemmatizer():
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+def fallback_lemma(token):
+    # Tokens missing from the fitted lemma table are lemmatized as nouns
+    if missing_nltk_resources(('wordnet',)):
+        return token
+    return _wordnet_lemma(token)
+
+@lru_cache(maxsize=100000)
+def _wordnet_lemma(token):
+    return _wordnet_lemmatizer().lemmatize(token)
+
+# Number of texts sent to a preprocessing worker per task
+DEFAULT_CHUNK_SIZE = 500
+
+def resolve_n_jobs(n_jobs):
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return os.cpu_count() or 1
+    return max(1, n_jobs)
+
+def _chunked(items, chunk_size):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _load_nltk_resources(names=tuple(NLTK_RESOURCES)):
+    # Touch the lazily loaded NLTK resources so a process pays for them once
+    require_nltk_resources(names)
+    if 'stopwords' in names:
+        english_stop_words()
+    if 'wordnet' in names:
+        _wordnet_lemmatizer().lemmatize('warm')
+    if 'punkt' in names and 'averaged_perceptron_tagger' in names:
+        import nltk
+        nltk.pos_tag(nltk.word_tokenize('warm up'))
+
+# Vectorizer of the current preprocessing worker process
+_worker_vectorizer = None
+
+def _init_worker(mode, lemmas, stop_words):
+    global _worker_vectorizer
+    _worker_vectorizer = JobVectorizer(mode=mode)
+    _worker_vectorizer.lemmas = lemmas
+    _worker_vectorizer.stop_words = stop_words
+    try:
+        _load_nltk_resources(_worker_vectorizer.required_nltk_resources())
+    except LookupError:
+        # Reported per text by the pipeline itself
+        pass
+
+def _worker_preprocess(texts):
+    return _worker_vectorizer._preprocess_chunk(texts)
+
+def _worker_analyze(texts):
+    return _worker_vectorizer._analyze_chunk(texts)
+
+class JobVectorizer:
+    def __init__(self, cache=None, mode='default', model_path=None):
+        if mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode '{mode}', expected one of {PIPELINE_MODES}")
+        # With a model_path the model is loaded on first use or by warm_up()
+        self.model_path = model_path
+        self._vectorizer = None if model_path else _new_tfidf_vectorizer()
+        self._load_lock = threading.Lock()
+        self._version = None
+        # Optional TextCache memoizing preprocess_text by input hash
+        self.cache = cache
+        # 'fast' replaces POS tagging with lookups in tables built at fit time
+        self.mode = mode
+        self.lemmas = {}
+        self.stop_words = None
+        self._cache_namespace = None
     
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            with self._load_lock:
+                if self._vectorizer is None:
+                    self.load_vectorizer(self.model_path)
+        return self._vectorizer
+
+    @vectorizer.setter
+    def vectorizer(self, value):
+        self._vectorizer = value
+
+    @property
+    def lemmatizer(self):
+        return _wordnet_lemmatizer()
+
+    def required_nltk_resources(self):
+        if self.mode == 'fast':
+            # Lemmas come from the fitted table; stopwords may be saved with it
+            return () if self.stop_words is not None else ('stopwords',)
+        return tuple(NLTK_RESOURCES)
+
+    def warm_up(self):
+        """Loads the model and the NLTK resources now instead of on first use.
+
+        Raises LookupError naming any NLTK resource that is not installed.
+        """
+        self.vectorizer
+        _load_nltk_resources(self.required_nltk_resources())
+        if self.mode == 'fast' and missing_nltk_resources(('wordnet',)):
+            logger.warning("WordNet is not installed; words missing from the lemma table are not lemmatized")
+
     def preprocess_text(self, text):
+        """Normalized text for the TF-IDF model, or None if preprocessing failed."""
+        text = str(text)
+        if self.cache is not None:
+            key = self.cache.key(text, self.cache_namespace)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
         try:
-            # Convert to lowercase
-            text = str(text).lower()
-            
-            # Remove special characters and numbers
-            text = re.sub(r'[^a-zA-Z\s]', ' ', text)
-            
-            # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            
-            # Tokenize
-            tokens = word_tokenize(text)
-            
-            # Remove stopwords
-            stop_words = set(stopwords.words('english'))
-            tokens = [token for token in tokens if token not in stop_words]
-            
-            # POS tagging and lemmatization
-            pos_tags = nltk.pos_tag(tokens)
-            lemmatized_tokens = []
-            for token, tag in pos_tags:
-                if tag.startswith('VB'):
-                    lem_token = self.lemmatizer.lemmatize(token, pos='v')
-                elif tag.startswith('NN'):
-                    lem_token = self.lemmatizer.lemmatize(token, pos='n')
-                elif tag.startswith('JJ'):
-                    lem_token = self.lemmatizer.lemmatize(token, pos='a')
-                else:
-                    lem_token = self.lemmatizer.lemmatize(token)
-                lemmatized_tokens.append(lem_token)
-            
-            return ' '.join(lemmatized_tokens)
+            with timer('preprocess'):
+                processed = self._preprocess(text)
         except Exception as e:
-            print(f"Error processing text: {e}")
-            return ''
+            logger.error("Error processing text: %s", e)
+            return None
+        # Failures are not cached so they are retried once resources are available
+        if self.cache is not None:
+            self.cache.put(key, processed)
+        return processed
+
+    def _preprocess(self, text):
+        if self.mode == 'fast':
+            return self._preprocess_fast(text)
+        _, lemmatized_tokens = self._tokenize_and_lemmatize(text)
+        return ' '.join(lemmatized_tokens)
+
+    def _tokenize_and_lemmatize(self, text):
+        require_nltk_resources()
+        from nltk import pos_tag, word_tokenize
+
+        # Convert to lowercase
+        text = text.lower()
+        
+        # Remove special characters and numbers
+        text = NON_ALPHA_RE.sub(' ', text)
+        
+        # Remove extra whitespace
+        text = WHITESPACE_RE.sub(' ', text).strip()
+        
+        # Tokenize
+        tokens = word_tokenize(text)
+        
+        # Remove stopwords
+        stop_words = english_stop_words()
+        tokens = [token for token in tokens if token not in stop_words]
+        
+        # POS tagging and lemmatization
+        pos_tags = pos_tag(tokens)
+        lemmatizer = self.lemmatizer
+        lemmatized_tokens = []
+        for token, tag in pos_tags:
+            if tag.startswith('VB'):
+                lem_token = lemmatizer.lemmatize(token, pos='v')
+            elif tag.startswith('NN'):
+                lem_token = lemmatizer.lemmatize(token, pos='n')
+            elif tag.startswith('JJ'):
+                lem_token = lemmatizer.lemmatize(token, pos='a')
+            else:
+                lem_token = lemmatizer.lemmatize(token)
+            lemmatized_tokens.append(lem_token)
+        
+        return tokens, lemmatized_tokens
+
+    def _preprocess_fast(self, text):
+        stop_words = self.stop_words if self.stop_words is not None else english_stop_words()
+        lemmas = self.lemmas
+        lemmatized_tokens = []
+        for token in TOKEN_RE.findall(text.lower()):
+            for part in TOKEN_SPLITS.get(token, (token,)):
+                if part in stop_words:
+                    continue
+                lemma = lemmas.get(part)
+                lemmatized_tokens.append(lemma if lemma is not None else fallback_lemma(part))
+        return ' '.join(lemmatized_tokens)
+
+    @property
+    def cache_namespace(self):
+        """Distinguishes cached outputs of different pipelines and lemma tables."""
+        if self._cache_namespace is None:
+            if self.mode == 'fast':
+                digest = hashlib.sha1(repr(sorted(self.lemmas.items())).encode('utf-8'))
+                digest.update(repr(sorted(self.stop_words or ())).encode('utf-8'))
+                self._cache_namespace = f"fast:{digest.hexdigest()[:16]}"
+            else:
+                self._cache_namespace = ''
+        return self._cache_namespace
 
     def prepare_combined_text(self, text_parts):
-        combined_text = ' | '.join(filter(None, text_parts))
-        return self.preprocess_text(combined_text)
+        return self.preprocess_text(self.combine_text(text_parts))
+
+    def combine_text(self, text_parts):
+        return ' | '.join(filter(None, text_parts))
 
     def prepare_user_text(self, user):
-        text_parts = [
+        return self.prepare_combined_text(self.user_text_parts(user))
+
+    def user_text_parts(self, user):
+        return [
             ' '.join(user.skills) if user.skills else '',
             ' '.join(user.education) if user.education else '',
             str(user.experience) + ' years experience',
             user.location if user.location else ''
         ]
-        return self.prepare_combined_text(text_parts)
 
     def prepare_job_text(self, job):
-        text_parts = [
+        return self.prepare_combined_text(self.job_text_parts(job))
+
+    def job_text_parts(self, job):
+        return [
             job.title if job.title else '',
             job.description if job.description else '',
             ' '.join(job.required_skills) if job.required_skills else '',
@@ -85,32 +360,239 @@ class JobVectorizer:
             str(job.required_experience) + ' years required',
             job.location if job.location else ''
         ]
-        return self.prepare_combined_text(text_parts)
 
-    def fit(self, jobs):
-        job_texts = [self.prepare_job_text(job) for job in jobs]
-        self.vectorizer.fit(job_texts)
+    def prepare_candidate_text(self, user):
+        return self.prepare_combined_text(self.candidate_text_parts(user))
+
+    def candidate_text_parts(self, user):
+        # Candidates are matched against jobs as if they were job postings
+        return [
+            ' '.join(user.skills) if user.skills else '',
+            ' '.join(user.education) if user.education else '',
+            ' '.join(user.skills) if user.skills else '',
+            user.education[0] if user.education else '',
+            str(user.experience) + ' years required',
+            user.location if user.location else ''
+        ]
+
+    def fit(self, jobs, n_jobs=1, chunk_size=DEFAULT_CHUNK_SIZE, executor=None, progress=None):
+        raw_texts = (self.combine_text(self.job_text_parts(job)) for job in jobs)
+        self.fit_texts(raw_texts, n_jobs=n_jobs, chunk_size=chunk_size, executor=executor, progress=progress)
+
+    def fit_texts(self, raw_texts, n_jobs=1, chunk_size=DEFAULT_CHUNK_SIZE, executor=None, progress=None):
+        """Fits on raw job texts, which may be any iterable including a generator.
+
+        Preprocessing is spread over `n_jobs` worker processes (or `executor`)
+        and the result is identical to the serial path. Texts are counted as
+        they stream in (see fit_tfidf_counts), so memory stays flat however
+        long the corpus is.
+        """
+        # Both pipelines tag the corpus while fitting; a model fitted on failed
+        # texts would be empty, so missing resources stop training up front
+        require_nltk_resources()
+        parallel = dict(n_jobs=n_jobs, chunk_size=chunk_size, executor=executor, progress=progress)
+        if self._vectorizer is None or isinstance(self._vectorizer, MappedTfidf):
+            # Read-only or not yet loaded models are replaced by a fresh one
+            self._vectorizer = _new_tfidf_vectorizer()
+        if self.mode == 'fast':
+            lemma_counts = defaultdict(Counter)
+            fit_tfidf_counts(self.vectorizer, self._lemmatized_texts(raw_texts, lemma_counts, **parallel))
+            self._set_lemma_table(lemma_counts)
+        else:
+            texts = self.preprocess_many(raw_texts, **parallel)
+            fit_tfidf_counts(self.vectorizer, (text for text in texts if text is not None))
+        self._version = None
+
+    def _lemmatized_texts(self, raw_texts, lemma_counts, **parallel):
+        # Runs the tagging pipeline once over the corpus, counting the lemma
+        # every token was given
+        for tokens, lemmatized_tokens in self._run_chunks(
+                self._analyze_chunk, _worker_analyze, raw_texts, **parallel):
+            for token, lemma in zip(tokens, lemmatized_tokens):
+                lemma_counts[token][lemma] += 1
+            yield ' '.join(lemmatized_tokens)
+
+    def _set_lemma_table(self, lemma_counts):
+        # Every token keeps the lemma it was most often given
+        self.lemmas = {token: counts.most_common(1)[0][0] for token, counts in lemma_counts.items()}
+        self.stop_words = english_stop_words()
+        self._cache_namespace = None
+
+    def _analyze_chunk(self, texts):
+        results = []
+        for text in texts:
+            try:
+                results.append(self._tokenize_and_lemmatize(str(text)))
+            except Exception as e:
+                logger.error("Error processing text: %s", e)
+                results.append(([], []))
+        return results
+
+    def _preprocess_chunk(self, texts):
+        return [self.preprocess_text(text) for text in texts]
+
+    def preprocess_many(self, texts, n_jobs=1, chunk_size=DEFAULT_CHUNK_SIZE, executor=None, progress=None):
+        """Preprocesses raw texts in chunks, yielding results in input order.
+
+        `progress`, if given, is called with the number of texts done after
+        every chunk.
+        """
+        return self._run_chunks(
+            self._preprocess_chunk, _worker_preprocess, texts,
+            n_jobs=n_jobs, chunk_size=chunk_size, executor=executor, progress=progress
+        )
+
+    def make_executor(self, n_jobs=-1):
+        """Process pool whose workers hold a copy of this vectorizer's pipeline.
+
+        The pool can be reused across fit/transform calls as long as the
+        pipeline tables do not change in between.
+        """
+        return ProcessPoolExecutor(
+            max_workers=resolve_n_jobs(n_jobs),
+            initializer=_init_worker,
+            initargs=(self.mode, self.lemmas, self.stop_words)
+        )
+
+    def _run_chunks(self, local_func, worker_func, texts, n_jobs=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                    executor=None, progress=None):
+        n_jobs = resolve_n_jobs(n_jobs)
+        done = 0
+        if executor is None and n_jobs == 1:
+            for chunk in _chunked(texts, chunk_size):
+                results = local_func(chunk)
+                done += len(results)
+                if progress:
+                    progress(done)
+                yield from results
+            return
+        
+        owned = executor is None
+        if owned:
+            executor = self.make_executor(n_jobs)
+        # Keep a bounded number of chunks in flight so generators are consumed lazily
+        max_in_flight = 2 * (n_jobs if owned else resolve_n_jobs(-1))
+        pending = deque()
+        try:
+            for chunk in _chunked(texts, chunk_size):
+                pending.append(executor.submit(worker_func, chunk))
+                if len(pending) >= max_in_flight:
+                    results = pending.popleft().result()
+                    done += len(results)
+                    if progress:
+                        progress(done)
+                    yield from results
+            while pending:
+                results = pending.popleft().result()
+                done += len(results)
+                if progress:
+                    progress(done)
+                yield from results
+        finally:
+            if owned:
+                executor.shutdown(cancel_futures=True)
     
     def transform_user(self, user):
-        user_text = self.prepare_user_text(user)
-        return self.vectorizer.transform([user_text]).toarray()[0]
+        return self.transform_users([user], dense=True)[0]
     
     def transform_job(self, job):
-        job_text = self.prepare_job_text(job)
-        return self.vectorizer.transform([job_text]).toarray()[0]
+        return self.transform_jobs([job], dense=True)[0]
+
+    def transform_candidate(self, user):
+        return self.transform_candidates([user], dense=True)[0]
+
+    def transform_users(self, users, dense=False, return_failed=False, **parallel):
+        raw_texts = [self.combine_text(self.user_text_parts(user)) for user in users]
+        return self._transform_raw(raw_texts, dense, return_failed, **parallel)
+
+    def transform_jobs(self, jobs, dense=False, return_failed=False, **parallel):
+        raw_texts = [self.combine_text(self.job_text_parts(job)) for job in jobs]
+        return self._transform_raw(raw_texts, dense, return_failed, **parallel)
+
+    def transform_candidates(self, users, dense=False, return_failed=False, **parallel):
+        raw_texts = [self.combine_text(self.candidate_text_parts(user)) for user in users]
+        return self._transform_raw(raw_texts, dense, return_failed, **parallel)
+
+    def _transform_raw(self, raw_texts, dense, return_failed, **parallel):
+        # With `return_failed`, also returns the positions of texts that failed
+        # preprocessing; their rows are empty and must not be stored
+        texts = list(self.preprocess_many(raw_texts, **parallel))
+        matrix = self.transform_texts(texts, dense)
+        failed = [i for i, text in enumerate(texts) if text is None]
+        if failed:
+            logger.warning("%d of %d texts failed preprocessing and were vectorized as empty",
+                           len(failed), len(texts))
+        if return_failed:
+            return matrix, failed
+        return matrix
+
+    def transform_texts(self, texts, dense=False):
+        """Vectorizes preprocessed texts with a single transform call.
+
+        Texts that failed preprocessing (None) give empty rows. Returns a
+        float32 CSR matrix, or a dense float32 array when `dense` is set.
+        """
+        texts = ['' if text is None else text for text in texts]
+        if texts:
+            with timer('vectorize'):
+                matrix = self.vectorizer.transform(texts).tocsr().astype(np.float32, copy=False)
+        else:
+            matrix = sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+        return matrix.toarray() if dense else matrix
+
+    @property
+    def n_features(self):
+        return len(self.vectorizer.idf_)
+
+    @property
+    def version(self):
+        """Short fingerprint of the fitted vocabulary, idf weights and pipeline."""
+        if self._version is None and self.is_fitted():
+            # Same fingerprint whether the model is pickled or memory-mapped
+            terms = [str(term) for term in self.vectorizer.get_feature_names_out()]
+            digest = hashlib.sha1('\n'.join(terms).encode('utf-8'))
+            digest.update(np.asarray(self.vectorizer.idf_, dtype=np.float32).tobytes())
+            if self.mode == 'fast':
+                digest.update(self.cache_namespace.encode('utf-8'))
+            self._version = digest.hexdigest()[:16]
+        return self._version
     
     def save_vectorizer(self, path):
+        model = {
+            'vectorizer': self.vectorizer,
+            'lemmas': self.lemmas,
+            'stop_words': sorted(self.stop_words) if self.stop_words is not None else None
+        }
         with open(path, 'wb') as f:
-            pickle.dump(self.vectorizer, f)
+            pickle.dump(model, f)
+    
+    def save_artifact(self, directory):
+        """Saves the model in the memory-mappable artifact format (see app.model_artifact)."""
+        return save_artifact(directory, self.vectorizer, self.lemmas, self.stop_words)
     
     def load_vectorizer(self, path):
+        self._version = None
+        self._cache_namespace = None
+        if is_artifact(path):
+            self.vectorizer, self.lemmas, self.stop_words = load_artifact(path)
+            return
         with open(path, 'rb') as f:
-            self.vectorizer = pickle.load(f)
+            model = pickle.load(f)
+        # Older models are a bare TfidfVectorizer without lemma tables
+        if isinstance(model, dict):
+            self.vectorizer = model['vectorizer']
+            self.lemmas = model.get('lemmas') or {}
+            stop_words = model.get('stop_words')
+            self.stop_words = frozenset(stop_words) if stop_words is not None else None
+        else:
+            self.vectorizer = model
+            self.lemmas = {}
+            self.stop_words = None
 
     def is_fitted(self):
         try:
-            # Check if vocabulary exists
-            _ = self.vectorizer.vocabulary_
+            # Check if idf weights exist
+            _ = self.vectorizer.idf_
             return True
         except:
             return False
\ No newline at end of file
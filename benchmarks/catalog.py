@@ -0,0 +1,81 @@
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Job, User
+from app.search_index import ensure_search_index
+
+SKILLS = [
+    "python", "java", "sql", "django", "flask", "react", "javascript", "aws", "docker", "kubernetes",
+    "machine learning", "data analysis", "excel", "communication", "project management", "accounting",
+    "sales", "marketing", "customer service", "leadership"
+]
+ROLES = [
+    "Developer", "Data Scientist", "Engineer", "Analyst", "Accountant", "Sales Representative",
+    "Project Manager", "Marketing Specialist", "Support Agent", "Designer"
+]
+SENIORITY = ["Junior", "Senior", "Lead", "Principal", "Associate"]
+WORDS = [
+    "build", "team", "customer", "data", "design", "develop", "service", "system", "analysis", "report",
+    "support", "manage", "product", "business", "application", "platform", "experience", "growth",
+    "quality", "process", "client", "software", "operations", "strategy", "research", "training",
+    "performance", "security", "cloud", "pipeline", "budget", "account", "market", "deliver", "improve"
+]
+EDUCATION = ["high school", "bachelor", "master", "phd"]
+LOCATIONS = ["New York", "Boston", "San Francisco", "Chicago", "Austin", "Seattle", "Remote"]
+
+# Rows inserted per statement when filling a database
+INSERT_BATCH_SIZE = 10000
+
+
+def _pick(rng, values, low, high):
+    return [values[i] for i in rng.choice(len(values), size=int(rng.integers(low, high + 1)), replace=False)]
+
+
+def make_jobs(n, seed=0):
+    """`n` synthetic jobs with ids 1..n, the same for the same seed."""
+    rng = np.random.default_rng(seed)
+    return [
+        Job(id=i, title=f"{SENIORITY[rng.integers(len(SENIORITY))]} {ROLES[rng.integers(len(ROLES))]}",
+            description=' '.join(_pick(rng, WORDS, 15, 30)), required_skills=_pick(rng, SKILLS, 1, 3),
+            required_experience=float(rng.integers(0, 8)), required_education=EDUCATION[rng.integers(3)],
+            location=LOCATIONS[rng.integers(len(LOCATIONS))], remote_ok=bool(rng.random() < 0.3))
+        for i in range(1, n + 1)
+    ]
+
+
+def make_users(n, seed=1):
+    """`n` synthetic users (candidates) with ids 1..n, the same for the same seed."""
+    rng = np.random.default_rng(seed)
+    return [
+        User(id=i, skills=_pick(rng, SKILLS, 2, 6), experience=float(rng.integers(0, 15)),
+             education=[f"{EDUCATION[rng.integers(len(EDUCATION))]}, State University"],
+             location=LOCATIONS[rng.integers(len(LOCATIONS))], remote_ok=bool(rng.random() < 0.5))
+        for i in range(1, n + 1)
+    ]
+
+
+def vectorize(vector_store, jobs, users):
+    """Stores current vectors on the objects, so rankings do not vectorize them on first use."""
+    vector_store.refresh(jobs, ['job'])
+    vector_store.refresh(users, ['user', 'candidate'])
+
+
+def _rows(objs):
+    columns = [column.key for column in type(objs[0]).__table__.columns]
+    return [{key: getattr(obj, key) for key in columns} for obj in objs]
+
+
+def create_database(url, jobs, users):
+    """A database at `url` holding `jobs` and `users`, with the full-text index; returns its engine."""
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        for model, objs in ((Job, jobs), (User, users)):
+            for start in range(0, len(objs), INSERT_BATCH_SIZE):
+                db.execute(insert(model), _rows(objs[start:start + INSERT_BATCH_SIZE]))
+            db.commit()
+    finally:
+        db.close()
+    return engine
@@ -0,0 +1,96 @@
+import json
+import time
+import tracemalloc
+
+# Metrics compared against the baseline, and whether a higher value is better
+COMPARED_METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "throughput_per_s": True
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of `values` (fraction in [0, 1])."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(call, iterations=50, warmup=3, items=1):
+    """Latency percentiles, throughput and peak traced memory of `call(i)`.
+
+    `call` gets the iteration number, so cases can vary their inputs, and
+    processes `items` units (documents, requests, ...) per call. Peak memory
+    is taken from one extra traced call, so tracing does not slow down the
+    timed ones.
+    """
+    for i in range(warmup):
+        call(i)
+    tracemalloc.start()
+    try:
+        call(warmup)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        call(warmup + 1 + i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    total_s = sum(latencies) / 1000
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": sum(latencies) / iterations,
+        "throughput_per_s": iterations * items / total_s if total_s else None,
+        "peak_memory_bytes": peak
+    }
+
+
+def result_key(result):
+    return f"{result['case']}[{result['size']}]"
+
+
+def compare(results, baseline, threshold=0.2):
+    """Cases of `results` that are more than `threshold` (a fraction) worse than in `baseline`.
+
+    Returns one entry per regressed metric; cases missing from the baseline
+    are not compared.
+    """
+    previous = {result_key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append({
+                    "case": result_key(result),
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": change
+                })
+    return regressions
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
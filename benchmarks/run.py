@@ -0,0 +1,196 @@
+import argparse
+import os
+import platform
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.catalog import make_jobs, make_users, vectorize, create_database, ROLES, WORDS
+from benchmarks.harness import measure, compare, result_key, load_report, save_report
+from app.candidate_recommender import CandidateRecommender
+from app.recommender import JobRecommender
+from app.utils import get_models_path, get_project_root
+from app.vectorizer import JobVectorizer, missing_nltk_resources
+
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_BASELINE = os.path.join(get_project_root(), 'benchmarks', 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(get_project_root(), 'logs', 'benchmark_results.json')
+
+
+class Catalog:
+    """The synthetic jobs and users of one catalog size, built on first use."""
+
+    def __init__(self, size, vectorizer, workdir):
+        self.size = size
+        self.vectorizer = vectorizer
+        self.workdir = workdir
+        self._objects = None
+        self._client = None
+
+    @property
+    def jobs(self):
+        return self.objects[0]
+
+    @property
+    def users(self):
+        return self.objects[1]
+
+    @property
+    def objects(self):
+        if self._objects is None:
+            jobs, users = make_jobs(self.size), make_users(self.size)
+            vectorize(JobRecommender(self.vectorizer).vector_store, jobs, users)
+            self._objects = jobs, users
+        return self._objects
+
+    @property
+    def client(self):
+        """A TestClient of the API over a database holding this catalog."""
+        if self._client is None:
+            from fastapi.testclient import TestClient
+            from sqlalchemy.orm import sessionmaker
+            # The endpoints are measured computing every response, not serving cached ones
+            os.environ.setdefault('RESULT_CACHE', 'off')
+            import app.main as main
+            from app.database import get_db
+
+            engine = create_database(f"sqlite:///{os.path.join(self.workdir, f'catalog_{self.size}.db')}",
+                                     self.jobs, self.users)
+            session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+            def benchmark_db():
+                db = session_factory()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+            main.app.dependency_overrides[get_db] = benchmark_db
+            # The feature store still holds the previous catalog's candidates
+            main.candidate_features.invalidate()
+            self._client = TestClient(main.app)
+        return self._client
+
+
+def _get(client, url):
+    response = client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {url} returned {response.status_code}: {response.text}")
+
+
+def bench_preprocess_text(catalog):
+    texts = [f"{job.title} {job.description}" for job in catalog.jobs]
+    return lambda i: catalog.vectorizer.preprocess_text(texts[i % len(texts)]), "docs"
+
+
+def bench_transform_job(catalog):
+    jobs = catalog.jobs
+    return lambda i: catalog.vectorizer.transform_job(jobs[i % len(jobs)]), "jobs"
+
+
+def bench_job_recommendations(catalog):
+    recommender = JobRecommender(catalog.vectorizer)
+    jobs, users = catalog.jobs, catalog.users
+    return lambda i: recommender.get_recommendations(users[i % len(users)], jobs, top_n=10), "users"
+
+
+def bench_candidate_recommendations(catalog):
+    recommender = CandidateRecommender(catalog.vectorizer)
+    jobs, users = catalog.jobs, catalog.users
+    return lambda i: recommender.get_recommendations(jobs[i % len(jobs)], users, top_n=10), "jobs"
+
+
+# Search terms cycle through role and description words, which catalog jobs contain
+SEARCH_TERMS = [role.split()[-1].lower() for role in ROLES] + WORDS
+
+
+def bench_search_endpoint(catalog):
+    client = catalog.client
+
+    def search(i):
+        _get(client, f"/search?search_text={SEARCH_TERMS[i % len(SEARCH_TERMS)]}&user_id={i % catalog.size + 1}")
+    return search, "requests"
+
+
+def bench_candidates_endpoint(catalog):
+    client = catalog.client
+    return lambda i: _get(client, f"/recommend-candidates?job_id={i % catalog.size + 1}"), "requests"
+
+
+# Each case returns (call(i), unit of one call) for a catalog
+CASES = {
+    "preprocess_text": bench_preprocess_text,
+    "transform_job": bench_transform_job,
+    "job_recommendations": bench_job_recommendations,
+    "candidate_recommendations": bench_candidate_recommendations,
+    "search_endpoint": bench_search_endpoint,
+    "candidates_endpoint": bench_candidates_endpoint
+}
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, cases=None, iterations=50, warmup=3, mode='default', model_path=None):
+    """Runs every case at every catalog size and returns the report."""
+    vectorizer = JobVectorizer(mode=mode, model_path=model_path or get_models_path('job_vectorizer'))
+    missing = missing_nltk_resources()
+    if missing:
+        print(f"Warning: NLTK resources {missing} are missing, so preprocessing fails and vectors are empty; "
+              "results are not representative", file=sys.stderr)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            catalog = Catalog(size, vectorizer, workdir)
+            for name in cases or CASES:
+                call, unit = CASES[name](catalog)
+                result = {"case": name, "size": size, "unit": unit}
+                result.update(measure(call, iterations, warmup))
+                results.append(result)
+                print(f"{result_key(result)}: p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+                      f"p99 {result['p99_ms']:.2f} ms, {result['throughput_per_s']:.1f} {unit}/s, "
+                      f"peak {result['peak_memory_bytes'] / 1024 / 1024:.1f} MB", file=sys.stderr)
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "vectorizer_mode": mode,
+        "vectorizer_version": vectorizer.version,
+        "iterations": iterations,
+        "results": results
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation hot paths on synthetic catalogs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Catalog sizes: jobs and users each (e.g. 1000 10000 100000 1000000)")
+    parser.add_argument('--case', dest='cases', action='append', choices=list(CASES),
+                        help="Case to run (repeatable; default all)")
+    parser.add_argument('--iterations', type=int, default=50, help="Timed calls per case and size")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed calls before measuring")
+    parser.add_argument('--mode', choices=['default', 'fast'], default='default', help="Vectorizer pipeline mode")
+    parser.add_argument('--model', dest='model_path', help="Vectorizer artifact (default models/job_vectorizer)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="JSON report written here")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Report to compare against, if it exists")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed slowdown before a metric counts as a regression (0.2 = 20%%)")
+    parser.add_argument('--update-baseline', action='store_true', help="Save this run as the baseline")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run_benchmarks(args.sizes, args.cases, args.iterations, args.warmup, args.mode, args.model_path)
+    regressions = []
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        regressions = compare(report["results"], load_report(args.baseline), args.threshold)
+        report.update({"baseline": args.baseline, "threshold": args.threshold, "regressions": regressions})
+        for regression in regressions:
+            print(f"REGRESSION {regression['case']} {regression['metric']}: {regression['baseline']:.3f} -> "
+                  f"{regression['current']:.3f} ({regression['change']:+.0%})", file=sys.stderr)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    save_report(report, args.output)
+    if args.update_baseline:
+        save_report(report, args.baseline)
+    sys.exit(1 if regressions else 0)
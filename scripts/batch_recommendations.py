@@ -0,0 +1,74 @@
+import argparse
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.batch import recommend_batch, ndjson_lines, DEFAULT_MEMORY_BUDGET, DEFAULT_USER_TILE
+from app.database import SessionLocal
+from app.utils import get_models_path
+from app.vector_store import VectorStore
+from app.vectorizer import JobVectorizer
+
+def read_ids(values=None, path=None):
+    ids = []
+    for value in values or ():
+        ids.extend(int(part) for part in value.split(',') if part.strip())
+    if path:
+        with open(path) as f:
+            ids.extend(int(line) for line in f if line.strip())
+    return ids
+
+def batch_recommendations(output, user_ids=None, top_k=10, job_ids=None, search_text=None,
+                          memory_budget=DEFAULT_MEMORY_BUDGET, user_tile=DEFAULT_USER_TILE, model_path=None):
+    """Writes the top `top_k` jobs of every user (or of `user_ids`) to `output` as NDJSON."""
+    vectorizer = JobVectorizer(model_path=model_path or get_models_path('job_vectorizer'))
+    store = VectorStore(vectorizer)
+    db = SessionLocal()
+    start = time.perf_counter()
+    users = 0
+    try:
+        results = recommend_batch(db, store, user_ids, top_k, job_ids, search_text, memory_budget, user_tile)
+        for line in ndjson_lines(results):
+            output.write(line)
+            users += 1
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"Recommended jobs for {users} users in {elapsed:.1f} s ({users / max(elapsed, 1e-9):.0f} users/s)",
+          file=sys.stderr)
+    return users
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Top jobs for many users at once, as NDJSON (e.g. for email digests)")
+    parser.add_argument('--user-ids', action='append', help="Comma-separated user ids (repeatable; default all users)")
+    parser.add_argument('--users-file', help="File with one user id per line")
+    parser.add_argument('--job-ids', action='append', help="Only rank these comma-separated job ids")
+    parser.add_argument('--search-text', help="Only rank jobs matching this full-text query")
+    parser.add_argument('--top-k', type=int, default=10, help="Jobs per user")
+    parser.add_argument('--memory-budget-mb', type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        help="Memory the score tiles may use")
+    parser.add_argument('--user-tile', type=int, default=DEFAULT_USER_TILE, help="Users scored together")
+    parser.add_argument('--model', dest='model_path', help="Vectorizer artifact (default models/job_vectorizer)")
+    parser.add_argument('--output', default='-', help="Output file (default stdout)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    user_ids = read_ids(args.user_ids, args.users_file) if args.user_ids or args.users_file else None
+    job_ids = read_ids(args.job_ids) if args.job_ids else None
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        batch_recommendations(
+            output,
+            user_ids=user_ids,
+            top_k=args.top_k,
+            job_ids=job_ids,
+            search_text=args.search_text,
+            memory_budget=args.memory_budget_mb * 1024 * 1024,
+            user_tile=args.user_tile,
+            model_path=args.model_path
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
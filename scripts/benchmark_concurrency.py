@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.utils import get_project_root
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+async def timed_get(client, url, latencies):
+    start = time.perf_counter()
+    response = await client.get(url)
+    latencies.append((time.perf_counter() - start) * 1000)
+    return response.status_code
+
+async def run_load(app, paths, requests, concurrency, health_interval):
+    """Sends `requests` GETs with `concurrency` in flight while polling /health."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        request_latencies = []
+        health_latencies = []
+        statuses = []
+        queue = asyncio.Queue()
+        for i in range(requests):
+            queue.put_nowait(paths[i % len(paths)])
+
+        async def worker():
+            while not queue.empty():
+                statuses.append(await timed_get(client, queue.get_nowait(), request_latencies))
+
+        async def health():
+            while not done.is_set():
+                await timed_get(client, "/health", health_latencies)
+                await asyncio.sleep(health_interval)
+
+        done = asyncio.Event()
+        health_task = asyncio.create_task(health())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await health_task
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for status in statuses if status >= 500),
+        "throughput_rps": requests / elapsed,
+        "latency_p50_ms": percentile(request_latencies, 0.50),
+        "latency_p95_ms": percentile(request_latencies, 0.95),
+        "health_checks": len(health_latencies),
+        "health_p50_ms": percentile(health_latencies, 0.50),
+        "health_max_ms": max(health_latencies) if health_latencies else None
+    }
+
+def benchmark_concurrency(paths, requests=200, concurrency=16, health_interval=0.01, warmup=5):
+    # Imported here so the benchmark measures the app as configured by the environment
+    import app.main as main
+    asyncio.run(run_load(main.app, paths, warmup, 1, health_interval))
+    result = asyncio.run(run_load(main.app, paths, requests, concurrency, health_interval))
+    result.update({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "paths": paths,
+        "executor_threads": getattr(main, "REQUEST_THREADS", None),
+        "recommendation_processes": getattr(main, "RECOMMENDATION_PROCESSES", None)
+    })
+    return result
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure API throughput and /health latency under concurrent load")
+    parser.add_argument('--path', dest='paths', action='append',
+                        help="Request path to load (repeatable; default a search and a candidate recommendation)")
+    parser.add_argument('--requests', type=int, default=200, help="Total requests sent")
+    parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at once")
+    parser.add_argument('--output', default=os.path.join(get_project_root(), 'logs', 'concurrency_benchmark.jsonl'),
+                        help="JSON lines file the result is appended to")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    paths = args.paths or ["/search?search_text=python&user_id=1", "/recommend-candidates?job_id=1"]
+    result = benchmark_concurrency(paths, args.requests, args.concurrency)
+    print(json.dumps(result, indent=2))
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(result) + '\n')
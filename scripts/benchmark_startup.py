@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import get_project_root
+
+# Runs in a fresh interpreter so nothing is already imported or loaded
+CHILD_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+main.vectorizer.load_vectorizer(main.vectorizer.model_path)
+loaded = time.perf_counter()
+error = None
+try:
+    main.vectorizer.warm_up()
+except LookupError as e:
+    error = str(e)
+warmed = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "load_vectorizer_ms": (loaded - imported) * 1000,
+    "nltk_warm_up_ms": (warmed - loaded) * 1000,
+    "warm_up_error": error
+}))
+"""
+
+def measure_once():
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", CHILD_SCRIPT],
+        cwd=get_project_root(), capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def benchmark_startup(repeat=5):
+    runs = [measure_once() for _ in range(repeat)]
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "import_ms": statistics.median(run["import_ms"] for run in runs),
+        "load_vectorizer_ms": statistics.median(run["load_vectorizer_ms"] for run in runs),
+        "nltk_warm_up_ms": statistics.median(run["nltk_warm_up_ms"] for run in runs),
+        "warm_up_error": runs[-1]["warm_up_error"]
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure app.main import and model load time")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters to average over")
+    parser.add_argument('--output', default=os.path.join(get_project_root(), 'logs', 'startup_benchmark.jsonl'),
+                        help="JSON lines file the result is appended to")
+    parser.add_argument('--max-import-ms', type=float, help="Exit with an error above this import time")
+    parser.add_argument('--max-load-ms', type=float, help="Exit with an error above this model load time")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = benchmark_startup(args.repeat)
+    print(json.dumps(result, indent=2))
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(result) + '\n')
+
+    if args.max_import_ms is not None and result["import_ms"] > args.max_import_ms:
+        sys.exit(f"import app.main took {result['import_ms']:.0f} ms (limit {args.max_import_ms:.0f} ms)")
+    if args.max_load_ms is not None and result["load_vectorizer_ms"] > args.max_load_ms:
+        sys.exit(f"load_vectorizer took {result['load_vectorizer_ms']:.0f} ms (limit {args.max_load_ms:.0f} ms)")
@@ -0,0 +1,114 @@
+import argparse
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+
+from app.ann_index import IVFIndex, DEFAULT_NPROBE
+from app.database import SessionLocal
+from app.models import Job, User
+from app.ranking import top_k_indices
+from app.utils import get_models_path
+from app.vector_store import VectorStore
+from app.vectorizer import JobVectorizer
+
+JOB_FIELDS = (
+    Job.id, Job.title, Job.description, Job.required_skills, Job.required_experience,
+    Job.required_education, Job.location, Job.tfidf_vector
+)
+USER_FIELDS = (User.id, User.skills, User.education, User.experience, User.location, User.tfidf_vector)
+
+def load_vectors(db, store, fields, kind, batch_size):
+    """Stored vectors of every row (recomputed in memory where stale), in batches."""
+    ids = []
+    matrices = []
+    result = db.execute(select(*fields).order_by(fields[0]).execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        ids.extend(row.id for row in rows)
+        matrices.append(store.get_matrix(rows, kind, write=False))
+    if not matrices:
+        return np.array([], dtype=np.int64), sparse.csr_matrix((0, store.vectorizer.n_features), dtype=np.float32)
+    return np.array(ids, dtype=np.int64), sparse.vstack(matrices, format='csr')
+
+def evaluate_recall(index, job_ids, job_vectors, queries, k, nprobes):
+    """Mean recall@k and query time of the index against exact search, per nprobe."""
+    exact = []
+    for query in queries:
+        scores = job_vectors @ query.toarray().ravel()
+        exact.append(set(job_ids[top_k_indices(scores, k)].tolist()))
+    results = {}
+    for nprobe in nprobes:
+        start = time.perf_counter()
+        found = [set(index.search(query, k, nprobe)[0].tolist()) for query in queries]
+        elapsed_ms = (time.perf_counter() - start) * 1000 / max(len(queries), 1)
+        recall = np.mean([len(f & e) / max(len(e), 1) for f, e in zip(found, exact)])
+        results[nprobe] = (recall, elapsed_ms)
+    return results
+
+def build_ann_index(output=None, model_path=None, n_lists=None, n_iter=10, train_size=100000,
+                    nprobe=DEFAULT_NPROBE, batch_size=10000, eval_queries=100, k=100, seed=0):
+    """Builds the job ANN index from the vectors stored in the database."""
+    output = output or get_models_path('job_ann_index')
+    vectorizer = JobVectorizer(model_path=model_path or get_models_path('job_vectorizer'))
+    store = VectorStore(vectorizer)
+
+    db = SessionLocal()
+    try:
+        job_ids, job_vectors = load_vectors(db, store, JOB_FIELDS, 'job', batch_size)
+        _, user_vectors = load_vectors(db, store, USER_FIELDS, 'user', batch_size)
+    finally:
+        db.close()
+    print(f"Loaded {len(job_ids)} job vectors")
+
+    start = time.perf_counter()
+    index = IVFIndex.build(job_ids, job_vectors, n_lists=n_lists, n_iter=n_iter, train_size=train_size,
+                           seed=seed, version=vectorizer.version, nprobe=nprobe)
+    print(f"Built {index.n_lists} lists in {time.perf_counter() - start:.1f} s")
+    index.save(output)
+
+    start = time.perf_counter()
+    loaded = IVFIndex.load(output)
+    print(f"Saved to {output}; loads in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Users are the real queries; fall back to jobs when there are none
+    queries = user_vectors if user_vectors.shape[0] else job_vectors
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(queries.shape[0], min(eval_queries, queries.shape[0]), replace=False)
+    nprobes = sorted({min(p, index.n_lists) for p in (1, max(1, nprobe // 2), nprobe, nprobe * 2, index.n_lists)})
+    results = evaluate_recall(loaded, job_ids, job_vectors, [queries[i] for i in sample], k, nprobes)
+    for probes, (recall, elapsed_ms) in results.items():
+        print(f"nprobe={probes}: recall@{k} {recall:.3f}, {elapsed_ms:.2f} ms/query")
+    return loaded
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the approximate nearest-neighbour index over job vectors")
+    parser.add_argument('--output', help="Index directory (default models/job_ann_index)")
+    parser.add_argument('--model', dest='model_path', help="Vectorizer artifact (default models/job_vectorizer)")
+    parser.add_argument('--n-lists', type=int, help="Inverted lists (default sqrt of the job count)")
+    parser.add_argument('--n-iter', type=int, default=10, help="k-means iterations")
+    parser.add_argument('--train-size', type=int, default=100000, help="Jobs sampled to train the centroids")
+    parser.add_argument('--nprobe', type=int, default=DEFAULT_NPROBE, help="Lists searched per query by default")
+    parser.add_argument('--batch-size', type=int, default=10000, help="Rows read from the database per batch")
+    parser.add_argument('--eval-queries', type=int, default=100, help="Queries used to measure recall")
+    parser.add_argument('--k', type=int, default=100, help="Neighbours compared when measuring recall")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    build_ann_index(
+        output=args.output,
+        model_path=args.model_path,
+        n_lists=args.n_lists,
+        n_iter=args.n_iter,
+        train_size=args.train_size,
+        nprobe=args.nprobe,
+        batch_size=args.batch_size,
+        eval_queries=args.eval_queries,
+        k=args.k,
+        seed=args.seed
+    )
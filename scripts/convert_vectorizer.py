@@ -0,0 +1,55 @@
+import argparse
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.vectorizer import JobVectorizer
+from app.model_artifact import load_artifact
+from app.utils import get_models_path
+
+SAMPLE_TEXTS = [
+    "senior python developer django postgresql",
+    "machine learning engineer tensorflow deep learning",
+    "java backend developer microservice kubernetes",
+    ""
+]
+
+def convert_vectorizer(pickle_path=None, artifact_dir=None):
+    """Converts a pickled vectorizer into the memory-mappable artifact format."""
+    pickle_path = pickle_path or get_models_path('job_vectorizer.pkl')
+    artifact_dir = artifact_dir or get_models_path('job_vectorizer')
+
+    vectorizer = JobVectorizer()
+    vectorizer.load_vectorizer(pickle_path)
+    manifest = vectorizer.save_artifact(artifact_dir)
+
+    # Reload with checksum verification and compare against the pickled model
+    start = time.perf_counter()
+    mapped = JobVectorizer(model_path=artifact_dir)
+    mapped.is_fitted()
+    load_ms = (time.perf_counter() - start) * 1000
+    load_artifact(artifact_dir, verify=True)
+    if mapped.version != vectorizer.version:
+        raise ValueError("Converted artifact has a different version than the pickle")
+    expected = vectorizer.transform_texts(SAMPLE_TEXTS, dense=True)
+    actual = mapped.transform_texts(SAMPLE_TEXTS, dense=True)
+    if not np.allclose(expected, actual, atol=1e-6):
+        raise ValueError("Converted artifact produces different vectors than the pickle")
+
+    print(f"Converted {pickle_path} -> {artifact_dir}")
+    print(f"{manifest['n_features']} features, version {mapped.version}, checksum {manifest['checksum'][:16]}")
+    print(f"Artifact loads in {load_ms:.1f} ms")
+    return manifest
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert a pickled vectorizer to the artifact format")
+    parser.add_argument('--input', dest='pickle_path', help="Pickled vectorizer (default models/job_vectorizer.pkl)")
+    parser.add_argument('--output', dest='artifact_dir', help="Artifact directory (default models/job_vectorizer)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    convert_vectorizer(args.pickle_path, args.artifact_dir)
@@ -0,0 +1,66 @@
+import argparse
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.batch import DEFAULT_MEMORY_BUDGET, DEFAULT_USER_TILE
+from app.candidate_recommender import CandidateRecommender
+from app.database import SessionLocal, engine
+from app.materialized import (
+    build_job_recommendations, build_candidate_recommendations, JOBS, CANDIDATES, DEFAULT_TOP_K, WRITE_BATCH_SIZE
+)
+import app.models as models
+from app.utils import get_models_path
+from app.vector_store import VectorStore
+from app.vectorizer import JobVectorizer
+
+def materialize(kinds, top_k=DEFAULT_TOP_K, memory_budget=DEFAULT_MEMORY_BUDGET, user_tile=DEFAULT_USER_TILE,
+                chunk_size=10000, write_batch=WRITE_BATCH_SIZE, model_path=None, max_jobs=None):
+    """Builds a new generation of each kind of materialized ranking and swaps it in."""
+    models.Base.metadata.create_all(bind=engine)
+    vectorizer = JobVectorizer(model_path=model_path or get_models_path('job_vectorizer'))
+    db = SessionLocal()
+    try:
+        for kind in kinds:
+            start = time.perf_counter()
+            if kind == JOBS:
+                generation, rows = build_job_recommendations(
+                    db, VectorStore(vectorizer), top_k, memory_budget, user_tile, write_batch, max_jobs
+                )
+            else:
+                generation, rows = build_candidate_recommendations(
+                    db, CandidateRecommender(vectorizer), top_k, chunk_size, write_batch
+                )
+            print(f"Materialized {kind} generation {generation}: {rows} rows in "
+                  f"{time.perf_counter() - start:.1f} s", file=sys.stderr)
+    finally:
+        db.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute top-K recommendations for serving (run from cron)")
+    parser.add_argument('--kind', choices=[JOBS, CANDIDATES, 'all'], default='all',
+                        help="Jobs per user, candidates per job, or both")
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help="Ranks kept per user or job")
+    parser.add_argument('--memory-budget-mb', type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        help="Memory the job score tiles may use")
+    parser.add_argument('--user-tile', type=int, default=DEFAULT_USER_TILE, help="Users scored together")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Candidates scored per chunk")
+    parser.add_argument('--write-batch', type=int, default=WRITE_BATCH_SIZE, help="Rows inserted per commit")
+    parser.add_argument('--max-jobs', type=int, default=int(os.getenv('SEARCH_MAX_CANDIDATES', '2000')),
+                        help="Jobs ranked per user, the first by id (default SEARCH_MAX_CANDIDATES, as /search)")
+    parser.add_argument('--model', dest='model_path', help="Vectorizer artifact (default models/job_vectorizer)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    materialize(
+        [JOBS, CANDIDATES] if args.kind == 'all' else [args.kind],
+        top_k=args.top_k,
+        memory_budget=args.memory_budget_mb * 1024 * 1024,
+        user_tile=args.user_tile,
+        chunk_size=args.chunk_size,
+        write_batch=args.write_batch,
+        model_path=args.model_path,
+        max_jobs=args.max_jobs
+    )
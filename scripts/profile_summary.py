@@ -0,0 +1,58 @@
+import argparse
+import glob
+import json
+import os
+import pstats
+import sys
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.profiling import DEFAULT_DIRECTORY, read_collapsed, hot_functions
+
+def profile_stems(directory, name=None):
+    stems = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(path) as f:
+            details = json.load(f)
+        if name is None or details.get("name") == name:
+            stems.append(os.path.splitext(path)[0])
+    return stems
+
+def summarize(directory=DEFAULT_DIRECTORY, name=None, top=20, sort='tottime', output=None):
+    """Prints the hottest functions across the saved profiles (optionally of one endpoint)."""
+    output = output or sys.stdout
+    stems = profile_stems(directory, name)
+    if not stems:
+        print(f"No profiles in {directory}", file=output)
+        return
+    print(f"{len(stems)} profiles in {directory}", file=output)
+
+    stacks = Counter()
+    for stem in stems:
+        if os.path.exists(stem + '.collapsed'):
+            stacks.update(read_collapsed(stem + '.collapsed'))
+    samples = sum(stacks.values())
+    if samples:
+        print(f"\nStack samples ({samples} total), by self time:", file=output)
+        print(f"{'self %':>7} {'total %':>8}  function", file=output)
+        for function, own, total in hot_functions(stacks, top):
+            print(f"{100 * own / samples:7.1f} {100 * total / samples:8.1f}  {function}", file=output)
+
+    stats_files = [stem + '.pstats' for stem in stems if os.path.exists(stem + '.pstats')]
+    if stats_files:
+        print(f"\ncProfile ({len(stats_files)} profiles), by {sort}:", file=output)
+        stats = pstats.Stats(*stats_files, stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Summarize the hot functions of saved request profiles")
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY, help="Profiles directory (default logs/profiles)")
+    parser.add_argument('--endpoint', dest='name', help="Only profiles of this path, e.g. /search")
+    parser.add_argument('--top', type=int, default=20, help="Functions listed")
+    parser.add_argument('--sort', default='tottime', choices=['tottime', 'cumulative', 'ncalls'],
+                        help="cProfile sort order")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    summarize(args.directory, args.name, args.top, args.sort)
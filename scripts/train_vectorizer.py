@@ -1,44 +1,150 @@
-import pandas as pd
+import argparse
+import random
 import sys
 import os
+import time
+from collections import namedtuple
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import pandas as pd
+
 from app.vectorizer import JobVectorizer
 from app.utils import get_data_path, get_models_path
 
-def train_vectorizer():
-    # Load the LinkedIn jobs dataset
-    df = pd.read_csv(get_data_path('linkedin_jobs.csv'))
-    
-    # Select relevant columns and clean data
-    df_clean = df[['title', 'description']].dropna(subset=['description'])
-    
-    # Take a random sample to reduce memory usage
-    sample_size = 50000  # Adjust this number based on your memory constraints
-    df_sample = df_clean.sample(n=min(sample_size, len(df_clean)), random_state=42)
-    
-    # Create mock jobs
-    class MockJob:
-        def __init__(self, title, description):
-            self.title = title
-            self.description = description
-            self.required_skills = []
-            self.required_experience = 0
-            self.required_education = ''
-            self.location = ''
-    
-    # Convert DataFrame rows to MockJob objects
-    mock_jobs = [MockJob(row['title'], row['description']) for _, row in df_sample.iterrows()]
-    
-    print(f"Training vectorizer with {len(mock_jobs)} job descriptions...")
-    
-    # Initialize and train vectorizer
-    vectorizer = JobVectorizer()
-    vectorizer.fit(mock_jobs)
-    
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Rows read from the CSV; only title and description are known
+CsvJob = namedtuple('CsvJob', [
+    'title', 'description', 'required_skills', 'required_experience',
+    'required_education', 'location'
+])
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def iter_csv_jobs(csv_path, chunk_size):
+    """Streams jobs with a description from the CSV without loading it whole."""
+    reader = pd.read_csv(csv_path, usecols=['title', 'description'], chunksize=chunk_size)
+    for chunk in reader:
+        chunk = chunk.dropna(subset=['description'])
+        for title, description in zip(chunk['title'], chunk['description']):
+            yield CsvJob(
+                title=title if isinstance(title, str) else '',
+                description=description,
+                required_skills=[],
+                required_experience=0,
+                required_education='',
+                location=''
+            )
+
+def reservoir_sample(items, size, seed):
+    """Uniform sample of `size` items from a stream of unknown length (Algorithm R)."""
+    rng = random.Random(seed)
+    sample = []
+    for seen, item in enumerate(items):
+        if seen < size:
+            sample.append(item)
+        else:
+            slot = rng.randint(0, seen)
+            if slot < size:
+                sample[slot] = item
+    return sample
+
+def with_progress(items, progress):
+    for done, item in enumerate(items, 1):
+        progress(done)
+        yield item
+
+class ProgressReporter:
+    def __init__(self, label, every):
+        self.label = label
+        self.every = every
+        self.start = time.perf_counter()
+        self.done = 0
+        self.last_reported = 0
+
+    def __call__(self, done):
+        self.done = done
+        if done - self.last_reported < self.every:
+            return
+        self.last_reported = done
+        self.report(done)
+
+    def report(self, done):
+        elapsed = time.perf_counter() - self.start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        peak = peak_rss_mb()
+        peak_text = f", peak RSS {peak:.0f} MB" if peak is not None else ''
+        print(f"{self.label}: {done} rows, {rate:.0f} rows/sec{peak_text}")
+
+def train_vectorizer(csv_path=None, model_path=None, sample_size=50000, chunk_size=10000,
+                     n_jobs=1, mode='default', seed=42, artifact_dir=None, write_artifact=True):
+    """Trains the vectorizer on the LinkedIn jobs CSV.
+
+    With `sample_size` the corpus is reservoir-sampled while streaming, so
+    memory is bounded by the sample. With `sample_size=None` every row is
+    streamed straight into fitting, which keeps per-term counts rather than
+    a document-term matrix, so peak memory does not grow with the corpus. Besides the pickle, the model is written as the
+    memory-mapped artifact the API loads, unless `write_artifact` is off.
+    """
+    csv_path = csv_path or get_data_path('Linkedin_jobs.csv')
+    model_path = model_path or get_models_path('job_vectorizer.pkl')
+    artifact_dir = artifact_dir or get_models_path('job_vectorizer')
+    vectorizer = JobVectorizer(mode=mode)
+
+    jobs = iter_csv_jobs(csv_path, chunk_size)
+    if sample_size:
+        jobs = reservoir_sample(with_progress(jobs, ProgressReporter('Reading', chunk_size * 10)), sample_size, seed)
+        print(f"Training vectorizer with {len(jobs)} job descriptions...")
+    else:
+        print("Training vectorizer on the full corpus...")
+
+    progress = ProgressReporter('Preprocessing', chunk_size)
+    vectorizer.fit(jobs, n_jobs=n_jobs, progress=progress)
+    if progress.done != progress.last_reported:
+        progress.report(progress.done)
+
     # Save the trained vectorizer
-    vectorizer.save_vectorizer(get_models_path('job_vectorizer.pkl'))
+    vectorizer.save_vectorizer(model_path)
     print(f"Vectorizer trained and saved to {model_path}")
+    if write_artifact:
+        vectorizer.save_artifact(artifact_dir)
+        print(f"Memory-mapped artifact written to {artifact_dir}")
+    return vectorizer
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the job vectorizer from the LinkedIn CSV")
+    parser.add_argument('--csv', dest='csv_path', help="Path to the jobs CSV")
+    parser.add_argument('--output', dest='model_path', help="Where to save the trained model")
+    parser.add_argument('--artifact-dir', help="Where to write the memory-mapped artifact the API loads")
+    parser.add_argument('--no-artifact', action='store_true', help="Only write the pickle")
+    parser.add_argument('--sample-size', type=int, default=50000,
+                        help="Reservoir sample size; 0 streams the full corpus")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="CSV rows read per chunk")
+    parser.add_argument('--n-jobs', type=int, default=1, help="Preprocessing processes (-1 for all cores)")
+    parser.add_argument('--mode', choices=['default', 'fast'], default='default',
+                        help="Text pipeline; 'fast' also builds the lemma lookup table")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    train_vectorizer()
\ No newline at end of file
+    args = parse_args()
+    train_vectorizer(
+        csv_path=args.csv_path,
+        model_path=args.model_path,
+        sample_size=args.sample_size or None,
+        chunk_size=args.chunk_size,
+        n_jobs=args.n_jobs,
+        mode=args.mode,
+        seed=args.seed,
+        artifact_dir=args.artifact_dir,
+        write_artifact=not args.no_artifact
+    )
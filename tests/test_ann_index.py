@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from app.ann_index import IVFIndex, is_ann_index
+from app.ranking import top_k_indices
+from app.vectorizer import missing_nltk_resources
+
+DIM = 200
+
+def clustered_vectors(n, n_clusters=20, seed=0):
+    # Rows drawn around a few sparse topics, like job postings of a few kinds
+    rng = np.random.default_rng(seed)
+    topics = sparse.random(n_clusters, DIM, density=0.05, random_state=seed, dtype=np.float32).toarray()
+    noise = sparse.random(n, DIM, density=0.02, random_state=seed + 1, dtype=np.float32).toarray()
+    rows = topics[rng.integers(0, n_clusters, n)] + 0.3 * noise
+    return sparse.csr_matrix(normalize(rows).astype(np.float32))
+
+@pytest.fixture
+def data():
+    vectors = clustered_vectors(1500)
+    ids = np.arange(1, 1501, dtype=np.int64) * 3
+    return ids, vectors
+
+@pytest.fixture
+def index(data):
+    ids, vectors = data
+    return IVFIndex.build(ids, vectors, n_lists=30, seed=1, version='v1')
+
+def exact(ids, vectors, query, k):
+    scores = vectors @ query.toarray().ravel()
+    return ids[top_k_indices(scores, k)]
+
+def test_probing_every_list_is_exact(index, data):
+    ids, vectors = data
+    query = vectors[7]
+    found, scores = index.search(query, 20, nprobe=index.n_lists)
+    np.testing.assert_array_equal(np.sort(found), np.sort(exact(ids, vectors, query, 20)))
+    assert np.all(np.diff(scores) <= 1e-6)
+
+def test_recall_grows_with_nprobe(index, data):
+    ids, vectors = data
+    queries = clustered_vectors(30, seed=5)
+    recalls = []
+    for nprobe in (1, 4, 12):
+        hits = [len(set(index.search(q, 50, nprobe)[0]) & set(exact(ids, vectors, q, 50))) / 50
+                for q in queries]
+        recalls.append(np.mean(hits))
+    assert recalls[0] <= recalls[1] <= recalls[2]
+    assert recalls[2] > 0.9
+
+def test_add_and_remove(index, data):
+    ids, vectors = data
+    query = vectors[0]
+    nearest = index.search(query, 1, nprobe=index.n_lists)[0][0]
+    index.remove([nearest])
+    assert nearest not in index.search(query, 50, nprobe=index.n_lists)[0]
+    assert len(index) == len(ids) - 1
+
+    index.add([nearest, 99999], sparse.vstack([vectors[0], vectors[1]]))
+    found = index.search(query, 1, nprobe=index.n_lists)[0]
+    assert found[0] in (nearest, 99999)
+    assert len(index) == len(ids) + 1
+
+def test_save_and_load(index, data, tmp_path):
+    ids, vectors = data
+    index.remove([ids[0]])
+    index.add([5], vectors[:1])
+    index.save(tmp_path / 'ann')
+    assert is_ann_index(tmp_path / 'ann')
+
+    loaded = IVFIndex.load(tmp_path / 'ann')
+    assert isinstance(loaded.data, np.memmap)
+    assert loaded.version == 'v1'
+    assert len(loaded) == len(ids)
+    query = vectors[3]
+    np.testing.assert_array_equal(loaded.search(query, 25)[0], index.search(query, 25)[0])
+
+@pytest.mark.skipif(bool(missing_nltk_resources()), reason="NLTK data is not installed")
+def test_hooks_follow_committed_jobs():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.ann_index import install_ann_index_hooks, remove_ann_index_hooks
+    from app.models import Base, Job
+    from app.recommender import JobRecommender
+    from app.utils import get_models_path
+    from app.vector_store import install_vector_hooks, remove_vector_hooks
+    from app.vectorizer import JobVectorizer
+
+    vectorizer = JobVectorizer()
+    vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+    recommender = JobRecommender(vectorizer)
+    n_features = vectorizer.n_features
+    seed_vectors = sparse.csr_matrix(normalize(np.eye(3, n_features, dtype=np.float32)))
+    recommender.ann_index = IVFIndex.build([101, 102, 103], seed_vectors, n_lists=2, version=vectorizer.version)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    vector_hook = install_vector_hooks(recommender.vector_store)
+    ann_hooks = install_ann_index_hooks(recommender.ann_index, recommender.vector_store)
+    try:
+        job = Job(id=1, title="Python Developer", description="Django", required_skills=["python"],
+                  required_experience=1.0, required_education="bachelor", location="Remote", remote_ok=True)
+        db.add(job)
+        db.flush()
+        db.rollback()
+        assert len(recommender.ann_index) == 3
+
+        db.add(job)
+        db.commit()
+        assert len(recommender.ann_index) == 4
+        db.delete(job)
+        db.commit()
+        assert len(recommender.ann_index) == 3
+    finally:
+        remove_ann_index_hooks(ann_hooks)
+        remove_vector_hooks(vector_hook)
+        db.close()
+
+def test_job_with_discarded_vector_is_removed():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.ann_index import install_ann_index_hooks, remove_ann_index_hooks
+    from app.models import Base, Job
+
+    class StubStore:
+        def __init__(self):
+            self.arrays = {}
+
+        def stored_arrays(self, obj, kind):
+            return self.arrays.get(obj.id)
+
+    store = StubStore()
+    index = IVFIndex.build([101, 102], sparse.csr_matrix(normalize(np.eye(2, 4, dtype=np.float32))), n_lists=1)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    hooks = install_ann_index_hooks(index, store)
+    try:
+        store.arrays[1] = (np.array([2], dtype=np.int32), np.array([1.0], dtype=np.float32))
+        job = Job(id=1, title="Python Developer", description="Django", required_skills=["python"],
+                  required_experience=1.0, required_education="bachelor", location="Remote", remote_ok=True)
+        db.add(job)
+        db.commit()
+        assert len(index) == 3
+
+        del store.arrays[1]
+        job.title = "Kotlin Developer"
+        job.tfidf_vector = {"version": "discarded"}
+        db.commit()
+        assert len(index) == 2
+        assert 1 not in index.search(np.eye(1, 4, 2, dtype=np.float32), 3)[0]
+    finally:
+        remove_ann_index_hooks(hooks)
+        db.close()
@@ -4,6 +4,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import sys
 import os
+import json
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -201,6 +202,16 @@ def test_search_jobs_pagination():
     assert len(data["recommendations"]) <= 2
     assert data["pagination"]["page"] == 2
 
+def test_search_jobs_ranked_before_pagination():
+    response = client.get("/search?search_text=python&user_id=1&page_size=10")
+    ranking = [rec["job"]["id"] for rec in response.json()["recommendations"]]
+    paged = []
+    for page in range(1, len(ranking) + 1):
+        response = client.get(f"/search?search_text=python&user_id=1&page={page}&page_size=1")
+        paged.extend(rec["job"]["id"] for rec in response.json()["recommendations"])
+    assert paged == ranking
+    assert response.json()["pagination"]["total_matches"] == len(ranking)
+
 def test_search_jobs_invalid_pagination():
     # Test invalid page number
     response = client.get("/search?search_text=python&user_id=1&page=0")
@@ -263,6 +274,30 @@ def test_recommend_candidates_pagination():
     assert len(data["recommendations"]) <= 2
     assert data["pagination"]["page"] == 2
 
+def test_recommend_candidates_later_pages():
+    db = TestingSessionLocal()
+    try:
+        db.add_all([
+            User(id=10 + i, skills=['python', 'django'], experience=3.0 + i,
+                 education=['bachelor, Computer Science'], location='Boston', remote_ok=True)
+            for i in range(3)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    first = client.get("/recommend-candidates?job_id=1&page=1&page_size=2").json()
+    second = client.get("/recommend-candidates?job_id=1&page=2&page_size=2").json()
+    # User 2 and the three new users meet every hard requirement
+    assert first["pagination"]["total"] == 4
+    assert first["pagination"]["total_pages"] == 2
+    assert len(first["recommendations"]) == 2
+    assert len(second["recommendations"]) == 2
+    ids = [rec["candidate"]["id"] for rec in first["recommendations"] + second["recommendations"]]
+    assert sorted(ids) == [2, 10, 11, 12]
+    scores = [rec["match_score"] for rec in first["recommendations"] + second["recommendations"]]
+    assert scores == sorted(scores, reverse=True)
+
 def test_recommend_candidates_invalid_job(test_job):
     response = client.get("/recommend-candidates?job_id=999")
     assert response.status_code == 404
@@ -282,4 +317,96 @@ def test_recommend_candidates_experience_match(test_job):
     # First candidate should meet experience requirement
     if data["recommendations"]:
         first_candidate = data["recommendations"][0]["candidate"]
-        assert first_candidate["experience"] >= test_job.required_experience
\ No newline at end of file
+        assert first_candidate["experience"] >= test_job.required_experience
+
+
+def test_recommend_candidates_cache_invalidated_by_commits():
+    from app.main import result_cache
+    first = client.get("/recommend-candidates?job_id=1").json()
+    hits = result_cache.hits
+    assert client.get("/recommend-candidates?job_id=1").json() == first
+    assert result_cache.hits == hits + 1
+
+    db = TestingSessionLocal()
+    try:
+        db.add(User(id=20, skills=['python', 'django'], experience=9.0,
+                    education=['master, Computer Science'], location='Boston', remote_ok=True))
+        db.commit()
+    finally:
+        db.close()
+    # A new candidate bumps the users version, so the next request is recomputed
+    updated = client.get("/recommend-candidates?job_id=1").json()
+    assert result_cache.hits == hits + 1
+    assert 20 in [rec["candidate"]["id"] for rec in updated["recommendations"]]
+    assert updated["pagination"]["total"] == first["pagination"]["total"] + 1
+
+def test_search_served_from_materialized_rankings():
+    from app.main import recommender
+    from app.materialized import build_job_recommendations
+    from app.models import MaterializedJobRecommendation
+    live = [
+        rec for page in (1, 2)
+        for rec in client.get(f"/search?search_text=&user_id=2&page={page}&page_size=1").json()["recommendations"]
+    ]
+    db = TestingSessionLocal()
+    try:
+        generation, _ = build_job_recommendations(db, recommender.vector_store, top_k=2)
+        db.query(MaterializedJobRecommendation).filter_by(generation=generation, user_id=1, rank=0) \
+            .update({"match_score": 42.0})
+        db.commit()
+    finally:
+        db.close()
+    data = client.get("/search?search_text=&user_id=1&page_size=2").json()
+    assert data["recommendations"][0]["match_score"] == 42.0
+    # Same ranking as the live path
+    assert client.get("/search?search_text=&user_id=2&page_size=2").json()["recommendations"] == live
+    # Past the materialized top-K the ranking is computed live
+    page = client.get("/search?search_text=&user_id=1&page=2&page_size=2").json()
+    assert len(page["recommendations"]) == 2
+    assert all(rec["match_score"] != 42.0 for rec in page["recommendations"])
+
+def test_metrics_endpoint():
+    client.get("/search?search_text=python&user_id=1")
+    client.get("/search?search_text=python&user_id=999")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'job_recommender_requests_total{endpoint="/search",method="GET",status="404"}' in text
+    assert 'job_recommender_request_duration_seconds_count{endpoint="/search"}' in text
+    assert 'job_recommender_stage_duration_seconds_count{stage="load_user"}' in text
+    assert 'job_recommender_candidate_features ' in text
+
+def test_profiled_request(tmp_path, monkeypatch):
+    import app.main as main
+    from app.profiling import RequestProfiler
+    monkeypatch.setattr(main, "request_profiler", RequestProfiler(token="secret", directory=str(tmp_path)))
+    assert client.get("/recommend-candidates?job_id=1").status_code == 200
+    assert os.listdir(tmp_path) == []
+    # A non-ASCII token is a mismatch, not a server error
+    response = client.get("/recommend-candidates?job_id=1", headers={"X-Profile-Token": "sécret".encode()})
+    assert response.status_code == 200
+    assert os.listdir(tmp_path) == []
+    response = client.get("/recommend-candidates?job_id=1&page_size=5", headers={"X-Profile-Token": "secret"})
+    assert response.status_code == 200
+    names = sorted(os.listdir(tmp_path))
+    assert [os.path.splitext(name)[1] for name in names] == ['.collapsed', '.json']
+    with open(tmp_path / names[1]) as f:
+        assert json.load(f)["query"] == "job_id=1&page_size=5"
+
+def test_batch_recommendations_stream():
+    response = client.post("/recommendations/batch", json={"user_ids": [1, 999, 2], "top_k": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["user_id"] for line in lines] == [1, 999, 2]
+    assert lines[1] == {"user_id": 999, "error": "User not found"}
+    search = client.get("/search?search_text=&user_id=1&page_size=2").json()
+    assert [rec["job_id"] for rec in lines[0]["recommendations"]] == \
+        [rec["job"]["id"] for rec in search["recommendations"]]
+
+def test_batch_recommendations_job_filter_and_validation():
+    response = client.post("/recommendations/batch", json={"user_ids": [1], "job_ids": [2], "top_k": 5})
+    assert [rec["job_id"] for rec in json.loads(response.text)["recommendations"]] == [2]
+    assert client.post("/recommendations/batch", json={"user_ids": []}).status_code == 422
+    assert client.post("/recommendations/batch", json={"user_ids": [1], "top_k": 0}).status_code == 422
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.batch import (
+    BYTES_PER_PAIR, JobColumns, load_jobs, rank_users, recommend_batch, tile_sizes, tile_top_k
+)
+from app.models import Base, User, Job
+from app.ranking import top_k_indices
+from app.recommender import JobRecommender
+from app.vectorizer import JobVectorizer
+from app.utils import get_models_path
+
+LOCATIONS = ["New York", "Boston", None]
+EDUCATION = ["high school", "bachelor", "master", "phd"]
+
+@pytest.fixture
+def vectorizer():
+    vectorizer = JobVectorizer()
+    vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+    return vectorizer
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    rng = np.random.default_rng(0)
+    db.add_all([
+        Job(id=i, title=f"Developer {i}", description="Python and SQL" if i % 2 else "Java services",
+            required_skills=["python"], required_experience=float(rng.integers(0, 6)),
+            required_education=EDUCATION[i % 4], location=LOCATIONS[i % 3], remote_ok=bool(i % 4 == 0))
+        for i in range(1, 31)
+    ])
+    db.add_all([
+        User(id=i, skills=["python", "sql"], experience=float(rng.integers(0, 8)),
+             education=[f"{EDUCATION[i % 4]}, Some University"], location=LOCATIONS[i % 3],
+             remote_ok=bool(i % 2))
+        for i in range(1, 11)
+    ])
+    db.commit()
+    yield db
+    db.close()
+
+@pytest.mark.parametrize("k", [1, 3, 8, 40])
+def test_tile_top_k_matches_top_k_indices(k):
+    rng = np.random.default_rng(1)
+    # Few distinct values, so many ties fall on the cut-off
+    scores = rng.integers(0, 4, size=(6, 25)).astype(np.float64)
+    positions = tile_top_k(scores, k)
+    for row, expected in zip(positions, scores):
+        assert sorted(row.tolist()) == sorted(top_k_indices(expected, k).tolist())
+
+def test_tile_top_k_with_non_finite_and_zero_rows():
+    scores = np.array([
+        [0.5, np.nan, 0.2, np.nan, 0.9, -np.inf],
+        [0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+        [np.nan] * 6
+    ])
+    positions = tile_top_k(scores, 3)
+    assert positions.shape == (3, 3)
+    assert sorted(positions[0].tolist()) == [0, 2, 4]
+    assert sorted(positions[1].tolist()) == [0, 1, 2]
+    assert sorted(positions[2].tolist()) == [0, 1, 2]
+
+def test_tile_sizes_fit_budget():
+    user_tile, job_tile = tile_sizes(100000, memory_budget=64 * 1024 * 1024, user_tile=1024)
+    assert user_tile * job_tile * BYTES_PER_PAIR <= 64 * 1024 * 1024
+    assert tile_sizes(10, memory_budget=64 * 1024 * 1024) == (1024, 10)
+
+def test_rank_users_matches_per_user_scoring():
+    rng = np.random.default_rng(2)
+    n_jobs, n_features = 50, 40
+    job_vectors = sparse.random(n_jobs, n_features, density=0.2, format='csr', dtype=np.float32, random_state=3)
+    user_vectors = sparse.random(7, n_features, density=0.3, format='csr', dtype=np.float32, random_state=4)
+    jobs = [
+        Job(id=100 + i, required_experience=float(rng.integers(0, 6)), required_education=EDUCATION[i % 4],
+            location=LOCATIONS[i % 3], remote_ok=bool(i % 5 == 0))
+        for i in range(n_jobs)
+    ]
+    users = [
+        User(id=i, experience=float(rng.integers(0, 8)), education=[f"{EDUCATION[i % 4]}, X"],
+             location=LOCATIONS[i % 3], remote_ok=bool(i % 2))
+        for i in range(7)
+    ]
+    location_codes = {}
+    columns = JobColumns(
+        ids=np.array([job.id for job in jobs]),
+        vectors=job_vectors,
+        required_experience=np.array([job.required_experience for job in jobs]),
+        required_education=np.array([EDUCATION.index(job.required_education) + 1 for job in jobs], dtype=np.int8),
+        location_code=np.array([location_codes.setdefault(job.location, len(location_codes)) for job in jobs]),
+        remote_ok=np.array([job.remote_ok for job in jobs]),
+        location_codes=location_codes
+    )
+    recommender = JobRecommender(vectorizer=None)
+    for job_tile in (7, 16, n_jobs):
+        rankings = rank_users(users, user_vectors, columns, top_k=10, job_tile=job_tile)
+        for user, user_vector, ranking in zip(users, user_vectors, rankings):
+            similarities = job_vectors @ user_vector.toarray().ravel()
+            scores = recommender.calculate_match_scores(user, jobs, similarities)
+            expected = top_k_indices(scores, 10)
+            assert [job_id for job_id, _, _ in ranking] == [jobs[i].id for i in expected]
+            assert [score for _, score, _ in ranking] == pytest.approx(scores[expected].tolist())
+
+def test_recommend_batch_matches_get_recommendations(db, vectorizer):
+    recommender = JobRecommender(vectorizer)
+    all_jobs = db.query(Job).order_by(Job.id).all()
+    # A tiny budget forces several job tiles per user tile
+    results = dict(recommend_batch(db, recommender.vector_store, [3, 1, 999, 7], top_k=5,
+                                   memory_budget=BYTES_PER_PAIR * 2 * 4, user_tile=2))
+    assert results[999] is None
+    for user_id in (1, 3, 7):
+        expected = recommender.get_recommendations(db.get(User, user_id), all_jobs, top_n=5)
+        assert [job_id for job_id, _, _ in results[user_id]] == [job.id for job, _, _ in expected]
+        assert [score for _, score, _ in results[user_id]] == pytest.approx([score for _, score, _ in expected])
+
+def test_recommend_batch_order_and_job_filter(db, vectorizer):
+    recommender = JobRecommender(vectorizer)
+    results = list(recommend_batch(db, recommender.vector_store, None, top_k=3, job_ids=[2, 4, 6, 500]))
+    assert [user_id for user_id, _ in results] == list(range(1, 11))
+    assert all({job_id for job_id, _, _ in ranking} <= {2, 4, 6} for _, ranking in results)
+    assert load_jobs(db, recommender.vector_store, job_ids=[6, 2]).ids.tolist() == [2, 6]
@@ -0,0 +1,55 @@
+from sqlalchemy.orm import sessionmaker
+from benchmarks.catalog import make_jobs, make_users, create_database
+from benchmarks.harness import percentile, measure, compare
+from benchmarks.run import run_benchmarks
+from app.models import Job, User
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 51
+    assert percentile(values, 0.99) == 100
+    assert percentile([], 0.5) is None
+
+def test_measure_reports_latency_throughput_and_memory():
+    calls = []
+    result = measure(lambda i: calls.append(bytearray(100000)), iterations=10, warmup=2, items=4)
+    # Warm-up, one traced call, then the timed ones
+    assert len(calls) == 13
+    assert result["iterations"] == 10
+    assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+    assert result["throughput_per_s"] > 0
+    assert result["peak_memory_bytes"] >= 100000
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = {"results": [
+        {"case": "a", "size": 10, "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "throughput_per_s": 100.0},
+        {"case": "b", "size": 10, "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "throughput_per_s": 100.0}
+    ]}
+    results = [
+        {"case": "a", "size": 10, "p50_ms": 11.0, "p95_ms": 30.0, "p99_ms": 30.0, "throughput_per_s": 70.0},
+        {"case": "b", "size": 10, "p50_ms": 5.0, "p95_ms": 10.0, "p99_ms": 15.0, "throughput_per_s": 200.0},
+        {"case": "c", "size": 10, "p50_ms": 50.0, "p95_ms": 50.0, "p99_ms": 50.0, "throughput_per_s": 1.0}
+    ]
+    regressions = compare(results, baseline, threshold=0.2)
+    assert [(r["case"], r["metric"]) for r in regressions] == [("a[10]", "p95_ms"), ("a[10]", "throughput_per_s")]
+    assert compare(results, baseline, threshold=0.6) == []
+
+def test_catalog_is_deterministic_and_loads(tmp_path):
+    jobs, users = make_jobs(50), make_users(40)
+    assert [job.title for job in jobs] == [job.title for job in make_jobs(50)]
+    engine = create_database(f"sqlite:///{tmp_path / 'catalog.db'}", jobs, users)
+    db = sessionmaker(bind=engine)()
+    try:
+        assert db.query(Job).count() == 50
+        assert db.query(User).count() == 40
+    finally:
+        db.close()
+        engine.dispose()
+
+def test_run_benchmarks_library_cases():
+    report = run_benchmarks(sizes=[30], cases=["transform_job", "job_recommendations", "candidate_recommendations"],
+                            iterations=3, warmup=1)
+    assert [(r["case"], r["size"]) for r in report["results"]] == [
+        ("transform_job", 30), ("job_recommendations", 30), ("candidate_recommendations", 30)
+    ]
+    assert all(r["p99_ms"] is not None for r in report["results"])
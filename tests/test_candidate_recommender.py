@@ -114,4 +114,33 @@ def test_recommendations_order(recommender, test_job, test_candidates):
     recommendations = recommender.get_recommendations(test_job, test_candidates)
     scores = [score for _, score, _ in recommendations]
     # Verify scores are in descending order
-    assert all(scores[i] >= scores[i+1] for i in range(len(scores)-1))
\ No newline at end of file
+    assert all(scores[i] >= scores[i+1] for i in range(len(scores)-1))
+
+
+def test_rejected_candidates_are_not_vectorized(recommender, test_job, test_candidates):
+    vectorized = []
+    get_matrix = recommender.vector_store.get_matrix
+    def spy(objs, kind):
+        objs = list(objs)
+        if kind == 'candidate':
+            vectorized.extend(obj.id for obj in objs)
+        return get_matrix(objs, kind)
+    recommender.vector_store.get_matrix = spy
+
+    recommender.get_recommendations(test_job, test_candidates)
+    mask = recommender._apply_hard_requirements(test_job, test_candidates)
+    assert vectorized == [c.id for c, keep in zip(test_candidates, mask) if keep]
+
+def test_experience_and_education_match(recommender, test_job, test_candidates):
+    experience = recommender._calculate_experience_match(test_job, test_candidates)
+    # 6 years for a 5 year requirement gets half of the 2 year bonus
+    assert experience[0] == pytest.approx(1.25)
+    assert experience[1] == pytest.approx(0.6)
+    assert experience[3] == pytest.approx(1.5)
+    education = recommender._calculate_education_match(test_job, test_candidates)
+    assert education.tolist() == [1.0, 0.0, 1.0, 1.0]
+
+def test_candidate_without_education(recommender, test_job):
+    candidate = User(id=5, skills=["python", "machine learning", "django"], experience=6.0,
+                     education=[], location="New York", remote_ok=True)
+    assert not recommender._apply_hard_requirements(test_job, [candidate])[0]
@@ -0,0 +1,206 @@
+import pytest
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.vectorizer import JobVectorizer
+from app.vector_store import VectorStore
+from app.candidate_recommender import CandidateRecommender
+from app.feature_store import (
+    CandidateFeatureStore, MEMORY_BUDGET_PER_CANDIDATE, ensure_updated_at_column, install_feature_store_hooks,
+    remove_feature_store_hooks
+)
+from app.models import Base, User, Job
+from app.utils import get_models_path
+
+@pytest.fixture
+def vectorizer():
+    vectorizer = JobVectorizer()
+    vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+    return vectorizer
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def store(vectorizer):
+    store = CandidateFeatureStore(VectorStore(vectorizer), batch_size=2)
+    hooks = install_feature_store_hooks(store)
+    yield store
+    remove_feature_store_hooks(hooks)
+
+def make_user(id, skills, experience=6.0, education=("master, Computer Science",)):
+    return User(id=id, skills=list(skills), experience=experience, education=list(education),
+                location="New York", remote_ok=bool(id % 2))
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    db.add_all([
+        make_user(1, ["python", "django"]),
+        make_user(2, ["python"], experience=2.0),
+        make_user(3, ["python", "django", "sql"]),
+        make_user(4, ["java"], education=())
+    ])
+    db.commit()
+    yield db
+    db.close()
+
+@pytest.fixture
+def test_job():
+    return Job(id=1, title="Python Developer", description="Django developer",
+               required_skills=["python", "django"], required_experience=3.0,
+               required_education="bachelor", location="New York", remote_ok=True)
+
+def test_full_load_matches_candidates(store, db):
+    features = store.refresh(db)
+    users = db.query(User).order_by(User.id).all()
+    assert features.ids.tolist() == [1, 2, 3, 4]
+    assert features.experience.dtype == np.float32
+    assert features.education_level.dtype == np.int8
+    assert features.education_level.tolist() == [4, 4, 4, -1]
+    assert features.remote_ok.tolist() == [True, False, True, False]
+    assert [features.locations[code] for code in features.location_code] == ["New York"] * 4
+    assert features.skill_counts({"python", "django"}).tolist() == [2, 1, 2, 0]
+    assert features.vectors.shape == (4, store.vector_store.vectorizer.n_features)
+    assert len(users) == 4
+
+def test_rank_matches_object_scoring(store, db, vectorizer, test_job):
+    recommender = CandidateRecommender(vectorizer)
+    features = store.refresh(db)
+    positions, scores, _ = recommender.rank(test_job, features)
+    expected = recommender.get_recommendations(test_job, db.query(User).order_by(User.id).all())
+    assert features.ids[positions].tolist() == [user.id for user, _, _ in expected]
+    np.testing.assert_allclose(scores, [score for _, score, _ in expected])
+
+def test_incremental_refresh(store, db):
+    first = store.refresh(db)
+    assert store.refresh(db) is first
+
+    db.add(make_user(5, ["rust"]))
+    db.get(User, 2).skills = ["python", "django"]
+    db.delete(db.get(User, 4))
+    db.commit()
+
+    features = store.refresh(db)
+    assert features.ids.tolist() == [1, 2, 3, 5]
+    assert features.skill_counts({"python", "django"}).tolist() == [2, 2, 2, 0]
+    # Earlier snapshots are left untouched
+    assert first.ids.tolist() == [1, 2, 3, 4]
+
+def test_uncommitted_changes_are_ignored(store, db):
+    store.refresh(db)
+    db.get(User, 1).skills = ["cobol"]
+    db.flush()
+    db.rollback()
+    assert store.refresh(db).skill_counts({"python"}).tolist() == [1, 1, 1, 0]
+
+def test_bulk_delete_reloads(store, db):
+    store.refresh(db)
+    db.query(User).filter(User.id > 2).delete()
+    db.commit()
+    assert store.refresh(db).ids.tolist() == [1, 2]
+
+def test_memory_stats(store, db):
+    store.refresh(db)
+    stats = store.stats()
+    assert stats["candidates"] == 4
+    assert 0 < stats["bytes_per_candidate"] <= MEMORY_BUDGET_PER_CANDIDATE
+
+def test_skill_index_prefilter(store, db, vectorizer, test_job):
+    features = store.refresh(db)
+    positions = store.candidate_positions(features, test_job.required_skills)
+    assert features.ids[positions].tolist() == [1, 3]
+
+    db.add(make_user(5, ["Python", "django"]))
+    db.get(User, 3).skills = ["sql"]
+    db.commit()
+    features = store.refresh(db)
+    positions = store.candidate_positions(features, test_job.required_skills)
+    assert features.ids[positions].tolist() == [1, 5]
+
+    # The exact skill check still runs on the prefiltered candidates
+    recommender = CandidateRecommender(vectorizer)
+    ranked, _, _ = recommender.rank(test_job, features, positions=positions)
+    assert features.ids[ranked].tolist() == [1]
+
+def test_rank_chunks_matches_rank(store, db, vectorizer, test_job):
+    recommender = CandidateRecommender(vectorizer)
+    db.add_all([make_user(10 + i, ["python", "django"], experience=3.0 + i % 3) for i in range(20)])
+    db.commit()
+    features = store.refresh(db)
+    positions, scores, _ = recommender.rank(test_job, features, top_n=8)
+    expected = features.ids[positions].tolist()
+
+    ranked, eligible = recommender.rank_chunks(test_job, features.iter_chunks(chunk_size=3), top_n=8)
+    assert [int(candidate_id) for candidate_id, _, _ in ranked] == expected
+    assert eligible == len(recommender.score(test_job, features)[0])
+
+    streamed, streamed_eligible = recommender.rank_chunks(test_job, store.stream(db, chunk_size=4), top_n=8)
+    assert [int(candidate_id) for candidate_id, _, _ in streamed] == expected
+    assert streamed_eligible == eligible
+
+def test_save_and_load_memory_mapped(store, db, vectorizer, test_job, tmp_path):
+    features = store.refresh(db)
+    features.save(str(tmp_path))
+    loaded = type(features).load(str(tmp_path))
+    assert isinstance(loaded.ids, np.memmap)
+    assert loaded.ids.tolist() == features.ids.tolist()
+    assert loaded.skill_ids == features.skill_ids
+    assert (loaded.vectors != features.complete_vectors()).nnz == 0
+    recommender = CandidateRecommender(vectorizer)
+    assert recommender.rank(test_job, loaded)[0].tolist() == recommender.rank(test_job, features)[0].tolist()
+
+def test_missing_vectors_are_computed_for_eligible_candidates_only(store, db, vectorizer, test_job, monkeypatch):
+    vectorized = []
+    compute = store.vector_store._compute_matrix
+
+    def recording_compute(objs, kind):
+        vectorized.extend(obj.id for obj in objs)
+        # Reported as successful so the rows are kept even without NLTK data
+        matrix, _ = compute(objs, kind)
+        return matrix, []
+
+    monkeypatch.setattr(store.vector_store, '_compute_matrix', recording_compute)
+    features = store.refresh(db)
+    assert vectorized == []
+    assert (features.pending >= 0).all()
+
+    recommender = CandidateRecommender(vectorizer)
+    recommender.rank(test_job, features)
+    assert vectorized == [1, 3]
+    # Computed vectors are kept for the next request
+    recommender.rank(test_job, features)
+    assert vectorized == [1, 3]
+
+def test_writes_from_other_processes_are_picked_up(db, session_factory, vectorizer):
+    # No hooks: the store only learns about the edit through updated_at
+    store = CandidateFeatureStore(VectorStore(vectorizer))
+    assert store.refresh(db).skill_counts({"rust"}).tolist() == [0, 0, 0, 0]
+
+    other = session_factory()
+    other.get(User, 2).skills = ["rust"]
+    other.commit()
+    other.close()
+    features = store.refresh(db)
+    assert features.ids.tolist() == [1, 2, 3, 4]
+    assert features.skill_counts({"rust"}).tolist() == [0, 1, 0, 0]
+    assert store.refresh(db) is features
+
+def test_periodic_full_reload_drops_deleted_candidates(db, session_factory, vectorizer):
+    store = CandidateFeatureStore(VectorStore(vectorizer), full_reload_interval=0.0)
+    store.refresh(db)
+    other = session_factory()
+    other.delete(other.get(User, 3))
+    other.commit()
+    other.close()
+    assert store.refresh(db).ids.tolist() == [1, 2, 4]
+
+def test_updated_at_added_to_existing_database():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+    assert ensure_updated_at_column(engine)
+    assert not ensure_updated_at_column(engine)
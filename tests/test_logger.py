@@ -0,0 +1,88 @@
+import json
+import logging
+import queue
+import threading
+import pytest
+from app.logger import (
+    setup_logger, shutdown_logging, parse_sample_rates, logging_stats, SamplingFilter, _NonBlockingQueueHandler
+)
+
+@pytest.fixture
+def log_dir(tmp_path):
+    yield tmp_path
+    # Back to the application's configuration
+    setup_logger()
+
+def read_lines(log_dir):
+    shutdown_logging()
+    with open(log_dir / 'app.log') as f:
+        return f.read().splitlines()
+
+def test_setup_twice_does_not_duplicate_handlers(log_dir):
+    setup_logger(log_dir=str(log_dir), console=False)
+    logger = setup_logger(log_dir=str(log_dir), console=False)
+    assert len(logger.handlers) == 1
+    logger.info("Loaded %d jobs", 3)
+    lines = read_lines(log_dir)
+    assert len(lines) == 1
+    assert lines[0].endswith("job_recommender - INFO - Loaded 3 jobs")
+
+def test_json_lines_with_extra_fields(log_dir):
+    logger = setup_logger(json_format=True, log_dir=str(log_dir), console=False)
+    logger.warning("User not found - user_id: %s", 7, extra={"user_id": 7})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.error("Failed", exc_info=True)
+    first, second = [json.loads(line) for line in read_lines(log_dir)]
+    assert first["level"] == "WARNING"
+    assert first["logger"] == "job_recommender"
+    assert first["message"] == "User not found - user_id: 7"
+    assert first["user_id"] == 7
+    assert "ValueError: boom" in second["exception"]
+
+def test_sampling_keeps_a_fraction_of_info_messages(log_dir):
+    setup_logger(sample_rates={"job_recommender.requests": 0.1}, log_dir=str(log_dir), console=False)
+    requests = logging.getLogger("job_recommender.requests")
+    for i in range(100):
+        requests.info("Request %d", i)
+    requests.warning("Slow request")
+    logging.getLogger("job_recommender").info("Not sampled")
+    lines = read_lines(log_dir)
+    assert sum("INFO - Request" in line for line in lines) == 10
+    assert any("Slow request" in line for line in lines)
+    assert any("Not sampled" in line for line in lines)
+
+def test_sampling_rate_zero_drops_info():
+    sampling = SamplingFilter({"noisy": 0})
+    assert not sampling.filter(logging.LogRecord("noisy.child", logging.INFO, "", 0, "x", None, None))
+    assert sampling.filter(logging.LogRecord("noisy", logging.ERROR, "", 0, "x", None, None))
+
+def test_messages_are_formatted_by_the_writer_thread(log_dir, monkeypatch):
+    formatted_in = []
+
+    class Value:
+        def __str__(self):
+            formatted_in.append(threading.current_thread())
+            return "value"
+
+    logger = setup_logger(log_dir=str(log_dir), console=False)
+    # pytest's capture handler on the root logger would format it here
+    monkeypatch.setattr(logger, "propagate", False)
+    logger.info("Lazy %s", Value())
+    assert read_lines(log_dir)[0].endswith("Lazy value")
+    assert formatted_in and threading.current_thread() not in formatted_in
+
+def test_full_queue_drops_instead_of_blocking(log_dir):
+    handler = _NonBlockingQueueHandler(queue.Queue(1))
+    for _ in range(3):
+        handler.emit(logging.LogRecord("job_recommender", logging.INFO, "", 0, "x", None, None))
+    assert handler.dropped == 2
+    setup_logger(log_dir=str(log_dir), console=False)
+    assert logging_stats()["dropped"] == 0
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("job_recommender.requests=0.01, other=1") == {
+        "job_recommender.requests": 0.01, "other": 1.0
+    }
+    assert parse_sample_rates(None) == {}
@@ -0,0 +1,124 @@
+import time
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from app.candidate_recommender import CandidateRecommender
+from app.feature_store import CandidateFeatureStore
+from app.materialized import (
+    JOBS, CANDIDATES, build_job_recommendations, build_candidate_recommendations, current_generation,
+    materialized_ranking
+)
+from app.models import (
+    Base, User, Job, RecommendationGeneration, MaterializedJobRecommendation, MaterializedCandidateRecommendation
+)
+from app.recommender import JobRecommender
+from app.vectorizer import JobVectorizer
+from app.utils import get_models_path
+
+EDUCATION = ["high school", "bachelor", "master", "phd"]
+
+@pytest.fixture
+def vectorizer():
+    vectorizer = JobVectorizer()
+    vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+    return vectorizer
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        Job(id=i, title=f"Developer {i}", description="Python and SQL" if i % 2 else "Java services",
+            required_skills=["python"] if i % 3 else ["python", "sql"], required_experience=float(i % 5),
+            required_education=EDUCATION[i % 4], location="New York" if i % 2 else "Boston",
+            remote_ok=bool(i % 4 == 0))
+        for i in range(1, 13)
+    ])
+    db.add_all([
+        User(id=i, skills=["python", "sql"] if i % 2 else ["python"], experience=float(i % 7),
+             education=[f"{EDUCATION[i % 4]}, Some University"], location="Boston" if i % 3 else "New York",
+             remote_ok=bool(i % 2))
+        for i in range(1, 16)
+    ])
+    db.commit()
+    yield db
+    db.close()
+
+def test_job_recommendations_match_live_ranking(db, vectorizer):
+    recommender = JobRecommender(vectorizer)
+    generation, rows = build_job_recommendations(db, recommender.vector_store, top_k=5, write_batch=7)
+    assert rows == 15 * 5
+    assert current_generation(db, JOBS).id == generation
+    jobs = db.query(Job).order_by(Job.id).all()
+    for user in db.query(User):
+        expected = recommender.get_recommendations(user, jobs, top_n=5)
+        ranking, total = materialized_ranking(db, JOBS, user.id, 5, max_age=60)
+        assert total == 12
+        assert [job_id for job_id, _, _ in ranking] == [job.id for job, _, _ in expected]
+        assert [score for _, score, _ in ranking] == pytest.approx([score for _, score, _ in expected])
+
+def test_job_recommendations_rank_first_jobs_like_live_search(db, vectorizer):
+    # The live /search without words scores only the first SEARCH_MAX_CANDIDATES jobs by id
+    recommender = JobRecommender(vectorizer)
+    build_job_recommendations(db, recommender.vector_store, top_k=3, max_jobs=5)
+    jobs = db.query(Job).order_by(Job.id).limit(5).all()
+    for user in db.query(User):
+        expected = recommender.get_recommendations(user, jobs, top_n=3)
+        ranking, total = materialized_ranking(db, JOBS, user.id, 3, max_age=60)
+        assert total == 12
+        assert [job_id for job_id, _, _ in ranking] == [job.id for job, _, _ in expected]
+        assert all(job_id <= 5 for job_id, _, _ in ranking)
+
+def test_candidate_recommendations_match_live_ranking(db, vectorizer):
+    recommender = CandidateRecommender(vectorizer)
+    build_candidate_recommendations(db, recommender, top_k=4, chunk_size=4)
+    store = CandidateFeatureStore(recommender.vector_store)
+    features = store.refresh(db)
+    for job in db.query(Job):
+        positions = store.candidate_positions(features, job.required_skills)
+        expected, eligible = recommender.rank_chunks(job, features.iter_chunks(positions, 4), top_n=4)
+        result = materialized_ranking(db, CANDIDATES, job.id, 4, max_age=60)
+        if not expected:
+            assert result is None
+            continue
+        ranking, total = result
+        assert total == eligible
+        assert [int(key) for key, _, _ in ranking] == [int(key) for key, _, _ in expected]
+
+def test_swap_keeps_current_and_previous_generation(db, vectorizer):
+    store = JobRecommender(vectorizer).vector_store
+    generations = [build_job_recommendations(db, store, top_k=2)[0] for _ in range(3)]
+    kept = db.query(RecommendationGeneration).filter_by(kind=JOBS).order_by(RecommendationGeneration.id).all()
+    assert [generation.id for generation in kept] == generations[1:]
+    assert [generation.is_current for generation in kept] == [False, True]
+    remaining = {row.generation for row in db.query(MaterializedJobRecommendation)}
+    assert remaining == set(generations[1:])
+    # The other kind is untouched
+    assert current_generation(db, CANDIDATES) is None
+    assert db.query(MaterializedCandidateRecommendation).count() == 0
+
+def test_stale_missing_or_short_rankings_are_not_served(db, vectorizer):
+    generation, _ = build_job_recommendations(db, JobRecommender(vectorizer).vector_store, top_k=3)
+    assert materialized_ranking(db, JOBS, 1, 3, max_age=60) is not None
+    # A page past top_k needs the live ranking
+    assert materialized_ranking(db, JOBS, 1, 4, max_age=60) is None
+    assert materialized_ranking(db, JOBS, 999, 3, max_age=60) is None
+    db.execute(update(RecommendationGeneration).where(RecommendationGeneration.id == generation)
+               .values(completed_at=time.time() - 120))
+    db.commit()
+    assert materialized_ranking(db, JOBS, 1, 3, max_age=60) is None
+
+def test_failed_build_keeps_serving_previous_generation(db, vectorizer):
+    recommender = CandidateRecommender(vectorizer)
+    generation, _ = build_candidate_recommendations(db, recommender, top_k=3)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("scoring failed")
+
+    recommender.rank_chunks = fail
+    with pytest.raises(RuntimeError):
+        build_candidate_recommendations(db, recommender, top_k=3)
+    assert current_generation(db, CANDIDATES).id == generation
+    failed = db.query(RecommendationGeneration).filter_by(kind=CANDIDATES, status='failed').one()
+    assert db.query(MaterializedCandidateRecommendation).filter_by(generation=failed.id).count() == 0
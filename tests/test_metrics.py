@@ -0,0 +1,62 @@
+import pytest
+from app import metrics
+from app.metrics import MetricsRegistry, register_stats
+
+@pytest.fixture
+def enabled():
+    previous = metrics.is_enabled()
+    metrics.set_enabled(True)
+    yield
+    metrics.set_enabled(previous)
+
+def test_counter_and_histogram_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ('endpoint',))
+    latency = registry.histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1.0))
+    requests.labels('/search').inc()
+    requests.labels('/search').inc()
+    for value in (0.05, 0.5, 3.0):
+        latency.labels('score').observe(value)
+    lines = registry.render().splitlines()
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{endpoint="/search"} 2.0' in lines
+    assert '# TYPE latency_seconds histogram' in lines
+    # Buckets are cumulative and end with +Inf
+    assert 'latency_seconds_bucket{stage="score",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="score",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{stage="score",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{stage="score"} 3' in lines
+    assert 'latency_seconds_sum{stage="score"} 3.55' in lines
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter('c_total', 'C', ('path',)).labels('a"b\\c\nd').inc()
+    assert 'c_total{path="a\\"b\\\\c\\nd"} 1.0' in registry.render()
+
+def test_register_stats_skips_missing_keys():
+    registry = MetricsRegistry()
+    stats = {"entries": 3, "hits": 7}
+    register_stats('cache', lambda: stats, {
+        'entries': ('_entries', 'gauge', "Entries"),
+        'hits': ('_hits_total', 'counter', "Hits"),
+        'bytes': ('_bytes', 'gauge', "Bytes")
+    }, registry=registry)
+    text = registry.render()
+    assert 'cache_entries 3.0' in text
+    assert '# TYPE cache_hits_total counter' in text
+    assert 'cache_bytes' not in text
+    with pytest.raises(ValueError):
+        registry.counter('cache_entries', 'Duplicate')
+
+def test_timer_records_only_when_enabled(enabled):
+    child = metrics.STAGE_DURATION.labels('test_stage')
+    before = sum(child.counts)
+    with metrics.timer('test_stage'):
+        pass
+    metrics.observe('test_stage', 0.2)
+    assert sum(child.counts) == before + 2
+    metrics.set_enabled(False)
+    with metrics.timer('test_stage'):
+        pass
+    metrics.observe('test_stage', 0.2)
+    assert sum(child.counts) == before + 2
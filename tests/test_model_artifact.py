@@ -0,0 +1,67 @@
+import json
+import random
+import pytest
+import numpy as np
+from app.vectorizer import JobVectorizer
+from app.model_artifact import MappedTfidf, load_artifact
+from app.utils import get_models_path
+
+@pytest.fixture
+def vectorizer():
+    vectorizer = JobVectorizer()
+    vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+    return vectorizer
+
+@pytest.fixture
+def artifact_dir(vectorizer, tmp_path):
+    directory = str(tmp_path / "job_vectorizer")
+    vectorizer.save_artifact(directory)
+    return directory
+
+def test_artifact_is_memory_mapped(artifact_dir):
+    model, lemmas, stop_words = load_artifact(artifact_dir, verify=True)
+    assert isinstance(model, MappedTfidf)
+    assert isinstance(model.terms, np.memmap)
+    assert isinstance(model.idf_, np.memmap)
+    assert model.idf_.dtype == np.float32
+
+def test_artifact_matches_pickle(vectorizer, artifact_dir):
+    mapped = JobVectorizer(model_path=artifact_dir)
+    assert mapped.version == vectorizer.version
+    assert mapped.n_features == vectorizer.n_features
+
+    rng = random.Random(0)
+    terms = list(vectorizer.vectorizer.get_feature_names_out())
+    texts = [
+        ' '.join(rng.choice(terms + ['unknownword', 'x', 'Python', 'the']) for _ in range(rng.randint(0, 40)))
+        for _ in range(50)
+    ]
+    expected = vectorizer.transform_texts(texts, dense=True)
+    actual = mapped.transform_texts(texts, dense=True)
+    assert np.allclose(expected, actual, atol=1e-6)
+
+def test_checksum_mismatch_detected(artifact_dir):
+    with open(f"{artifact_dir}/pipeline.json", 'w') as f:
+        json.dump({'lemmas': {'tampered': 'yes'}, 'stop_words': None}, f)
+    with pytest.raises(ValueError, match="Checksum"):
+        load_artifact(artifact_dir, verify=True)
+
+def test_fast_tables_saved_in_artifact(vectorizer, tmp_path):
+    vectorizer.lemmas = {'developers': 'developer'}
+    vectorizer.stop_words = frozenset({'with'})
+    directory = str(tmp_path / "fast_vectorizer")
+    vectorizer.save_artifact(directory)
+
+    loaded = JobVectorizer(mode='fast')
+    loaded.load_vectorizer(directory)
+    assert loaded.lemmas == {'developers': 'developer'}
+    assert loaded.stop_words == frozenset({'with'})
+
+def test_unsupported_params_rejected(vectorizer, tmp_path):
+    vectorizer.vectorizer.set_params(ngram_range=(1, 2))
+    with pytest.raises(ValueError):
+        vectorizer.save_artifact(str(tmp_path / "bigram_vectorizer"))
+
+def test_shipped_artifact_matches_pickle(vectorizer):
+    mapped = JobVectorizer(model_path=get_models_path('job_vectorizer'))
+    assert mapped.version == vectorizer.version
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.offload import RequestExecutor
+
+def test_blocking_work_does_not_block_the_event_loop():
+    executor = RequestExecutor(max_workers=2)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.ensure_future(executor.run(release.wait, 5))
+        # The loop keeps running other coroutines while the worker blocks
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+        release.set()
+        return ticks, await blocked
+
+    try:
+        assert asyncio.run(scenario()) == (5, True)
+    finally:
+        executor.shutdown()
+
+def test_executor_is_bounded():
+    executor = RequestExecutor(max_workers=2)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+
+    async def scenario():
+        await asyncio.gather(*(executor.run(work) for _ in range(8)))
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert max(peak) == 2
+
+def test_exceptions_propagate_and_pool_restarts_after_shutdown():
+    executor = RequestExecutor(max_workers=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(executor.run(fail))
+    executor.shutdown()
+    assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+    executor.shutdown()
@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+from collections import Counter
+from app.profiling import RequestProfiler, RequestProfile, read_collapsed, hot_functions
+from scripts.profile_summary import summarize
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def run_in_thread(profile, func, *args):
+    thread = threading.Thread(target=profile.call, args=(func,) + args)
+    thread.start()
+    thread.join()
+
+def test_sampler_collects_stacks_of_profiled_calls_only():
+    profile = RequestProfile('/search', 'sample', interval=0.001)
+    run_in_thread(profile, busy_wait, 0.1)
+    # Work outside call() is not sampled
+    busy_wait(0.05)
+    profile.stop()
+    assert profile.sampler.samples > 10
+    assert all('busy_wait' in stack for stack in profile.sampler.counts)
+    assert all(stack.split(';')[-1].endswith(':busy_wait') for stack in profile.sampler.counts)
+
+def test_profiler_rate_and_token():
+    profiler = RequestProfiler(rate=0.0, token='secret')
+    assert profiler.enabled
+    assert profiler.start('/search') is None
+    assert profiler.start('/search', token='wrong') is None
+    profile = profiler.start('/search', token='secret')
+    assert profile is not None
+    profile.stop()
+    assert not RequestProfiler().enabled
+    assert RequestProfiler(rate=1.0).should_profile()
+
+def test_non_ascii_tokens_are_compared_safely():
+    profiler = RequestProfiler(token='sécret')
+    assert not profiler.should_profile('\u2603')
+    assert not profiler.should_profile('sécret')
+    # The UTF-8 bytes of the header, as Starlette decodes them (latin-1)
+    assert profiler.should_profile('sécret'.encode('utf-8').decode('latin-1'))
+    assert not RequestProfiler(token='secret').should_profile('sécret')
+
+def test_saved_profiles_and_summary(tmp_path, capsys):
+    profiler = RequestProfiler(mode='cprofile', rate=1.0, directory=str(tmp_path), interval=0.001, max_profiles=2)
+    for _ in range(3):
+        profile = profiler.start('/recommend-candidates', details={"query": "job_id=1"})
+        run_in_thread(profile, busy_wait, 0.05)
+        paths = profiler.save(profile)
+    assert sorted(os.path.splitext(path)[1] for path in paths) == ['.collapsed', '.json', '.pstats']
+    # Only the newest max_profiles are kept
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.json')]) == 2
+    assert sum(read_collapsed(paths[1]).values()) == profile.sampler.samples
+
+    summarize(str(tmp_path), '/recommend-candidates', top=5)
+    output = capsys.readouterr().out
+    assert '2 profiles' in output
+    assert 'busy_wait' in output
+    summarize(str(tmp_path), '/search')
+    assert 'No profiles' in capsys.readouterr().out
+
+def test_hot_functions_self_and_total():
+    stacks = Counter({'main;handler;score': 6, 'main;handler;load': 3, 'main;handler': 1})
+    assert hot_functions(stacks, top=3) == [('score', 6, 6), ('load', 3, 3), ('handler', 1, 10)]
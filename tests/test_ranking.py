@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from sklearn.metrics.pairwise import cosine_similarity
+from app.ranking import TopK, top_k_indices
+from app.recommender import JobRecommender
+from app.vectorizer import JobVectorizer
+from app.models import User, Job
+from app.utils import get_models_path
+
+@pytest.mark.parametrize("k", [0, 1, 3, 7, 20, 50])
+def test_top_k_indices_matches_stable_sort(k):
+    rng = np.random.default_rng(0)
+    # Few distinct values so there are plenty of ties around the cut-off
+    scores = rng.integers(0, 5, size=40).astype(np.float64) / 4
+    expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+    assert top_k_indices(scores, k).tolist() == expected
+
+def test_top_k_indices_ranks_non_finite_scores_last():
+    nan = np.nan
+    assert top_k_indices([nan, 1.0, 0.5], 2).tolist() == [1, 2]
+    assert top_k_indices([0.2, nan, 0.5, 0.9], 3).tolist() == [3, 2, 0]
+    assert top_k_indices([nan, 0.1, nan], 3).tolist() == [1, 0, 2]
+
+def test_top_k_indices_empty():
+    assert top_k_indices(np.array([]), 5).tolist() == []
+
+@pytest.fixture
+def recommender():
+    vectorizer = JobVectorizer()
+    vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+    return JobRecommender(vectorizer)
+
+def make_jobs(recommender, n_jobs):
+    rng = np.random.default_rng(1)
+    n_features = recommender.vectorizer.n_features
+    rows = normalize(sparse.random(n_jobs, n_features, density=0.02, format='csr',
+                                   dtype=np.float32, random_state=2))
+    educations = ['high school', 'bachelor', 'master', 'phd', '']
+    locations = ['New York', 'Boston', 'Remote']
+    jobs = []
+    for i in range(n_jobs):
+        job = Job(
+            id=i, title=f"Job {i}", description="", required_skills=[],
+            required_experience=float(rng.integers(0, 8)),
+            required_education=educations[i % len(educations)],
+            location=locations[i % len(locations)], remote_ok=bool(i % 2)
+        )
+        # Every fourth job reuses an earlier vector, so whole scores tie
+        recommender.vector_store._write_vector(job, 'job', rows[i - i % 4])
+        jobs.append(job)
+    return jobs
+
+def test_get_recommendations_matches_full_sort(recommender):
+    jobs = make_jobs(recommender, 200)
+    user = User(id=1, skills=[], experience=4.0, education=["bachelor, Computer Science"],
+                location="Boston", remote_ok=True)
+    user_row = normalize(sparse.random(1, recommender.vectorizer.n_features, density=0.2,
+                                       format='csr', dtype=np.float32, random_state=3))
+    recommender.vector_store._write_vector(user, 'user', user_row)
+
+    # The previous implementation: dense cosine similarity and a full sort
+    similarities = cosine_similarity(user_row, recommender.vector_store.get_matrix(jobs, 'job'))[0]
+    expected = sorted(
+        [(job, recommender.calculate_match_score(user, job, sim), sim) for job, sim in zip(jobs, similarities)],
+        key=lambda x: x[1], reverse=True
+    )[:15]
+
+    recommendations = recommender.get_recommendations(user, jobs, top_n=15)
+    assert [job.id for job, _, _ in recommendations] == [job.id for job, _, _ in expected]
+    np.testing.assert_allclose([score for _, score, _ in recommendations],
+                               [score for _, score, _ in expected], rtol=1e-6)
+    assert all(isinstance(score, float) for _, score, _ in recommendations)
+
+def test_top_k_heap_matches_top_k_indices():
+    rng = np.random.default_rng(4)
+    scores = rng.integers(0, 6, size=100).astype(np.float64)
+    top = TopK(12)
+    for start in range(0, len(scores), 7):
+        chunk = scores[start:start + 7]
+        for i in top_k_indices(chunk, 12):
+            top.push(chunk[i], start + i)
+    assert top.items() == top_k_indices(scores, 12).tolist()
+
+def test_rank_job_chunks_matches_one_batch(recommender):
+    jobs = make_jobs(recommender, 60)
+    user = User(id=1, skills=[], experience=3.0, education=["master, AI"], location="Remote", remote_ok=True)
+    recommender.vector_store._write_vector(user, 'user', normalize(sparse.random(
+        1, recommender.vectorizer.n_features, density=0.2, format='csr', dtype=np.float32, random_state=5)))
+    expected = recommender.get_recommendations(user, jobs, top_n=20)
+    chunks = [jobs[start:start + 9] for start in range(0, len(jobs), 9)]
+    assert recommender.rank_job_chunks(user, chunks, top_n=20) == expected
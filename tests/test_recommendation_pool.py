@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.candidate_recommender import CandidateRecommender
+from app.feature_store import CandidateFeatureStore
+from app.models import Base, User, Job
+from app.recommendation_pool import RecommendationPool, RecommendationTimeout
+from app.recommender import JobRecommender
+from app.search_index import SearchMatches, ensure_search_index
+from app.vectorizer import JobVectorizer
+from app.utils import get_models_path
+
+MODEL_PATH = get_models_path('job_vectorizer')
+
+@pytest.fixture
+def database_url(tmp_path):
+    # Workers open their own connections, so the database must be a file
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        User(id=i, skills=["python", "django"] if i % 2 else ["python"], experience=float(i),
+             education=["master, Computer Science"], location="New York", remote_ok=bool(i % 3))
+        for i in range(1, 9)
+    ])
+    db.add_all([
+        Job(id=1, title="Python Developer", description="Django web developer",
+            required_skills=["python", "django"], required_experience=3.0,
+            required_education="bachelor", location="New York", remote_ok=True),
+        Job(id=2, title="Python Data Engineer", description="Python pipelines",
+            required_skills=["python"], required_experience=1.0,
+            required_education="bachelor", location="Boston", remote_ok=False)
+    ])
+    db.commit()
+    db.close()
+    yield url
+    engine.dispose()
+
+@pytest.fixture
+def db(database_url):
+    db = sessionmaker(bind=create_engine(database_url))()
+    yield db
+    db.close()
+
+@pytest.fixture
+def vectorizer():
+    return JobVectorizer(model_path=MODEL_PATH)
+
+@pytest.fixture
+def pool(database_url, tmp_path):
+    pool = RecommendationPool(1, MODEL_PATH, database_url, max_tasks_per_child=2, directory=str(tmp_path / 'features'))
+    yield pool
+    pool.shutdown()
+
+def test_candidates_match_in_process_ranking(pool, db, vectorizer):
+    recommender = CandidateRecommender(vectorizer)
+    store = CandidateFeatureStore(recommender.vector_store)
+    features = store.refresh(db)
+    job = db.get(Job, 1)
+    expected, expected_total = recommender.rank_chunks(job, features.iter_chunks(), top_n=5)
+
+    path = pool.publish(features)
+    assert pool.publish(features) == path
+
+    async def scenario():
+        # Three tasks on one worker that is recycled after two
+        return [
+            await pool.rank_candidates(1, 5, path),
+            await pool.rank_candidates(1, 5),
+            await pool.rank_candidates(999, 5, path)
+        ]
+
+    mapped, streamed, missing = asyncio.run(scenario())
+    for ranking, total in (mapped, streamed):
+        assert total == expected_total
+        assert [key for key, _, _ in ranking] == [int(key) for key, _, _ in expected]
+        assert [score for _, score, _ in ranking] == pytest.approx([score for _, score, _ in expected])
+    assert missing is None
+
+def test_search_matches_in_process_ranking(pool, db, vectorizer):
+    user = db.get(User, 3)
+    matches = SearchMatches(db, "python", 100)
+    expected = JobRecommender(vectorizer).rank_job_chunks(user, matches, top_n=10)
+
+    ranking, total = asyncio.run(pool.rank_search(3, "python", 10, 100))
+    assert total == matches.total == 2
+    assert [job_id for job_id, _, _ in ranking] == [job.id for job, _, _ in expected]
+    assert asyncio.run(pool.rank_search(999, "python", 10, 100)) is None
+
+def test_timeout(database_url, tmp_path):
+    pool = RecommendationPool(1, MODEL_PATH, database_url, timeout=0.001, directory=str(tmp_path / 'features'))
+    try:
+        with pytest.raises(RecommendationTimeout):
+            asyncio.run(pool.rank_candidates(1, 5))
+    finally:
+        pool.shutdown()
@@ -0,0 +1,107 @@
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, User, Job
+from app.result_cache import (
+    ResultCache, MemoryBackend, RedisBackend, ENTRY_OVERHEAD, normalize_query,
+    search_dependencies, candidate_dependencies, install_result_cache_hooks, remove_result_cache_hooks
+)
+
+@pytest.fixture
+def cache():
+    cache = ResultCache(MemoryBackend(), ttl=None)
+    hooks = install_result_cache_hooks(cache)
+    yield cache
+    remove_result_cache_hooks(hooks)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        User(id=1, skills=["python"], experience=3.0, education=[], location="Boston"),
+        User(id=2, skills=["java"], experience=1.0, education=[], location="Boston"),
+        Job(id=1, title="Python Developer", description="Django", required_skills=["python"],
+            required_experience=1.0, required_education="bachelor", location="Boston")
+    ])
+    db.commit()
+    yield db
+    db.close()
+
+def cached(cache, endpoint, params, dependencies):
+    key, value = cache.lookup(endpoint, params, dependencies)
+    if value is None:
+        cache.store(key, {"computed": True})
+    return value is not None
+
+def test_memory_backend_lru_and_byte_cap():
+    backend = MemoryBackend(max_bytes=3 * (ENTRY_OVERHEAD + 10))
+    for key in "abc":
+        backend.set(key, b"x" * 10)
+    backend.get("a")
+    backend.set("d", b"x" * 10)
+    # "b" was the least recently used
+    assert backend.get("b") is None
+    assert [backend.get(key) is not None for key in "acd"] == [True, True, True]
+    assert backend.stats()["evictions"] == 1
+    assert backend.stats()["bytes"] <= backend.max_bytes
+    backend.set("huge", b"x" * backend.max_bytes)
+    assert backend.get("huge") is None
+
+def test_memory_backend_ttl():
+    backend = MemoryBackend()
+    backend.set("a", b"1", ttl=0.01)
+    backend.set("b", b"2")
+    time.sleep(0.02)
+    assert backend.get("a") is None
+    assert backend.get("b") == b"2"
+    assert backend.stats()["expirations"] == 1
+
+def test_hit_ratio_and_query_normalization(cache):
+    params = {"search_text": normalize_query("  Python   Developer "), "user_id": 1}
+    assert not cached(cache, "search", params, search_dependencies(1))
+    assert cached(cache, "search", {"search_text": normalize_query("python developer"), "user_id": 1},
+                  search_dependencies(1))
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+def test_only_dependent_results_are_invalidated(cache, db):
+    for user_id in (1, 2):
+        cached(cache, "search", {"user_id": user_id}, search_dependencies(user_id))
+    cached(cache, "recommend-candidates", {"job_id": 1}, candidate_dependencies(1))
+
+    db.get(User, 1).experience = 5.0
+    db.commit()
+    # User 1's searches and every candidate ranking depend on user 1; user 2's searches do not
+    assert not cached(cache, "search", {"user_id": 1}, search_dependencies(1))
+    assert cached(cache, "search", {"user_id": 2}, search_dependencies(2))
+    assert not cached(cache, "recommend-candidates", {"job_id": 1}, candidate_dependencies(1))
+
+    db.get(Job, 1).title = "Senior Python Developer"
+    db.commit()
+    assert not cached(cache, "search", {"user_id": 2}, search_dependencies(2))
+
+def test_vector_refresh_and_rollback_keep_results(cache, db):
+    cached(cache, "search", {"user_id": 1}, search_dependencies(1))
+    db.get(User, 1).tfidf_vector = {"version": "x"}
+    db.commit()
+    db.get(User, 1).experience = 9.0
+    db.flush()
+    db.rollback()
+    assert cached(cache, "search", {"user_id": 1}, search_dependencies(1))
+
+def test_bulk_update_invalidates_every_user(cache, db):
+    cached(cache, "search", {"user_id": 2}, search_dependencies(2))
+    db.query(User).filter(User.id == 2).update({"experience": 4.0})
+    db.commit()
+    assert not cached(cache, "search", {"user_id": 2}, search_dependencies(2))
+
+def test_redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = ResultCache(RedisBackend(client=fakeredis.FakeRedis()), ttl=60)
+    assert not cached(cache, "search", {"user_id": 1}, search_dependencies(1))
+    assert cached(cache, "search", {"user_id": 1}, search_dependencies(1))
+    cache.invalidate(["user:1"])
+    assert not cached(cache, "search", {"user_id": 1}, search_dependencies(1))
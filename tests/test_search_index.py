@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Job
+from app.search_index import (
+    FTS_TABLE, SearchMatches, install_search_index_hooks, ensure_search_index, search_tokens
+)
+
+def make_job(id, title, description):
+    return Job(id=id, title=title, description=description, required_skills=[],
+               required_experience=0.0, required_education='bachelor', location='Remote', remote_ok=True)
+
+@pytest.fixture
+def db():
+    install_search_index_hooks()
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        make_job(1, 'Python Developer', 'Looking for a Python expert'),
+        make_job(2, 'Data Scientist', 'ML expert needed'),
+        make_job(3, 'Python Engineer', 'Python backend developer needed'),
+        make_job(4, 'Java Developer', 'Spring backend')
+    ])
+    db.commit()
+    yield db
+    db.close()
+
+def ids(jobs):
+    return [job.id for job in jobs]
+
+def search(db, search_text, limit=10):
+    matches = SearchMatches(db, search_text, limit)
+    jobs = [job for chunk in matches for job in chunk]
+    return jobs, matches.total
+
+def test_search_tokens():
+    assert search_tokens("Python, Developer!") == ['python', 'developer']
+
+def test_ranked_multi_word_search(db):
+    jobs, total = search(db, "python developer")
+    assert total == 2
+    # The title match ranks first
+    assert ids(jobs) == [1, 3]
+
+def test_prefix_and_case(db):
+    jobs, total = search(db, "DEVELOP")
+    assert total == 3
+    assert set(ids(jobs)) == {1, 3, 4}
+
+def test_limit_and_total_in_one_query(db):
+    matches = SearchMatches(db, "developer", 2, chunk_size=1)
+    chunks = list(matches)
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+    assert matches.total == 3
+    assert search(db, "haskell") == ([], 0)
+
+def test_empty_search_returns_everything(db):
+    jobs, total = search(db, "  ")
+    assert ids(jobs) == [1, 2, 3, 4]
+    assert total == 4
+
+def test_index_follows_changes(db):
+    db.get(Job, 4).title = 'Kotlin Developer'
+    db.delete(db.get(Job, 2))
+    db.add(make_job(5, 'Kotlin Engineer', 'Android'))
+    db.commit()
+    assert set(ids(search(db, "kotlin")[0])) == {4, 5}
+    assert search(db, "scientist") == ([], 0)
+    assert search(db, "java") == ([], 0)
+
+def test_ensure_on_existing_database(db):
+    connection = db.connection()
+    connection.exec_driver_sql(f"DROP TABLE {FTS_TABLE}")
+    db.commit()
+    assert ensure_search_index(db.get_bind())
+    assert not ensure_search_index(db.get_bind())
+    assert set(ids(search(db, "python")[0])) == {1, 3}
+
+def test_dropped_with_jobs_table(db):
+    engine = db.get_bind()
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+    with engine.connect() as connection:
+        assert connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': FTS_TABLE}
+        ).first() is None
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from app.candidate_recommender import skill_matrix
+from app.skill_index import SkillIndex, intersect_postings, normalize_skill
+
+@pytest.fixture
+def index():
+    skill_ids = {}
+    ids = np.array([1, 4, 7, 9], dtype=np.int64)
+    skills = skill_matrix([["Python", "django"], ["python"], ["python", "Django "], ["java"]], skill_ids)
+    return SkillIndex.from_columns(ids, skills, list(skill_ids))
+
+@pytest.mark.parametrize("small_size,large_size", [(5, 1000), (300, 400), (50, 60)])
+def test_intersect_postings(small_size, large_size):
+    rng = np.random.default_rng(small_size)
+    small = np.unique(rng.integers(0, 2000, small_size)).astype(np.int32)
+    large = np.unique(rng.integers(0, 2000, large_size)).astype(np.int32)
+    np.testing.assert_array_equal(intersect_postings(small, large), np.intersect1d(small, large))
+
+def test_normalize_skill():
+    assert normalize_skill("  Machine   Learning ") == "machine learning"
+
+def test_candidates(index):
+    assert index.candidates(["python"]).tolist() == [1, 4, 7]
+    assert index.candidates(["PYTHON", "django"]).tolist() == [1, 7]
+    assert index.candidates(["python", "rust"]).tolist() == []
+    assert index.candidates([]) is None
+
+def test_update_without_rebuild(index):
+    index.add(12, ["Django", "python"])
+    index.remove(1, ["Python", "django"])
+    assert index.candidates(["python", "django"]).tolist() == [7, 12]
+    index.remove(9, ["java"])
+    assert index.postings("java").tolist() == []
+    assert index.postings("python").dtype == np.int32
+
+def test_stats(index):
+    stats = index.stats()
+    assert stats["skills"] == 3
+    assert stats["postings"] == 6
+    assert stats["max_postings"] == 3
+    assert stats["largest"]["python"] == 3
@@ -0,0 +1,86 @@
+import threading
+from app.text_cache import TextCache
+from app.vectorizer import JobVectorizer
+
+def test_hit_and_miss_counters():
+    cache = TextCache()
+    key = cache.key("Senior Python Developer")
+    assert cache.get(key) is None
+    cache.put(key, "senior python developer")
+    assert cache.get(key) == "senior python developer"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+def test_namespace_changes_key():
+    assert TextCache.key("python") != TextCache.key("python", namespace="fast")
+
+def test_lru_eviction_respects_memory_cap():
+    cache = TextCache(max_bytes=1000)
+    keys = [cache.key(str(i)) for i in range(20)]
+    for key in keys:
+        cache.put(key, "x" * 100)
+    stats = cache.stats()
+    assert stats["bytes"] <= 1000
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[-1]) == "x" * 100
+
+def test_recently_used_entries_survive_eviction():
+    cache = TextCache(max_bytes=1000)
+    first = cache.key("first")
+    cache.put(first, "x" * 100)
+    for i in range(20):
+        cache.get(first)
+        cache.put(cache.key(str(i)), "x" * 100)
+    assert cache.get(first) == "x" * 100
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = TextCache(path=path)
+    key = cache.key("Machine Learning Engineer")
+    cache.put(key, "machine learning engineer")
+    cache.close()
+
+    reopened = TextCache(path=path)
+    assert reopened.get(key) == "machine learning engineer"
+    assert reopened.stats()["disk_hits"] == 1
+    reopened.close()
+
+def test_concurrent_access():
+    cache = TextCache(max_bytes=10000)
+
+    def worker(offset):
+        for i in range(200):
+            key = cache.key(str((i + offset) % 50))
+            if cache.get(key) is None:
+                cache.put(key, str(i))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 200
+    assert stats["bytes"] <= 10000
+
+def test_vectorizer_uses_cache():
+    calls = []
+    vectorizer = JobVectorizer(cache=TextCache())
+    vectorizer._preprocess = lambda text: calls.append(text) or text.lower()
+
+    assert vectorizer.preprocess_text("Python Developer") == "python developer"
+    assert vectorizer.preprocess_text("Python Developer") == "python developer"
+    assert len(calls) == 1
+    assert vectorizer.cache.stats()["hits"] == 1
+
+def test_failures_are_not_cached():
+    vectorizer = JobVectorizer(cache=TextCache())
+
+    def fail(text):
+        raise LookupError("resource missing")
+
+    vectorizer._preprocess = fail
+    assert vectorizer.preprocess_text("Python Developer") is None
+    assert vectorizer.cache.stats()["entries"] == 0
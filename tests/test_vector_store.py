@@ -0,0 +1,110 @@
+import pytest
+import numpy as np
+from scipy import sparse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.vectorizer import JobVectorizer, missing_nltk_resources
+from app.vector_store import VectorStore, encode_vector, decode_vector, install_vector_hooks, remove_vector_hooks
+from app.models import Base, User, Job
+from app.utils import get_models_path
+
+# Failed preprocessing is never stored, so these need the real pipeline
+requires_nltk = pytest.mark.skipif(bool(missing_nltk_resources()), reason="NLTK data is not installed")
+
+@pytest.fixture
+def vectorizer():
+    vectorizer = JobVectorizer()
+    vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+    return vectorizer
+
+@pytest.fixture
+def store(vectorizer):
+    return VectorStore(vectorizer)
+
+@pytest.fixture
+def test_job():
+    return Job(
+        id=1,
+        title="Python Developer",
+        description="Looking for a Python expert",
+        required_skills=["python", "django"],
+        required_experience=2.0,
+        required_education="bachelor",
+        location="New York",
+        remote_ok=True
+    )
+
+@pytest.fixture
+def test_user():
+    return User(
+        id=1,
+        skills=["python", "machine learning"],
+        experience=3.0,
+        education=["bachelor, Computer Science"],
+        location="New York",
+        remote_ok=True
+    )
+
+def test_encode_decode_roundtrip():
+    row = sparse.csr_matrix(np.array([[0.0, 0.6, 0.0, 0.8]], dtype=np.float32))
+    decoded = decode_vector(encode_vector(row), 4)
+    assert decoded.shape == (1, 4)
+    assert np.array_equal(decoded.toarray(), row.toarray())
+
+@requires_nltk
+def test_vector_written_with_version(store, vectorizer, test_job):
+    vector = store.get_vector(test_job, 'job')
+    assert test_job.tfidf_vector['version'] == vectorizer.version
+    assert np.allclose(vector.toarray()[0], vectorizer.transform_job(test_job))
+
+def test_stored_vector_is_reused(store, vectorizer, test_job):
+    stored = sparse.csr_matrix(np.eye(1, len(vectorizer.vectorizer.vocabulary_), 3, dtype=np.float32))
+    test_job.tfidf_vector = {'version': vectorizer.version, 'dim': stored.shape[1], 'job': encode_vector(stored)}
+    assert np.array_equal(store.get_vector(test_job, 'job').toarray(), stored.toarray())
+
+@requires_nltk
+def test_stale_version_is_recomputed(store, vectorizer, test_job):
+    test_job.tfidf_vector = [0.4, 0.3, 0.3]
+    store.get_vector(test_job, 'job')
+    assert test_job.tfidf_vector['version'] == vectorizer.version
+
+@requires_nltk
+def test_user_keeps_both_kinds(store, test_user):
+    store.get_vector(test_user, 'user')
+    store.get_vector(test_user, 'candidate')
+    assert 'user' in test_user.tfidf_vector
+    assert 'candidate' in test_user.tfidf_vector
+
+@requires_nltk
+def test_hooks_fill_vectors_on_flush(store, vectorizer, test_job, test_user):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    hook = install_vector_hooks(store)
+    try:
+        session.add_all([test_job, test_user])
+        session.commit()
+        job = session.get(Job, 1)
+        user = session.get(User, 1)
+        assert job.tfidf_vector['version'] == vectorizer.version
+        assert set(user.tfidf_vector) >= {'user', 'candidate'}
+    finally:
+        remove_vector_hooks(hook)
+        session.close()
+
+def _fail(text):
+    raise LookupError("resource missing")
+
+def test_failed_preprocessing_is_not_stored(store, vectorizer, test_job, monkeypatch):
+    monkeypatch.setattr(vectorizer, '_preprocess', _fail)
+    vector = store.get_vector(test_job, 'job')
+    assert vector.nnz == 0
+    assert test_job.tfidf_vector is None
+
+def test_failed_refresh_discards_stale_vector(store, vectorizer, test_user, monkeypatch):
+    stored = sparse.csr_matrix(np.eye(1, vectorizer.n_features, 3, dtype=np.float32))
+    test_user.tfidf_vector = {'version': vectorizer.version, 'dim': stored.shape[1], 'user': encode_vector(stored)}
+    monkeypatch.setattr(vectorizer, '_preprocess', _fail)
+    store.refresh([test_user], ('user', 'candidate'))
+    assert 'user' not in test_user.tfidf_vector
+    assert store.stored_arrays(test_user, 'user') is None
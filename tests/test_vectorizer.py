@@ -1,12 +1,17 @@
 import pandas as pd
+import numpy as np
 import pytest
+from scipy import sparse
+import subprocess
 import sys
 import os
+from collections import Counter, defaultdict
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import app.vectorizer as vectorizer_module
 from app.vectorizer import JobVectorizer
 from dataclasses import dataclass
-from app.utils import get_data_path, get_models_path
+from app.utils import get_data_path, get_models_path, get_project_root
 
 @dataclass
 class MockJob:
@@ -81,4 +86,196 @@ def test_vectorizer_transform():
     
     assert user_vector is not None
     assert job_vector is not None
-    assert user_vector.shape == job_vector.shape
\ No newline at end of file
+    assert user_vector.shape == job_vector.shape
+
+
+def test_vectorizer_batch_transform():
+    vectorizer = JobVectorizer()
+    vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+    
+    jobs = [
+        MockJob(
+            title="Data Scientist",
+            description="Looking for a Python expert with ML skills",
+            required_skills=['python', 'machine learning'],
+            required_education='master',
+            required_experience=3.0
+        ),
+        MockJob(
+            title="Backend Developer",
+            description="Java developer for microservices",
+            required_skills=['java', 'spring'],
+            required_education='bachelor',
+            required_experience=5.0
+        )
+    ]
+    
+    matrix = vectorizer.transform_jobs(jobs)
+    assert sparse.isspmatrix_csr(matrix)
+    assert matrix.shape == (2, vectorizer.n_features)
+    assert matrix.dtype == np.float32
+    for i, job in enumerate(jobs):
+        assert np.allclose(matrix[i].toarray()[0], vectorizer.transform_job(job))
+    
+    dense = vectorizer.transform_jobs(jobs, dense=True)
+    assert isinstance(dense, np.ndarray)
+    assert dense.dtype == np.float32
+    
+    assert vectorizer.transform_users([]).shape == (0, vectorizer.n_features)
+
+def test_invalid_pipeline_mode():
+    with pytest.raises(ValueError):
+        JobVectorizer(mode='slow')
+
+def test_fast_pipeline_uses_lemma_table():
+    vectorizer = JobVectorizer(mode='fast')
+    vectorizer.lemmas = {'developers': 'developer', 'skills': 'skill', 'building': 'build'}
+    vectorizer.stop_words = frozenset({'with', 'and', 'can', 'not'})
+    
+    assert vectorizer.preprocess_text("Developers with 5+ skills, and building!") == "developer skill build"
+    # word_tokenize splits 'cannot', so the fast tokenizer does too
+    assert vectorizer.preprocess_text("Cannot") == ""
+
+def test_fast_pipeline_matches_default_on_fitted_corpus():
+    texts = [
+        "Senior Python Developer | Building scalable APIs",
+        "Data Scientist | Looking for machine learning experts",
+        "Mobile engineer | Android applications written in Kotlin"
+    ]
+    default_vectorizer = JobVectorizer()
+    try:
+        expected = [default_vectorizer._preprocess(text) for text in texts]
+    except LookupError:
+        pytest.skip("NLTK resources are not installed")
+    
+    fast_vectorizer = JobVectorizer(mode='fast')
+    lemma_counts = defaultdict(Counter)
+    list(fast_vectorizer._lemmatized_texts(texts, lemma_counts))
+    fast_vectorizer._set_lemma_table(lemma_counts)
+    assert [fast_vectorizer.preprocess_text(text) for text in texts] == expected
+
+def test_fast_tables_saved_with_model(tmp_path):
+    vectorizer = JobVectorizer(mode='fast')
+    vectorizer.load_vectorizer(get_models_path('job_vectorizer.pkl'))
+    vectorizer.lemmas = {'developers': 'developer'}
+    vectorizer.stop_words = frozenset({'with'})
+    
+    save_path = tmp_path / "fast_vectorizer.pkl"
+    vectorizer.save_vectorizer(str(save_path))
+    
+    new_vectorizer = JobVectorizer(mode='fast')
+    new_vectorizer.load_vectorizer(str(save_path))
+    assert new_vectorizer.is_fitted()
+    assert new_vectorizer.lemmas == {'developers': 'developer'}
+    assert new_vectorizer.stop_words == frozenset({'with'})
+    assert new_vectorizer.version == vectorizer.version
+
+def test_parallel_preprocessing_matches_serial():
+    vectorizer = JobVectorizer(mode='fast')
+    vectorizer.lemmas = {'developers': 'developer', 'engineers': 'engineer', 'skills': 'skill'}
+    vectorizer.stop_words = frozenset({'with', 'and', 'for'})
+    texts = [f"Developers and engineers with {i} skills for team {i % 7}" for i in range(200)]
+    
+    serial = list(vectorizer.preprocess_many(texts))
+    progress = []
+    parallel = list(vectorizer.preprocess_many(texts, n_jobs=2, chunk_size=16, progress=progress.append))
+    
+    assert parallel == serial
+    assert progress == sorted(progress)
+    assert progress[-1] == len(texts)
+
+def test_reusable_executor():
+    vectorizer = JobVectorizer(mode='fast')
+    vectorizer.stop_words = frozenset({'with'})
+    texts = ["Python with Django", "Java with Spring"]
+    
+    with vectorizer.make_executor(n_jobs=2) as executor:
+        first = list(vectorizer.preprocess_many(texts, executor=executor, chunk_size=1))
+        second = list(vectorizer.preprocess_many(texts, executor=executor, chunk_size=1))
+    assert first == second == list(vectorizer.preprocess_many(texts))
+
+def test_parallel_fit_is_deterministic():
+    texts = [
+        f"{title} | {description}"
+        for title, description in [
+            ("Python Developer", "Building web services with Django and PostgreSQL"),
+            ("Data Scientist", "Training machine learning models in Python"),
+            ("Backend Engineer", "Designing Java microservices running on Kubernetes")
+        ]
+    ] * 20
+    
+    serial = JobVectorizer(mode='fast')
+    try:
+        serial._tokenize_and_lemmatize(texts[0])
+    except LookupError:
+        pytest.skip("NLTK resources are not installed")
+    serial.vectorizer.set_params(min_df=1)
+    serial.fit_texts(texts)
+    
+    parallel = JobVectorizer(mode='fast')
+    parallel.vectorizer.set_params(min_df=1)
+    parallel.fit_texts(iter(texts), n_jobs=2, chunk_size=7)
+    
+    assert parallel.lemmas == serial.lemmas
+    assert parallel.version == serial.version
+
+def test_streaming_fit_matches_tfidf_fit():
+    rng = np.random.default_rng(0)
+    # Zipf-like word frequencies, so the max_features cut falls between distinct totals
+    words = np.array([f"term{i}" for i in range(400)] + ["the", "and"])
+    weights = 1.0 / np.arange(1, len(words) + 1)
+    texts = [
+        ' '.join(rng.choice(words, size=rng.integers(0, 30), p=weights / weights.sum()))
+        for _ in range(1000)
+    ]
+    expected = vectorizer_module._new_tfidf_vectorizer().set_params(max_features=50).fit(texts)
+    fitted = vectorizer_module.fit_tfidf_counts(
+        vectorizer_module._new_tfidf_vectorizer().set_params(max_features=50), iter(texts)
+    )
+    assert fitted.vocabulary_ == expected.vocabulary_
+    np.testing.assert_array_equal(fitted.idf_, expected.idf_)
+    np.testing.assert_allclose(fitted.transform(texts[:20]).toarray(), expected.transform(texts[:20]).toarray())
+
+def test_import_does_not_load_heavy_modules():
+    code = "import sys, app.vectorizer; print(sorted(m for m in ('nltk', 'pandas', 'sklearn') if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=get_project_root(), capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+def test_model_loaded_on_first_use():
+    vectorizer = JobVectorizer(model_path=get_models_path('job_vectorizer.pkl'))
+    assert vectorizer._vectorizer is None
+    assert vectorizer.is_fitted()
+    assert vectorizer._vectorizer is not None
+
+def test_missing_nltk_resources_fail_with_instructions(monkeypatch):
+    monkeypatch.setattr(vectorizer_module, 'missing_nltk_resources', lambda names: ('wordnet',))
+    with pytest.raises(LookupError, match="python -m nltk.downloader wordnet"):
+        vectorizer_module.require_nltk_resources()
+
+def test_resources_installed_later_are_found(monkeypatch):
+    import nltk
+    installed = set()
+
+    def find(path):
+        if path not in installed:
+            raise LookupError(path)
+        return path
+
+    monkeypatch.setattr(nltk.data, 'find', find)
+    monkeypatch.setattr(vectorizer_module, '_found_nltk_resources', set())
+    assert vectorizer_module.missing_nltk_resources(('wordnet',)) == ('wordnet',)
+    installed.add(vectorizer_module.NLTK_RESOURCES['wordnet'])
+    assert vectorizer_module.missing_nltk_resources(('wordnet',)) == ()
+
+def test_fitting_without_nltk_data_fails(monkeypatch):
+    monkeypatch.setattr(vectorizer_module, 'missing_nltk_resources', lambda names: ('punkt',))
+    with pytest.raises(LookupError, match="punkt"):
+        JobVectorizer(mode='fast').fit_texts(["Python Developer"])
+
+def test_fast_mode_with_saved_stopwords_needs_no_nltk_data():
+    vectorizer = JobVectorizer(mode='fast')
+    vectorizer.stop_words = frozenset({'with'})
+    assert vectorizer.required_nltk_resources() == ()
+    assert JobVectorizer().required_nltk_resources() == tuple(vectorizer_module.NLTK_RESOURCES)